@@ -4,15 +4,20 @@ SQLAdmin 管理后台（v1.4 话题系统）
 访问地址：https://metalks.me/admin
 """
 
-from sqladmin import Admin, ModelView
+from sqladmin import Admin, ModelView, action
 from sqladmin.authentication import AuthenticationBackend
-from sqlalchemy import select
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 
 from backend.core.security import decode_access_token
+from backend.core.dependencies import load_request_user
 from backend.db.database import get_sessionmaker
+from backend.db.crud import electrolyte_log as electrolyte_log_crud
+from backend.services import electrolyte_service
+from backend.utils import sensitive_words
 from backend.db.models import (
     ElectrolyteLog,
+    ElectrolyteSummary,
     Message,
     NicknameHistory,
     Notification,
@@ -53,13 +58,10 @@ class AdminAuth(AuthenticationBackend):
         if not user_id:
             return False
 
+        # 令牌验签走 decode_access_token 的缓存；User 存入请求上下文，同一请求不再重复查询
         # ✅ 修复：使用 get_sessionmaker() 替代不存在的 AsyncSessionLocal
         async with get_sessionmaker()() as db:
-            user = (
-                await db.execute(
-                    select(User).where(User.id == int(user_id))
-                )
-            ).scalar_one_or_none()
+            user = await load_request_user(request, db, int(user_id))
 
         return bool(user and user.is_admin)
 
@@ -166,6 +168,19 @@ class SensitiveWordAdmin(ModelView, model=SensitiveWord):
     column_default_sort = ("created_at", True)
     form_excluded_columns = ["created_at"]
 
+    # 后台增删改敏感词后递增版本号，所有 worker 据此重建自动机
+    async def _bump_version(self) -> None:
+        async with get_sessionmaker()() as db:
+            await sensitive_words.bump_version(db)
+            await db.commit()
+        sensitive_words.invalidate_cache()
+
+    async def after_model_change(self, data, model, is_created, request) -> None:
+        await self._bump_version()
+
+    async def after_model_delete(self, model, request) -> None:
+        await self._bump_version()
+
 
 class NicknameHistoryAdmin(ModelView, model=NicknameHistory):
     name = "昵称历史"
@@ -311,6 +326,37 @@ class ElectrolyteLogAdmin(ModelView, model=ElectrolyteLog):
     column_labels = _labels(amount="金额", reason="原因", ref_name="关联名称", balance_after="操作后余额")
 
 
+class ElectrolyteSummaryAdmin(ModelView, model=ElectrolyteSummary):
+    name = "电解液汇总"
+    name_plural = "电解液汇总"
+    icon = "fa-solid fa-calculator"
+    column_list = ["id", "user_id", "reason", "ref_id", "ref_name", "total", "log_count"]
+    column_searchable_list = ["user_id"]
+    can_create = False
+    can_edit = False
+    can_delete = False
+    column_labels = _labels(
+        reason="原因", ref_id="话题ID", ref_name="关联名称", total="合计", log_count="流水条数"
+    )
+
+    @action(
+        name="rebuild",
+        label="按流水重建并校验",
+        confirmation_message="将按全部电解液流水重建汇总表，确定继续？",
+        add_in_detail=False,
+    )
+    async def rebuild(self, request: Request) -> JSONResponse:
+        async with get_sessionmaker()() as db:
+            result = await electrolyte_service.rebuild_and_verify_summaries(db)
+        return JSONResponse(result)
+
+    @action(name="verify", label="校验汇总", add_in_detail=False)
+    async def verify(self, request: Request) -> JSONResponse:
+        async with get_sessionmaker()() as db:
+            mismatches = await electrolyte_log_crud.verify_summaries(db)
+        return JSONResponse({"mismatches": mismatches})
+
+
 # ============================================================
 # 创建 Admin 实例
 # ============================================================
@@ -324,7 +370,7 @@ _VIEWS: list[type[ModelView]] = [
     # 话题系统
     TopicAdmin, TagAdmin, TopicAuthorAdmin, TopicTagAdmin, TopicLikeAdmin,
     # 通知系统
-    ElectrolyteLogAdmin,NotificationAdmin,
+    ElectrolyteLogAdmin, ElectrolyteSummaryAdmin, NotificationAdmin,
 ]
 
 
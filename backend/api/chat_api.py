@@ -50,12 +50,9 @@ def create_chat_router(chat_service: ChatService):
 
         async def event_generator():
              # v1.4.3: 检查 session 话题是否不可用
-            from sqlalchemy import select as sa_select
-            from backend.db.models import Session as SessionModel
-            sess_result = await db.execute(
-                sa_select(SessionModel).where(SessionModel.id == session_id)
-            )
-            existing_session = sess_result.scalar_one_or_none()
+            # （session 与特质画像一次查询取回，原样交给 stream_response 复用）
+            turn_context = await chat_service.load_turn_context(db, session_id, user_id)
+            existing_session = turn_context[0]
             if existing_session and existing_session.topic_unavailable:
                 error_event = {
                     "type": "error",
@@ -75,6 +72,7 @@ def create_chat_router(chat_service: ChatService):
                     force_end=force_end,
                     db=db,
                     user_id=user_id,
+                    turn_context=turn_context,
                 ):
                     yield "data: " + json.dumps(event, ensure_ascii=False) + "\n\n"
 
@@ -0,0 +1,59 @@
+# backend/api/events_api.py
+"""
+用户事件推送 API（SSE）
+- 报告就绪 / 总结就绪 / 话题通知，替代前端定时轮询
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from backend.core.dependencies import get_current_user
+from backend.services.event_bus import get_event_bus
+
+router = APIRouter(tags=["events"])
+
+# 心跳间隔：需小于 nginx proxy_read_timeout（300s），同时用于检测客户端断开
+HEARTBEAT_SECONDS = 20
+
+
+# -------------------------------------------------------
+# 事件流
+# -------------------------------------------------------
+@router.get("/events/stream")
+async def event_stream(
+    request: Request,
+    user_id: int = Depends(get_current_user)
+):
+    """
+    订阅当前用户的事件（text/event-stream）
+
+    事件格式（data 为 JSON）：
+    - {"type": "connected"}
+    - {"type": "report_ready", "session_id": str}
+    - {"type": "summary_ready", "session_id": str, "summary": str}
+    - {"type": "notification", "module": str, "ref_id": int}
+    """
+    bus = get_event_bus()
+
+    async def event_generator():
+        async with bus.subscribe(user_id) as sub:
+            # 客户端断线后 5 秒重连
+            yield "retry: 5000\n"
+            yield "data: " + json.dumps({"type": "connected"}) + "\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield "data: " + json.dumps(event, ensure_ascii=False) + "\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
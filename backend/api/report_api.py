@@ -26,12 +26,14 @@ async def get_report_status(
     user_id: int = Depends(get_current_user)
 ):
     """
-    查询指定 session 的报告是否已生成
+    查询指定 session 的报告是否已生成（同时返回后台生成的一句话总结）
 
     返回：
     {
         "ready": bool,
-        "session_id": str
+        "session_id": str,
+        "summary": str,
+        "summary_ready": bool
     }
     """
     result = await db.execute(
@@ -47,7 +49,9 @@ async def get_report_status(
 
     return {
         "ready": bool(session.report_ready),
-        "session_id": session_id
+        "session_id": session_id,
+        "summary": session.summary or "",
+        "summary_ready": session.summary is not None,
     }
 
 
@@ -7,30 +7,46 @@
 - 手动标记会话完成
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import cast
+from typing import cast, Optional
 from datetime import datetime
 
 from backend.db.database import get_db
 from backend.core.dependencies import get_current_user
 from backend.db.crud import session as session_crud  # ✅ 新增
 from backend.db.models import Session
+from backend.services.db_history_manager import history_cache
 
 router = APIRouter(tags=["sessions"])
 
 
 # -------------------------------------------------------
-# 1. 获取当前用户的全部对话列表
+# 1. 获取当前用户的对话列表
 # -------------------------------------------------------
 @router.get("/sessions")
 async def list_sessions(
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user),
 ):
-    # ✅ 原来这里有 ~20 行 SQL 查询，现在只需 1 行
-    return await session_crud.get_user_sessions(db, user_id)
+    """
+    - 不传 limit：返回全部会话（数组，兼容旧前端）
+    - 传 limit：游标分页，返回 {"sessions": [...], "next_cursor": str | null}，
+      下一页把 next_cursor 作为 cursor 传回
+    """
+    if limit is None:
+        return await session_crud.get_user_sessions(db, user_id)
+
+    try:
+        items, next_cursor = await session_crud.get_user_sessions_page(
+            db, user_id, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"sessions": items, "next_cursor": next_cursor}
 
 
 # -------------------------------------------------------
@@ -67,6 +83,7 @@ async def delete_session(
 
     session.deleted_at = datetime.utcnow()
     await db.commit()
+    history_cache.invalidate(session_id)
 
     return {"status": "ok", "session_id": session_id}
 
@@ -10,8 +10,10 @@ from typing import List, Optional
 import re
 
 from backend.db.database import get_db
-from backend.core.dependencies import get_current_user
+from backend.core.dependencies import get_current_user, get_user_context, require_admin
 from backend.services import topic_service
+from backend.services.topic_search import get_topic_search, query_tokens
+from backend.db.models import User
 from backend.db.crud import tag as tag_crud
 from backend.db.crud import topic_author as author_crud
 from backend.utils.sensitive_words import check_sensitive_words_detailed
@@ -72,14 +74,13 @@ router = APIRouter(prefix="/topics", tags=["topics"])
 async def create_topic(
     payload: CreateTopicPayload,
     db: AsyncSession = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user),
+    user: Optional[User] = Depends(get_user_context),
 ):
     """
     创建话题
     - ✅ 官方账号（is_admin）创建的话题自动标记为官方话题
     """
-    from backend.db.crud import user as user_crud
-    user = await user_crud.get_user_by_id(db, user_id)
     is_official = bool(user and user.is_admin)
 
     result = await topic_service.create_topic(
@@ -103,11 +104,12 @@ async def create_topic(
 # 2. 获取话题详情（✅ 作者可查看自己的 pending 话题）
 # ============================================================
 
-@router.get("/{topic_id}")
+@router.get("/{topic_id:int}")
 async def get_topic(
     topic_id: int,
     db: AsyncSession = Depends(get_db),
-    user_id: Optional[int] = Depends(get_current_user)
+    user_id: Optional[int] = Depends(get_current_user),
+    user: Optional[User] = Depends(get_user_context),
 ):
     """
     获取话题详情
@@ -118,9 +120,6 @@ async def get_topic(
     include_inactive = False
 
     if user_id:
-        from backend.db.crud import user as user_crud
-        user = await user_crud.get_user_by_id(db, user_id)
-
         if user and user.is_admin:
             include_inactive = True
         else:
@@ -209,6 +208,16 @@ async def get_topics(
         except ValueError:
             raise HTTPException(status_code=400, detail="author_ids 格式错误")
 
+    # 关键词经全文索引解析为候选 id，其余筛选/排序/分页仍走 SQL；
+    # 查询中没有可索引的字符（假名、谚文、符号等）时退回标题包含匹配
+    topic_ids = None
+    title_search = None
+    if search:
+        if query_tokens(search):
+            topic_ids = await get_topic_search().match_ids(db, search)
+        else:
+            title_search = search
+
     topics, total = await topic_crud.get_topics(
         db=db,
         skip=skip,
@@ -217,7 +226,8 @@ async def get_topics(
         is_active=is_active,
         is_official=is_official,
         tag_id=tag_id,
-        search=search,
+        topic_ids=topic_ids,
+        search=title_search,
         author_ids=parsed_author_ids,
         sort_by=sort_by,
         order=order
@@ -298,19 +308,22 @@ async def search_topics(
     limit: int = Query(10, ge=1, le=50),
     db: AsyncSession = Depends(get_db)
 ):
-    """搜索话题（只返回已审核且启用的）"""
-    from backend.db.crud import topic as topic_crud
-
-    topics, _ = await topic_crud.get_topics(
-        db=db,
-        skip=0,
-        limit=limit,
-        status="approved",
-        is_active=True,
-        search=q,
-        sort_by="likes_count",
-        order="desc"
-    )
+    """搜索话题（只返回已审核且启用的，按相关度 + 热度排序）"""
+    if query_tokens(q):
+        topics = await get_topic_search().search(db, q, limit=limit)
+    else:
+        # 无法分词的查询：退回标题包含匹配，按点赞排序
+        from backend.db.crud import topic as topic_crud
+        topics, _ = await topic_crud.get_topics(
+            db=db,
+            skip=0,
+            limit=limit,
+            status="approved",
+            is_active=True,
+            search=q,
+            sort_by="likes_count",
+            order="desc"
+        )
 
     topic_list = []
     for topic in topics:
@@ -451,15 +464,9 @@ async def review_topic(
     topic_id: int,
     payload: ReviewTopicPayload,
     db: AsyncSession = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    admin: User = Depends(require_admin),
 ):
     """审核话题（管理员功能）"""
-    from backend.db.crud import user as user_crud
-    user = await user_crud.get_user_by_id(db, user_id)
-
-    if not user or not user.is_admin:
-        raise HTTPException(status_code=403, detail="需要管理员权限")
-
     result = await topic_service.review_topic(
         db=db,
         topic_id=topic_id,
@@ -480,7 +487,8 @@ async def review_topic(
 async def deactivate_topic(
     topic_id: int,
     db: AsyncSession = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user),
+    user: Optional[User] = Depends(get_user_context),
 ):
     """
     下架话题
@@ -488,8 +496,6 @@ async def deactivate_topic(
     权限：主要作者或管理员均可操作。
     管理员下架时会自动向所有作者发送通知。
     """
-    from backend.db.crud import user as user_crud
-    user = await user_crud.get_user_by_id(db, user_id)
     is_admin = bool(user and user.is_admin)
 
     result = await topic_service.deactivate_topic(
@@ -512,11 +518,10 @@ async def deactivate_topic(
 async def reactivate_topic(
     topic_id: int,
     db: AsyncSession = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user),
+    user: Optional[User] = Depends(get_user_context),
 ):
     """重新上架话题"""
-    from backend.db.crud import user as user_crud
-    user = await user_crud.get_user_by_id(db, user_id)
     is_admin = bool(user and user.is_admin)
 
     result = await topic_service.reactivate_topic(
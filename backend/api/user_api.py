@@ -4,24 +4,27 @@
 - 用户信息查询/修改（查询时自动触发每日签到）
 - 昵称管理（修改、历史查询）
 - 电解液查询
+- 电解液流水 / 昵称历史导出（CSV / NDJSON）
 - 密码修改
 - 用户搜索（按ID或昵称）
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, case
 from pydantic import BaseModel
 from typing import Optional
 
-from backend.db.database import get_db
-from backend.core.dependencies import get_current_user
+from backend.db.database import get_db, get_sessionmaker
+from backend.core.dependencies import get_current_user, get_user_context, require_admin
 from backend.db.crud import electrolyte as electrolyte_crud
 from backend.db.crud import electrolyte_log as electrolyte_log_crud
 from backend.db.crud import user as user_crud
 from backend.db.crud import nickname as nickname_crud
 from backend.services import nickname_service, electrolyte_service
 from backend.utils.validators import validate_password_strength
+from backend.utils.export import export_lines, EXPORT_MEDIA_TYPES
 from backend.db.models import User
 
 
@@ -52,7 +55,8 @@ router = APIRouter(prefix="/user", tags=["user"])
 @router.get("/profile")
 async def get_user_profile(
     db: AsyncSession = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user),
+    user: Optional[User] = Depends(get_user_context),
 ):
     """
     获取当前用户信息
@@ -62,8 +66,6 @@ async def get_user_profile(
         - 通过 last_login_date 判断，已签到则不重复发放
         - 返回的 electrolyte_balance 已包含签到奖励
     """
-    user = await user_crud.get_user_by_id(db, user_id)
-
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
 
@@ -224,13 +226,20 @@ async def change_nickname(
 async def get_nickname_history(
     limit: int = Query(10, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user)
 ):
-    """查询昵称修改历史"""
-    records = await nickname_crud.get_nickname_history(db, user_id, limit, offset)
+    """查询昵称修改历史（传 cursor 时按键集翻页）"""
+    try:
+        records, next_cursor = await nickname_crud.get_nickname_history(
+            db, user_id, limit, offset, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
+        "next_cursor": next_cursor,
         "history": [
             {
                 "old_nickname": r.old_nickname,
@@ -260,12 +269,19 @@ async def get_electrolyte(
 async def get_electrolyte_detail(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user),
 ):
-    """查询电解液变动明细"""
-    logs = await electrolyte_log_crud.get_logs_by_user(db, user_id, skip, limit)
+    """查询电解液变动明细（传 cursor 时按键集翻页）"""
+    try:
+        logs, next_cursor = await electrolyte_log_crud.get_logs_by_user(
+            db, user_id, skip, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
+        "next_cursor": next_cursor,
         "logs": [
             {
                 "id": log.id,
@@ -291,4 +307,69 @@ async def get_electrolyte_summary(
     return {
         "balance": balance or 0.0,
         **summary,
-    }
\ No newline at end of file
+    }
+
+
+# ============================================================
+# 流式导出（CSV / NDJSON）
+# ============================================================
+
+_ELECTROLYTE_EXPORT_COLUMNS = (
+    "id", "user_id", "amount", "reason", "ref_id", "ref_name", "balance_after", "created_at",
+)
+_NICKNAME_EXPORT_COLUMNS = (
+    "id", "user_id", "old_nickname", "new_nickname", "electrolyte_cost", "created_at",
+)
+
+
+def _export_response(source, columns, fmt: str, filename: str) -> StreamingResponse:
+    """
+    source(db) 返回行迭代器；导出使用独立的数据库会话，生命周期与响应流一致
+    """
+    async def body():
+        async with get_sessionmaker()() as db:
+            async for chunk in export_lines(source(db), columns, fmt):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@router.get("/electrolyte/export")
+async def export_electrolyte_logs(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user_id: int = Depends(get_current_user),
+):
+    """导出当前用户的全部电解液流水"""
+    return _export_response(
+        lambda db: electrolyte_log_crud.stream_logs(db, user_id),
+        _ELECTROLYTE_EXPORT_COLUMNS, format, "electrolyte_logs",
+    )
+
+
+@router.get("/nickname/history/export")
+async def export_nickname_history(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user_id: int = Depends(get_current_user),
+):
+    """导出当前用户的全部昵称修改历史"""
+    return _export_response(
+        lambda db: nickname_crud.stream_nickname_history(db, user_id),
+        _NICKNAME_EXPORT_COLUMNS, format, "nickname_history",
+    )
+
+
+@router.get("/admin/electrolyte/export")
+async def admin_export_electrolyte_logs(
+    target_user_id: Optional[int] = Query(None, alias="user_id", description="不传则导出全部用户"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    admin: User = Depends(require_admin),
+):
+    """导出电解液流水（管理员功能）"""
+    return _export_response(
+        lambda export_db: electrolyte_log_crud.stream_logs(export_db, target_user_id),
+        _ELECTROLYTE_EXPORT_COLUMNS, format, "electrolyte_logs_all",
+    )
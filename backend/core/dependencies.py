@@ -1,5 +1,11 @@
-from fastapi import HTTPException, Request
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from backend.core.security import decode_access_token
+from backend.db.database import get_db
+from backend.db.models import User
 
 async def get_current_user(request: Request):
 
@@ -13,12 +19,50 @@ async def get_current_user(request: Request):
 
 
     user_id_str = payload.get("sub")
-    
+
     if not user_id_str:
         raise HTTPException(status_code=401, detail="Invalid token: missing user ID")
-    
+
     try:
         user_id = int(user_id_str)
     except (ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid user ID in token")
     return user_id
+
+
+# ============================================================
+# 请求级用户上下文：同一请求内 User 只查询一次
+# ============================================================
+
+async def load_request_user(
+    request: Request,
+    db: AsyncSession,
+    user_id: int,
+) -> Optional[User]:
+    """
+    取当前请求的 User（缓存在 request.state.user，供依赖项、后台鉴权等共享）
+
+    用户不存在（已被删除）时返回 None。
+    """
+    cached = getattr(request.state, "user", None)
+    if cached is not None and cached.id == user_id:
+        return cached
+    user = await db.get(User, user_id)
+    request.state.user = user
+    return user
+
+
+async def get_user_context(
+    request: Request,
+    user_id: int = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Optional[User]:
+    """当前登录用户的 User 对象（与端点共用同一个 db session）"""
+    return await load_request_user(request, db, user_id)
+
+
+async def require_admin(user: Optional[User] = Depends(get_user_context)) -> User:
+    """管理员权限校验"""
+    if not user or not user.is_admin:
+        raise HTTPException(status_code=403, detail="需要管理员权限")
+    return user
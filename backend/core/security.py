@@ -3,8 +3,15 @@
 安全工具：JWT 令牌 + 密码哈希
 """
 
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 import os
@@ -15,24 +22,158 @@ SECRET_KEY = os.environ["JWT_SECRET_KEY"]
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30  # 30天
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt 默认成本（2^12 轮，单次约 0.1–0.3 秒）
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+def _crypt_context(rounds: int) -> CryptContext:
+    # min = max = default：成本配置变更后，旧成本的哈希在 verify_and_update 时都会被标记为需重算
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = _crypt_context(DEFAULT_BCRYPT_ROUNDS)
+
+
+def _prepare_secret(password) -> str:
+    """超过 bcrypt 72 字节上限的密码先做 SHA-256（哈希与校验必须一致）"""
+    password = str(password) if password else ""
+    if len(password.encode('utf-8')) > 72:
+        password = hashlib.sha256(password.encode('utf-8')).hexdigest()
+    return password
 
 
 def verify_password(plain_password, hashed):
-    plain_password = str(plain_password) if plain_password else ""
-    return pwd_context.verify(plain_password, hashed)
+    return pwd_context.verify(_prepare_secret(plain_password), hashed)
 
 
 def hash_password(password: str):
-    password = str(password) if password else ""
+    password = _prepare_secret(password)
     if not password:
         raise ValueError("Password cannot be empty")
-    if len(password.encode('utf-8')) > 72:
-        import hashlib
-        password = hashlib.sha256(password.encode('utf-8')).hexdigest()
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password, hashed) -> Tuple[bool, Optional[str]]:
+    """校验密码；哈希成本与当前配置不一致时一并返回按当前配置重算的新哈希"""
+    return pwd_context.verify_and_update(_prepare_secret(plain_password), hashed)
+
+
+# ============================================================
+# 密码哈希线程池
+# ============================================================
+class PasswordHasher:
+    """
+    bcrypt 在专用的有界线程池中执行
+
+    bcrypt 是故意做慢的 CPU 运算，直接在协程里调用会阻塞事件循环（同一 worker 上
+    所有 SSE 流都会卡住）。这里最多 max_workers 个线程并发计算，其余排队；
+    bcrypt 计算期间释放 GIL，事件循环照常调度。
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+
+        # 指标（线程池线程与事件循环都会更新）
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rehashed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    async def _run(self, func: Callable, *args):
+        submitted = time.monotonic()
+        with self._stats_lock:
+            self._queued += 1
+
+        def job():
+            started = time.monotonic()
+            wait = started - submitted
+            with self._stats_lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            try:
+                return func(*args)
+            finally:
+                with self._stats_lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._run_total += time.monotonic() - started
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password, hashed) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    async def verify_and_update(self, password, hashed) -> Tuple[bool, Optional[str]]:
+        ok, new_hash = await self._run(verify_and_update_password, password, hashed)
+        if new_hash:
+            with self._stats_lock:
+                self._rehashed += 1
+        return ok, new_hash
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def metrics(self) -> dict:
+        done = self._completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "bcrypt_rounds": pwd_context.handler("bcrypt").default_rounds,
+            "queued": self._queued,
+            "running": self._running,
+            "completed_total": self._completed,
+            "rehashed_total": self._rehashed,
+            "avg_wait_ms": round(self._wait_total / done * 1000, 2),
+            "max_wait_ms": round(self._wait_max * 1000, 2),
+            "avg_run_ms": round(self._run_total / done * 1000, 2),
+        }
+
+
+_hasher = PasswordHasher()
+
+
+def configure_password_hasher(
+    rounds: int = DEFAULT_BCRYPT_ROUNDS, **options
+) -> PasswordHasher:
+    """按配置替换 bcrypt 成本与进程级哈希线程池（main 启动时调用）"""
+    global pwd_context, _hasher
+    pwd_context = _crypt_context(rounds)
+    _hasher.shutdown()
+    _hasher = PasswordHasher(**options)
+    return _hasher
+
+
+async def hash_password_async(password: str) -> str:
+    return await _hasher.hash(password)
+
+
+async def verify_password_async(plain_password, hashed) -> bool:
+    return await _hasher.verify(plain_password, hashed)
+
+
+async def verify_and_update_password_async(
+    plain_password, hashed
+) -> Tuple[bool, Optional[str]]:
+    return await _hasher.verify_and_update(plain_password, hashed)
+
+
 def create_access_token(data: dict, expires_delta=None):
     to_encode = data.copy()
     if expires_delta:
@@ -45,9 +186,84 @@ def create_access_token(data: dict, expires_delta=None):
     return token
 
 
+# ============================================================
+# 已验证令牌缓存
+# ============================================================
+class TokenCache:
+    """
+    已验签令牌的有界 LRU 缓存
+
+    - 键为令牌的 SHA-256 摘要（不在内存中保留令牌原文）
+    - 条目在令牌自身的 exp 到期后失效；只缓存验签成功的令牌
+    同一令牌在有效期内的后续请求省去一次完整的 HMAC 验签与 claims 校验。
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return dict(payload)
+
+    def put(self, token: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or self.max_entries <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (dict(payload), float(exp))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> dict:
+        total = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits_total": self._hits,
+            "misses_total": self._misses,
+            "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+        }
+
+
+_token_cache = TokenCache()
+
+
+def configure_token_cache(**options) -> TokenCache:
+    """按配置替换进程级令牌缓存（main 启动时调用）"""
+    global _token_cache
+    _token_cache = TokenCache(**options)
+    return _token_cache
+
+
 def decode_access_token(token: str):
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        _token_cache.put(token, payload)
         return payload
     except JWTError as e:
         # 使用 logging 替代 print，避免泄露安全信息到 stdout
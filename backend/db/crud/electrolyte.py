@@ -4,12 +4,16 @@
 - 查询余额
 - 增加电解液
 - 扣除电解液
+- 转账（投喂：扣款 + 按权重分给作者）
 """
 
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from backend.db.models import User, ElectrolyteLog
+from sqlalchemy import select, update, case
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
+from backend.db.models import User
+from backend.db.crud import electrolyte_log as electrolyte_log_crud
 
 
 # ============================================================
@@ -40,6 +44,67 @@ async def get_electrolyte_balance(
     return user.electrolyte_number
 
 
+# ============================================================
+# 原子余额变动（条件 UPDATE，避免先读后写的并发丢失与透支）
+# ============================================================
+
+async def _debit(
+    db: AsyncSession,
+    user_id: int,
+    amount: float,
+    allow_negative: bool = False,
+) -> tuple[bool, str]:
+    """
+    UPDATE users SET electrolyte_number = electrolyte_number - :a
+    WHERE id = :u AND electrolyte_number >= :a
+
+    不提交；失败时返回 (False, 原因)
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(electrolyte_number=User.electrolyte_number - amount)
+        .execution_options(synchronize_session=False)
+    )
+    if not allow_negative:
+        stmt = stmt.where(User.electrolyte_number >= amount)
+
+    result = await db.execute(stmt)
+    if result.rowcount == 1:
+        return True, ""
+
+    exists = (await db.execute(select(User.id).where(User.id == user_id))).first()
+    return False, "电解液不足" if exists else "用户不存在"
+
+
+async def _credit(db: AsyncSession, amounts: Dict[int, float]) -> int:
+    """
+    多个用户各自加款，一条 UPDATE（CASE id WHEN ... THEN ...）完成；不提交，返回命中行数
+    """
+    if not amounts:
+        return 0
+    result = await db.execute(
+        update(User)
+        .where(User.id.in_(amounts))
+        .values(electrolyte_number=User.electrolyte_number + case(amounts, value=User.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def _balances(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, float]:
+    """一次 IN 查询回读余额，并同步到会话中已加载的 User 对象"""
+    result = await db.execute(
+        select(User.id, User.electrolyte_number).where(User.id.in_(set(user_ids)))
+    )
+    balances = {uid: balance for uid, balance in result.all()}
+    for uid, balance in balances.items():
+        user = db.identity_map.get(identity_key(User, uid))
+        if user is not None:
+            set_committed_value(user, "electrolyte_number", balance)
+    return balances
+
+
 # ============================================================
 # 电解液增加
 # ============================================================
@@ -66,32 +131,23 @@ async def add_electrolyte(
     if amount <= 0:
         return False, "增加数量必须大于0", 0.0
     
-    result = await db.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-    
-    if not user:
+    if await _credit(db, {user_id: amount}) == 0:
         return False, "用户不存在", 0.0
     
-    # 增加电解液
-    user.electrolyte_number += amount
-    
     # 写流水记录
-    log = ElectrolyteLog(
-        user_id=user_id,
-        amount=amount,
-        reason=reason,
-        ref_id=kwargs.get("ref_id"),
-        ref_name=kwargs.get("ref_name"),
-        balance_after=user.electrolyte_number,
-    )
-    db.add(log)
+    balance = (await _balances(db, [user_id]))[user_id]
+    await electrolyte_log_crud.add_logs(db, [{
+        "user_id": user_id,
+        "amount": amount,
+        "reason": reason,
+        "ref_id": kwargs.get("ref_id"),
+        "ref_name": kwargs.get("ref_name"),
+        "balance_after": balance,
+    }])
     
     await db.commit()
-    await db.refresh(user)
     
-    return True, f"成功增加 {amount} 电解液", user.electrolyte_number
+    return True, f"成功增加 {amount} 电解液", balance
 
 
 # ============================================================
@@ -122,36 +178,104 @@ async def deduct_electrolyte(
     if amount <= 0:
         return False, "扣除数量必须大于0", 0.0
     
-    result = await db.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        return False, "用户不存在", 0.0
-    
-    # 检查余额是否足够
-    if not allow_negative and user.electrolyte_number < amount:
-        return False, "电解液不足", user.electrolyte_number
-    
-    # 扣除电解液
-    user.electrolyte_number -= amount
+    # 条件扣款：余额检查与扣除在同一条 UPDATE 中，并发请求不会透支
+    # 失败时条件 UPDATE 未改动任何行，不回滚：事务归调用方所有
+    success, msg = await _debit(db, user_id, amount, allow_negative)
+    if not success:
+        balance = (await _balances(db, [user_id])).get(user_id)
+        return False, msg, balance or 0.0
     
     # 写流水记录（支出取负数）
-    log = ElectrolyteLog(
-        user_id=user_id,
-        amount=-amount,
-        reason=reason,
-        ref_id=kwargs.get("ref_id"),
-        ref_name=kwargs.get("ref_name"),
-        balance_after=user.electrolyte_number,
-    )
-    db.add(log)
+    balance = (await _balances(db, [user_id]))[user_id]
+    await electrolyte_log_crud.add_logs(db, [{
+        "user_id": user_id,
+        "amount": -amount,
+        "reason": reason,
+        "ref_id": kwargs.get("ref_id"),
+        "ref_name": kwargs.get("ref_name"),
+        "balance_after": balance,
+    }])
     
     await db.commit()
-    await db.refresh(user)
     
-    return True, f"成功扣除 {amount} 电解液", user.electrolyte_number
+    return True, f"成功扣除 {amount} 电解液", balance
+
+
+# ============================================================
+# 电解液转账（一个事务：扣款 + 多人入账 + 流水）
+# ============================================================
+
+async def transfer_electrolyte(
+    db: AsyncSession,
+    from_user_id: int,
+    amount: float,
+    credits: List[Tuple[int, float]],
+    out_reason: str,
+    in_reason: str,
+    ref_id: Optional[int] = None,
+    ref_name: Optional[str] = None,
+    commit: bool = True,
+) -> tuple[bool, str, Dict[int, float]]:
+    """
+    付款方扣款并按 credits 分给收款方，全部在一个事务内完成
+
+    参数:
+        from_user_id: 付款方
+        amount: 扣款总额（必须为正数）
+        credits: [(收款用户ID, 金额)]，可包含付款方自己（自我投喂）
+        out_reason / in_reason: 支出 / 收入流水的 reason
+        commit: 是否立即提交（调用方需要在同一事务内追加其他写入时传 False）
+
+    返回:
+        (是否成功, 消息, 操作后余额 {user_id: balance})
+
+    注意:
+        - 扣款为条件 UPDATE（余额 >= amount 才成功），并发请求不会重复花费
+        - 入账为一条 CASE UPDATE，流水一条批量 INSERT，余额一次 IN 查询回读
+        - 余额不足 / 用户不存在时什么都没写，直接返回失败，不回滚调用方的事务
+        - 中途抛异常时整体回滚，不会出现"已扣款未入账"
+    """
+    if amount <= 0:
+        return False, "扣除数量必须大于0", {}
+
+    incoming: Dict[int, float] = {}
+    for uid, value in credits:
+        incoming[uid] = incoming.get(uid, 0.0) + value
+
+    try:
+        success, msg = await _debit(db, from_user_id, amount)
+        if not success:
+            balance = (await _balances(db, [from_user_id])).get(from_user_id)
+            return False, msg, {from_user_id: balance or 0.0}
+
+        await _credit(db, incoming)
+        balances = await _balances(db, [from_user_id, *incoming])
+
+        common = {"ref_id": ref_id, "ref_name": ref_name}
+        rows = [{
+            "user_id": from_user_id,
+            "amount": -amount,
+            "reason": out_reason,
+            # 自我投喂时付款方也在收款方中：支出流水记扣款后、入账前的余额
+            "balance_after": balances[from_user_id] - incoming.get(from_user_id, 0.0),
+            **common,
+        }]
+        rows += [{
+            "user_id": uid,
+            "amount": value,
+            "reason": in_reason,
+            "balance_after": balances[uid],
+            **common,
+        } for uid, value in incoming.items() if uid in balances]
+        await electrolyte_log_crud.add_logs(db, rows)
+
+        if commit:
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return True, f"成功转出 {amount} 电解液", balances
 
 
 # ============================================================
@@ -2,14 +2,123 @@
 """
 电解液流水 CRUD 操作
 - 写入流水记录
-- 分页查询明细
+- 分页查询明细（键集游标）/ 流式导出
 - 按 reason 分组统计
 """
 
-from typing import List, Optional, Dict
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from backend.db.models import ElectrolyteLog
+from sqlalchemy import select, func, desc, delete, insert, update, case, literal
+from backend.db.models import ElectrolyteLog, ElectrolyteSummary
+from backend.utils import keyset
+
+# 按话题汇总的 reason（汇总表中以 ref_id 区分话题，其余 reason 的 ref_id 记为 0）
+DONATION_REASONS = (
+    "topic_donation_out", "topic_donation_in",
+    "self_donation_out", "self_donation_in",
+)
+
+_RECEIVED_REASONS = ("topic_donation_in", "self_donation_in")
+_DONATED_REASONS = ("topic_donation_out", "self_donation_out")
+
+# 校验时允许的浮点误差
+_TOLERANCE = 1e-6
+
+# 导出时每批从服务端游标取回的行数
+EXPORT_BATCH_SIZE = 500
+
+
+# ============================================================
+# 写入（流水 + 同事务更新汇总）
+# ============================================================
+
+def _summary_key(reason: str, ref_id: Optional[int]) -> int:
+    return (ref_id or 0) if reason in DONATION_REASONS else 0
+
+
+async def _apply_to_summary(db: AsyncSession, rows: Iterable[dict]) -> None:
+    """
+    把一批流水累加进 electrolyte_summaries（不提交，与流水同事务）
+
+    同一批内相同 (user, reason, ref) 先合并；按数据库方言使用原生 upsert。
+    """
+    merged: Dict[Tuple[int, str, int], dict] = {}
+    for r in rows:
+        ref_key = _summary_key(r["reason"], r.get("ref_id"))
+        key = (r["user_id"], r["reason"], ref_key)
+        item = merged.setdefault(key, {
+            "user_id": r["user_id"],
+            "reason": r["reason"],
+            "ref_id": ref_key,
+            "ref_name": None,
+            "total": 0.0,
+            "log_count": 0,
+        })
+        item["total"] += r["amount"]
+        item["log_count"] += 1
+        if ref_key:
+            item["ref_name"] = r.get("ref_name")
+    if not merged:
+        return
+
+    values = list(merged.values())
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(ElectrolyteSummary).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "reason", "ref_id"],
+            set_={
+                "total": ElectrolyteSummary.total + stmt.excluded.total,
+                "log_count": ElectrolyteSummary.log_count + stmt.excluded.log_count,
+                "ref_name": func.coalesce(stmt.excluded.ref_name, ElectrolyteSummary.ref_name),
+            },
+        )
+        await db.execute(stmt)
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(ElectrolyteSummary).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            total=ElectrolyteSummary.total + stmt.inserted.total,
+            log_count=ElectrolyteSummary.log_count + stmt.inserted.log_count,
+            ref_name=func.coalesce(stmt.inserted.ref_name, ElectrolyteSummary.ref_name),
+        )
+        await db.execute(stmt)
+    else:
+        # 其他数据库：先 UPDATE，未命中再 INSERT
+        for v in values:
+            result = await db.execute(
+                update(ElectrolyteSummary)
+                .where(
+                    ElectrolyteSummary.user_id == v["user_id"],
+                    ElectrolyteSummary.reason == v["reason"],
+                    ElectrolyteSummary.ref_id == v["ref_id"],
+                )
+                .values(
+                    total=ElectrolyteSummary.total + v["total"],
+                    log_count=ElectrolyteSummary.log_count + v["log_count"],
+                    ref_name=func.coalesce(v["ref_name"], ElectrolyteSummary.ref_name),
+                )
+            )
+            if result.rowcount == 0:
+                await db.execute(insert(ElectrolyteSummary).values(**v))
+
+
+async def add_logs(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    批量写入流水（一条 executemany INSERT）并更新汇总；不提交
+
+    rows 的键：user_id / amount / reason / balance_after / ref_id / ref_name
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    await db.execute(insert(ElectrolyteLog), [{"created_at": now, **r} for r in rows])
+    await _apply_to_summary(db, rows)
 
 
 async def add_log(
@@ -21,7 +130,7 @@ async def add_log(
     ref_id: Optional[int] = None,
     ref_name: Optional[str] = None,
 ) -> ElectrolyteLog:
-    """写入一条电解液流水记录"""
+    """写入一条电解液流水记录（同时更新汇总，不提交）"""
     log = ElectrolyteLog(
         user_id=user_id,
         amount=amount,
@@ -31,6 +140,13 @@ async def add_log(
         balance_after=balance_after,
     )
     db.add(log)
+    await _apply_to_summary(db, [{
+        "user_id": user_id,
+        "amount": amount,
+        "reason": reason,
+        "ref_id": ref_id,
+        "ref_name": ref_name,
+    }])
     return log
 
 
@@ -39,16 +155,73 @@ async def get_logs_by_user(
     user_id: int,
     skip: int = 0,
     limit: int = 20,
-) -> List[ElectrolyteLog]:
-    """分页查询用户的电解液明细"""
-    result = await db.execute(
+    cursor: Optional[str] = None,
+) -> Tuple[List[ElectrolyteLog], Optional[str]]:
+    """
+    分页查询用户的电解液明细（按时间倒序）
+
+    参数:
+        cursor: 上一页返回的 next_cursor；传入时按 (created_at, id) 键集翻页，忽略 skip
+        skip: 兼容旧的 offset 翻页
+
+    返回:
+        (明细列表, next_cursor)；没有更多时 next_cursor 为 None
+
+    异常:
+        ValueError: 游标格式非法
+    """
+    stmt = (
         select(ElectrolyteLog)
         .where(ElectrolyteLog.user_id == user_id)
-        .order_by(desc(ElectrolyteLog.created_at))
-        .offset(skip)
-        .limit(limit)
+        .order_by(desc(ElectrolyteLog.created_at), desc(ElectrolyteLog.id))
     )
-    return list(result.scalars().all())
+    if cursor:
+        created_at, log_id = keyset.decode_int_cursor(cursor)
+        stmt = stmt.where(
+            keyset.before(ElectrolyteLog.created_at, ElectrolyteLog.id, created_at, log_id)
+        )
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    # 多取一条判断是否还有下一页
+    logs = list((await db.execute(stmt.limit(limit + 1))).scalars().all())
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = keyset.encode_cursor(logs[-1].created_at, logs[-1].id)
+    return logs, next_cursor
+
+
+async def stream_logs(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[Dict]:
+    """
+    按时间正序逐行读取流水（服务端游标，内存占用与总量无关），用于导出
+
+    参数:
+        user_id: 指定用户；None 时为全部用户（管理员导出）
+    """
+    stmt = (
+        select(
+            ElectrolyteLog.id,
+            ElectrolyteLog.user_id,
+            ElectrolyteLog.amount,
+            ElectrolyteLog.reason,
+            ElectrolyteLog.ref_id,
+            ElectrolyteLog.ref_name,
+            ElectrolyteLog.balance_after,
+            ElectrolyteLog.created_at,
+        )
+        .order_by(ElectrolyteLog.created_at, ElectrolyteLog.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if user_id is not None:
+        stmt = stmt.where(ElectrolyteLog.user_id == user_id)
+
+    result = await db.stream(stmt)
+    async for row in result.mappings():
+        yield dict(row)
 
 
 async def get_summary_by_user(
@@ -56,7 +229,7 @@ async def get_summary_by_user(
     user_id: int,
 ) -> Dict:
     """
-    按 reason 分组统计用户电解液收支
+    按 reason 分组统计用户电解液收支（读取汇总表，不扫描流水）
 
     返回:
         {
@@ -64,40 +237,24 @@ async def get_summary_by_user(
             "by_topic": [{"topic_id": 1, "topic_title": "...", "received": 20.0, "donated": 5.0}, ...]
         }
     """
-    # 按 reason 汇总
     result = await db.execute(
         select(
-            ElectrolyteLog.reason,
-            func.sum(ElectrolyteLog.amount).label("total"),
+            ElectrolyteSummary.reason,
+            ElectrolyteSummary.ref_id,
+            ElectrolyteSummary.ref_name,
+            ElectrolyteSummary.total,
         )
-        .where(ElectrolyteLog.user_id == user_id)
-        .group_by(ElectrolyteLog.reason)
+        .where(ElectrolyteSummary.user_id == user_id)
     )
-    breakdown = {row.reason: float(row.total) for row in result.all()}
-
-    # 按话题汇总（仅投喂相关）
-    donation_reasons = (
-        "topic_donation_out", "topic_donation_in",
-        "self_donation_out", "self_donation_in",
-    )
-    result = await db.execute(
-        select(
-            ElectrolyteLog.ref_id,
-            ElectrolyteLog.ref_name,
-            ElectrolyteLog.reason,
-            func.sum(ElectrolyteLog.amount).label("total"),
-        )
-        .where(
-            ElectrolyteLog.user_id == user_id,
-            ElectrolyteLog.reason.in_(donation_reasons),
-            ElectrolyteLog.ref_id.isnot(None),
-        )
-        .group_by(ElectrolyteLog.ref_id, ElectrolyteLog.ref_name, ElectrolyteLog.reason)
-    )
-    rows = result.all()
 
+    breakdown: Dict[str, float] = {}
     topic_map: Dict[int, Dict] = {}
-    for row in rows:
+    for row in result.all():
+        breakdown[row.reason] = breakdown.get(row.reason, 0.0) + float(row.total)
+        if not row.ref_id:
+            continue
+
+        # 按话题汇总（仅投喂相关）
         if row.ref_id not in topic_map:
             topic_map[row.ref_id] = {
                 "topic_id": row.ref_id,
@@ -105,9 +262,9 @@ async def get_summary_by_user(
                 "received": 0.0,
                 "donated": 0.0,
             }
-        if row.reason in ("topic_donation_in", "self_donation_in"):
+        if row.reason in _RECEIVED_REASONS:
             topic_map[row.ref_id]["received"] += float(row.total)
-        elif row.reason in ("topic_donation_out", "self_donation_out"):
+        elif row.reason in _DONATED_REASONS:
             topic_map[row.ref_id]["donated"] += float(row.total)
 
     by_topic = sorted(topic_map.values(), key=lambda x: x["received"], reverse=True)
@@ -116,3 +273,92 @@ async def get_summary_by_user(
         "breakdown": breakdown,
         "by_topic": by_topic,
     }
+
+
+# ============================================================
+# 汇总重建与校验（管理后台 / 启动补建）
+# ============================================================
+
+def _raw_summary_query(user_id: Optional[int] = None):
+    """按汇总表的口径直接聚合原始流水"""
+    ref_key = case(
+        (ElectrolyteLog.reason.in_(DONATION_REASONS), func.coalesce(ElectrolyteLog.ref_id, 0)),
+        else_=literal(0),
+    )
+    query = (
+        select(
+            ElectrolyteLog.user_id,
+            ElectrolyteLog.reason,
+            ref_key.label("ref_id"),
+            func.max(case((ref_key != 0, ElectrolyteLog.ref_name))).label("ref_name"),
+            func.sum(ElectrolyteLog.amount).label("total"),
+            func.count(ElectrolyteLog.id).label("log_count"),
+        )
+        .group_by(ElectrolyteLog.user_id, ElectrolyteLog.reason, ref_key)
+    )
+    if user_id is not None:
+        query = query.where(ElectrolyteLog.user_id == user_id)
+    return query
+
+
+async def rebuild_summaries(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """
+    按原始流水重建汇总（全部或单个用户），一个事务内删除后 INSERT ... SELECT；返回汇总行数
+    """
+    stmt = delete(ElectrolyteSummary)
+    if user_id is not None:
+        stmt = stmt.where(ElectrolyteSummary.user_id == user_id)
+    await db.execute(stmt)
+
+    query = _raw_summary_query(user_id)
+    await db.execute(
+        insert(ElectrolyteSummary).from_select(
+            ["user_id", "reason", "ref_id", "ref_name", "total", "log_count"], query
+        )
+    )
+    await db.commit()
+
+    count_query = select(func.count(ElectrolyteSummary.id))
+    if user_id is not None:
+        count_query = count_query.where(ElectrolyteSummary.user_id == user_id)
+    return (await db.execute(count_query)).scalar() or 0
+
+
+async def verify_summaries(db: AsyncSession, user_id: Optional[int] = None) -> List[Dict]:
+    """
+    比对汇总表与原始流水，返回不一致的条目（为空表示一致）
+
+    每项：{"user_id", "reason", "ref_id", "expected", "actual"}
+    """
+    raw = {
+        (r.user_id, r.reason, r.ref_id): (float(r.total), r.log_count)
+        for r in (await db.execute(_raw_summary_query(user_id))).all()
+    }
+
+    query = select(
+        ElectrolyteSummary.user_id,
+        ElectrolyteSummary.reason,
+        ElectrolyteSummary.ref_id,
+        ElectrolyteSummary.total,
+        ElectrolyteSummary.log_count,
+    )
+    if user_id is not None:
+        query = query.where(ElectrolyteSummary.user_id == user_id)
+    stored = {
+        (r.user_id, r.reason, r.ref_id): (float(r.total), r.log_count)
+        for r in (await db.execute(query)).all()
+    }
+
+    mismatches = []
+    for key in raw.keys() | stored.keys():
+        expected = raw.get(key, (0.0, 0))
+        actual = stored.get(key, (0.0, 0))
+        if expected[1] != actual[1] or abs(expected[0] - actual[0]) > _TOLERANCE:
+            mismatches.append({
+                "user_id": key[0],
+                "reason": key[1],
+                "ref_id": key[2],
+                "expected": {"total": expected[0], "log_count": expected[1]},
+                "actual": {"total": actual[0], "log_count": actual[1]},
+            })
+    return mismatches
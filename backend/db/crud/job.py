@@ -0,0 +1,338 @@
+# backend/db/crud/job.py
+"""
+后台任务 CRUD 操作
+- 幂等入队（按 dedupe_key；并发入队同一 key 时由唯一索引 + 原生 upsert 去重）
+- 领取任务（条件 UPDATE，多 worker 安全）
+- 完成 / 失败重试（以领取时的 locked_at 为条件，租约已被回收的 worker 不会覆盖新的执行）
+- 续租（执行期间刷新 locked_at，长任务不会被当作过期任务回收）
+- 停机时归还执行中的任务、回收租约过期的任务
+
+事务约定：
+    所有写操作均不单独 commit，由调用方（JobQueue）统一提交。
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, insert, case
+
+from backend.db.models import BackgroundJob
+
+
+async def get_job_by_key(db: AsyncSession, dedupe_key: str) -> Optional[BackgroundJob]:
+    result = await db.execute(
+        select(BackgroundJob).where(BackgroundJob.dedupe_key == dedupe_key)
+    )
+    return result.scalar_one_or_none()
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    kind: str,
+    dedupe_key: str,
+    payload: dict,
+    max_attempts: int = 5,
+    requeue: bool = False,
+    delay: float = 0.0,
+) -> tuple[Optional[BackgroundJob], bool]:
+    """
+    入队（幂等）
+
+    返回:
+        (任务对象, 是否新入队)
+
+    说明:
+        - 同 dedupe_key 的任务处于 pending/running/done 时不重复入队
+        - 已 failed 的任务重新置为 pending，参数以本次为准
+        - requeue=True（可合并任务）：见 _requeue_job
+        - delay: 新任务最早在 delay 秒后执行（合并窗口）
+    """
+    job = await get_job_by_key(db, dedupe_key)
+    run_after = datetime.utcnow() + timedelta(seconds=delay)
+
+    if job is None:
+        inserted = await _insert_if_absent(db, {
+            "kind": kind,
+            "dedupe_key": dedupe_key,
+            "payload": json.dumps(payload, ensure_ascii=False),
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_after": run_after,
+        })
+        job = await get_job_by_key(db, dedupe_key)
+        if inserted:
+            return job, True
+        # 另一事务（其他请求 / worker）刚插入了同 key 的任务：按已存在处理；
+        # 该行在本事务快照中不可见时（MySQL 可重复读），它必然还是 pending，直接视为合并
+        if job is None:
+            return job, False
+
+    if requeue:
+        created = await _requeue_job(db, job.id, payload, max_attempts, run_after)
+        return job, created
+
+    if job.status == "failed":
+        job.status = "pending"
+        job.attempts = 0
+        job.max_attempts = max_attempts
+        job.payload = json.dumps(payload, ensure_ascii=False)
+        job.last_error = None
+        job.run_after = datetime.utcnow()
+        job.locked_at = None
+        job.rerun = False
+        return job, True
+
+    return job, False
+
+
+async def _insert_if_absent(db: AsyncSession, values: dict) -> bool:
+    """
+    按 dedupe_key 插入任务，已存在时不做任何事（不抛 IntegrityError）；返回是否插入
+
+    按数据库方言使用原生写法，不影响调用方事务中的其他改动。
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(BackgroundJob).values(**values).on_conflict_do_nothing(
+            index_elements=["dedupe_key"]
+        )
+        result = await db.execute(stmt)
+        return result.rowcount == 1
+    if dialect == "mysql":
+        result = await db.execute(insert(BackgroundJob).prefix_with("IGNORE").values(**values))
+        return result.rowcount == 1
+
+    # 其他数据库：在保存点内插入，唯一键冲突只回滚保存点
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(BackgroundJob).values(**values))
+    except IntegrityError:
+        return False
+    return True
+
+
+async def _requeue_job(
+    db: AsyncSession,
+    job_id: int,
+    payload: dict,
+    max_attempts: int,
+    run_after: datetime,
+) -> bool:
+    """
+    可合并任务的再次入队（均为条件 UPDATE，与 worker 的状态变更互不覆盖）
+
+    - running：打 rerun 标记，本次执行完成后重新置为 pending
+    - done / failed：重新置为 pending
+    - pending：已在排队，执行时自然包含本次的变更，不做处理（合并）
+
+    返回是否产生了一次新的执行。
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id, BackgroundJob.status == "running")
+        .values(rerun=True, run_after=run_after, updated_at=now)
+    )
+    if result.rowcount == 1:
+        return True
+
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status.in_(("done", "failed")),
+        )
+        .values(
+            status="pending",
+            attempts=0,
+            max_attempts=max_attempts,
+            payload=json.dumps(payload, ensure_ascii=False),
+            last_error=None,
+            run_after=run_after,
+            locked_at=None,
+            rerun=False,
+            updated_at=now,
+        )
+    )
+    return result.rowcount == 1
+
+
+async def get_due_job_ids(db: AsyncSession, limit: int = 10) -> List[int]:
+    """查询到期的 pending 任务 ID（按入队顺序）"""
+    result = await db.execute(
+        select(BackgroundJob.id)
+        .where(
+            BackgroundJob.status == "pending",
+            BackgroundJob.run_after <= datetime.utcnow(),
+        )
+        .order_by(BackgroundJob.id)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def claim_job(db: AsyncSession, job_id: int) -> bool:
+    """
+    领取任务：仅当仍为 pending 时置为 running。
+    多个 worker 同时领取时只有一个 rowcount == 1。
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id, BackgroundJob.status == "pending")
+        .values(
+            status="running",
+            locked_at=now,
+            attempts=BackgroundJob.attempts + 1,
+            updated_at=now,
+        )
+    )
+    return result.rowcount == 1
+
+
+async def get_job_by_id(db: AsyncSession, job_id: int) -> Optional[BackgroundJob]:
+    result = await db.execute(
+        select(BackgroundJob).where(BackgroundJob.id == job_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def renew_lease(
+    db: AsyncSession, job_id: int, locked_at: Optional[datetime]
+) -> Optional[datetime]:
+    """
+    续租：仍持有租约时把 locked_at 刷新为当前时间
+
+    返回:
+        库中的新 locked_at（调用方据此更新持有的租约值）；租约已失效时返回 None
+
+    注意:
+        新值从库中取回而不是直接用本地时间：DATETIME 精度低于微秒时（如 MySQL 默认）
+        库中存的是舍入后的值，后续 _holds_lease 比较必须用它
+    """
+    stmt = (
+        update(BackgroundJob)
+        .where(_holds_lease(job_id, locked_at))
+        .values(locked_at=datetime.utcnow())
+    )
+    if db.get_bind().dialect.update_returning:
+        return (await db.execute(stmt.returning(BackgroundJob.locked_at))).scalar_one_or_none()
+
+    result = await db.execute(stmt)
+    if result.rowcount != 1:
+        return None
+    # MySQL：行锁持有到提交，同一事务内读到的即本次写入
+    return (await db.execute(
+        select(BackgroundJob.locked_at).where(BackgroundJob.id == job_id)
+    )).scalar_one()
+
+
+def _holds_lease(job_id: int, locked_at: Optional[datetime]):
+    """仍由本次领取持有：running 且 locked_at 未变（租约被回收、重新领取后 locked_at 会变）"""
+    return (
+        (BackgroundJob.id == job_id)
+        & (BackgroundJob.status == "running")
+        & (BackgroundJob.locked_at == locked_at)
+    )
+
+
+async def mark_done(db: AsyncSession, job_id: int, locked_at: Optional[datetime]) -> bool:
+    """
+    完成；执行期间被 requeue 过（rerun）的任务重新置为 pending
+
+    locked_at 为领取时写入的值；租约已失效（任务已被回收/重新领取）时不做修改，返回 False。
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(_holds_lease(job_id, locked_at))
+        .values(
+            status=case((BackgroundJob.rerun == True, "pending"), else_="done"),
+            attempts=case((BackgroundJob.rerun == True, 0), else_=BackgroundJob.attempts),
+            rerun=False,
+            locked_at=None,
+            last_error=None,
+            updated_at=now,
+        )
+    )
+    return result.rowcount == 1
+
+
+async def mark_failed(
+    db: AsyncSession,
+    job: BackgroundJob,
+    error: str,
+    retry_delay: float,
+) -> Optional[bool]:
+    """
+    记录失败：未达上限则退避后重新置为 pending，否则置为 failed。
+
+    rerun 标记一并清除：重试时下一次执行自然包含执行期间的 requeue；最终失败的任务
+    若保留 rerun，之后被重新入队、执行成功时 mark_done 会把它再置回 pending 多跑一次。
+
+    返回:
+        是否还会重试；租约已失效（任务已被回收/重新领取）时不做修改，返回 None
+    """
+    now = datetime.utcnow()
+    will_retry = job.attempts < job.max_attempts
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(_holds_lease(job.id, job.locked_at))
+        .values(
+            status="pending" if will_retry else "failed",
+            run_after=now + timedelta(seconds=retry_delay) if will_retry else job.run_after,
+            locked_at=None,
+            rerun=False,
+            last_error=error[:2000],
+            updated_at=now,
+        )
+    )
+    if result.rowcount != 1:
+        return None
+    return will_retry
+
+
+async def release_job(db: AsyncSession, job_id: int, locked_at: Optional[datetime]) -> bool:
+    """
+    归还执行被中断（停机取消）的任务：立即置回 pending，本次不计入执行次数
+
+    租约已失效时不做修改，返回 False。
+    """
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(_holds_lease(job_id, locked_at))
+        .values(
+            status="pending",
+            attempts=BackgroundJob.attempts - 1,
+            locked_at=None,
+            rerun=False,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    return result.rowcount == 1
+
+
+async def release_stale_jobs(db: AsyncSession, lease_seconds: float) -> int:
+    """
+    回收租约过期的 running 任务（worker 崩溃/重启遗留），返回数量
+
+    置回 pending 的任务（含 release_job）清除 rerun：下一次执行已包含执行期间的 requeue。
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.status == "running",
+            BackgroundJob.locked_at < cutoff,
+        )
+        .values(status="pending", locked_at=None, rerun=False, updated_at=datetime.utcnow())
+    )
+    return result.rowcount or 0
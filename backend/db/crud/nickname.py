@@ -6,10 +6,11 @@
 - 昵称历史查询
 """
 
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from backend.db.models import User, NicknameHistory
+from backend.utils import keyset
 
 
 # ============================================================
@@ -99,28 +100,68 @@ async def get_nickname_history(
     db: AsyncSession,
     user_id: int,
     limit: int = 10,
-    offset: int = 0
-) -> List[NicknameHistory]:
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[NicknameHistory], Optional[str]]:
     """
     查询用户的昵称修改历史
     
     参数:
         user_id: 用户ID
         limit: 返回记录数（默认10条）
-        offset: 偏移量（用于分页）
+        offset: 偏移量（兼容旧的分页方式）
+        cursor: 上一页返回的 next_cursor；传入时按 (created_at, id) 键集翻页，忽略 offset
     
     返回:
-        历史记录列表（按时间倒序）
+        (历史记录列表（按时间倒序）, next_cursor)
+
+    异常:
+        ValueError: 游标格式非法
     """
-    result = await db.execute(
+    stmt = (
         select(NicknameHistory)
         .where(NicknameHistory.user_id == user_id)
-        .order_by(desc(NicknameHistory.created_at))
-        .limit(limit)
-        .offset(offset)
+        .order_by(desc(NicknameHistory.created_at), desc(NicknameHistory.id))
     )
-    
-    return list(result.scalars().all())
+    if cursor:
+        created_at, record_id = keyset.decode_int_cursor(cursor)
+        stmt = stmt.where(
+            keyset.before(NicknameHistory.created_at, NicknameHistory.id, created_at, record_id)
+        )
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    records = list((await db.execute(stmt.limit(limit + 1))).scalars().all())
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = keyset.encode_cursor(records[-1].created_at, records[-1].id)
+    return records, next_cursor
+
+
+async def stream_nickname_history(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[Dict]:
+    """按时间正序逐行读取昵称历史（服务端游标），用于导出；user_id 为 None 时导出全部"""
+    stmt = (
+        select(
+            NicknameHistory.id,
+            NicknameHistory.user_id,
+            NicknameHistory.old_nickname,
+            NicknameHistory.new_nickname,
+            NicknameHistory.electrolyte_cost,
+            NicknameHistory.created_at,
+        )
+        .order_by(NicknameHistory.created_at, NicknameHistory.id)
+        .execution_options(yield_per=500)
+    )
+    if user_id is not None:
+        stmt = stmt.where(NicknameHistory.user_id == user_id)
+
+    result = await db.stream(stmt)
+    async for row in result.mappings():
+        yield dict(row)
 
 
 async def count_nickname_changes(
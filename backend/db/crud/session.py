@@ -4,44 +4,118 @@
 - 从 session_api.py 提取的数据库查询逻辑
 """
 
-from typing import List, Optional, Dict
+from datetime import datetime
+from typing import List, Optional, Dict, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
 from backend.db.models import Session, Message
+from backend.utils import keyset
 
 
-async def get_user_sessions(db: AsyncSession, user_id: int) -> List[Dict]:
-    """获取用户的所有未删除会话"""
-    result = await db.execute(
-        select(Session)
+def _session_list_query(user_id: int):
+    """会话列表查询：只选列表需要的列，不读报告、提示词快照等大字段"""
+    return (
+        select(
+            Session.id,
+            Session.mode,
+            Session.topic_id,
+            Session.topic_title,
+            Session.is_completed,
+            Session.created_at,
+            Session.updated_at,
+            Session.report_ready,
+            Session.topic_unavailable,
+            Session.topic_unavailable_reason,
+        )
         .where(Session.user_id == user_id, Session.deleted_at.is_(None))
-        .order_by(Session.created_at.desc())
+        .order_by(Session.created_at.desc(), Session.id.desc())
     )
-    sessions = result.scalars().all()
-
-    output = []
-    for s in sessions:
-        msg_res = await db.execute(
-            select(Message)
-            .where(Message.session_id == s.id)
-            .order_by(Message.created_at.desc())
-        )
-        last_msg = msg_res.scalars().first()
-        output.append({
-            "id": s.id,
-            "mode": s.mode,
-            "topic_id": s.topic_id,
-            "topic_title": s.topic_title or "",
-            "is_completed": bool(s.is_completed),
-            "status": "completed" if bool(s.is_completed) else "in_progress",
-            "created_at": s.created_at,
-            "updated_at": s.updated_at,
-            "last_message": last_msg.content if last_msg else "",
-            "report_ready": bool(s.report_ready),
-            "topic_unavailable": bool(s.topic_unavailable) if hasattr(s, 'topic_unavailable') else False,
-            "topic_unavailable_reason": getattr(s, 'topic_unavailable_reason', None) or "",
-        })
-    return output
+
+
+async def _get_last_messages(db: AsyncSession, session_ids: List[str]) -> Dict[str, str]:
+    """
+    批量获取每个会话的最后一条消息（一条 SQL，替代逐会话查询）
+
+    消息 ID 自增且与写入顺序一致，每个会话取 MAX(id) 即最后一条。
+    """
+    if not session_ids:
+        return {}
+    latest_ids = (
+        select(func.max(Message.id))
+        .where(Message.session_id.in_(session_ids))
+        .group_by(Message.session_id)
+    )
+    result = await db.execute(
+        select(Message.session_id, Message.content).where(Message.id.in_(latest_ids))
+    )
+    return {sid: content for sid, content in result.all()}
+
+
+async def _rows_to_dicts(db: AsyncSession, rows) -> List[Dict]:
+    last_messages = await _get_last_messages(db, [row.id for row in rows])
+    return [
+        {
+            "id": row.id,
+            "mode": row.mode,
+            "topic_id": row.topic_id,
+            "topic_title": row.topic_title or "",
+            "is_completed": bool(row.is_completed),
+            "status": "completed" if bool(row.is_completed) else "in_progress",
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "last_message": last_messages.get(row.id, ""),
+            "report_ready": bool(row.report_ready),
+            "topic_unavailable": bool(row.topic_unavailable),
+            "topic_unavailable_reason": row.topic_unavailable_reason or "",
+        }
+        for row in rows
+    ]
+
+
+def encode_session_cursor(created_at: datetime, session_id: str) -> str:
+    return keyset.encode_cursor(created_at, session_id)
+
+
+def decode_session_cursor(cursor: str) -> Tuple[datetime, str]:
+    """解析游标，格式非法时抛 ValueError"""
+    return keyset.decode_cursor(cursor)
+
+
+async def get_user_sessions(db: AsyncSession, user_id: int) -> List[Dict]:
+    """获取用户的所有未删除会话"""
+    result = await db.execute(_session_list_query(user_id))
+    return await _rows_to_dicts(db, result.all())
+
+
+async def get_user_sessions_page(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    游标分页获取会话（按 created_at、id 倒序）
+
+    返回:
+        (本页会话, 下一页游标；没有更多时为 None)
+
+    异常:
+        ValueError: 游标非法
+    """
+    stmt = _session_list_query(user_id)
+    if cursor:
+        created_at, session_id = decode_session_cursor(cursor)
+        stmt = stmt.where(keyset.before(Session.created_at, Session.id, created_at, session_id))
+
+    # 多取一条判断是否还有下一页
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    items = await _rows_to_dicts(db, rows[:limit])
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_session_cursor(last.created_at, last.id)
+    return items, next_cursor
 
 
 async def get_session_with_messages(
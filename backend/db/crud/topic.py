@@ -1,8 +1,8 @@
 # backend/db/crud/topic.py
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, update, case
 from backend.db.models import Topic, TopicAuthor, TopicTag
 from sqlalchemy.orm import selectinload
 
@@ -83,6 +83,7 @@ async def get_topics(
     is_active: Optional[bool] = None,
     is_official: Optional[bool] = None,
     tag_id: Optional[int] = None,
+    topic_ids: Optional[List[int]] = None,
     search: Optional[str] = None,
     author_ids: Optional[List[int]] = None,
     sort_by: str = "created_at",
@@ -94,7 +95,12 @@ async def get_topics(
     - 传入作者 ID 列表时，筛选出这些作者参与的话题
     - 多作者取并集（话题只要包含任意一个指定作者即可）
     - 不区分主要作者与合作作者
+    - topic_ids 限定候选话题（关键词搜索由 topic_search 索引解析为 id 列表）
+    - search 为标题包含匹配，仅用于索引无法分词的查询（假名、谚文、符号等）
     """
+    if topic_ids is not None and not topic_ids:
+        return [], 0
+
     query = select(Topic)
 
     # 筛选条件
@@ -106,6 +112,8 @@ async def get_topics(
         query = query.where(Topic.is_official == is_official)
     if tag_id:
         query = query.join(TopicTag).where(TopicTag.tag_id == tag_id)
+    if topic_ids is not None:
+        query = query.where(Topic.id.in_(topic_ids))
     if search:
         query = query.where(Topic.title.contains(search))
 
@@ -247,80 +255,93 @@ async def reject_topic(db: AsyncSession, topic_id: int) -> Optional[Topic]:
 
 
 # ============================================================
-# 点赞计数
+# 计数（原子 UPDATE，避免并发丢失更新）
 # ============================================================
 
-async def increment_likes(db: AsyncSession, topic_id: int) -> Optional[Topic]:
+def _counter_values(deltas: Dict[str, float]) -> dict:
+    values = {}
+    for field, delta in deltas.items():
+        column = getattr(Topic, field)
+        new_value = column + delta
+        # 减少时不低于 0
+        values[field] = case((new_value < 0, 0), else_=new_value) if delta < 0 else new_value
+    # 计数变化不算话题内容更新（updated_at 用作 session 快照的话题版本）
+    values["updated_at"] = Topic.updated_at
+    return values
+
+
+async def increment_counters(
+    db: AsyncSession,
+    topic_id: int,
+    commit: bool = True,
+    **deltas: float,
+) -> Optional[Tuple]:
     """
-    点赞数 +1
+    单条 UPDATE topics SET x = x + :n 原子累加计数
 
     参数:
-        topic_id: 话题ID
+        deltas: 字段名 -> 增量，如 likes_count=1；负数时结果不低于 0
+        commit: 是否立即提交（批量写回时由调用方统一提交）
 
     返回:
-        更新后的话题对象；话题不存在时返回 None
+        按 deltas 顺序的更新后取值；话题不存在时返回 None
+
+    注意:
+        - 支持 RETURNING 的数据库（SQLite 3.35+ / PostgreSQL）一次往返
+        - MySQL 不支持 UPDATE ... RETURNING，在同一事务内回读（行锁持有到提交，读到的即本次结果）
     """
-    result = await db.execute(
-        select(Topic).where(Topic.id == topic_id)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
-        return None
+    columns = [getattr(Topic, field) for field in deltas]
+    stmt = update(Topic).where(Topic.id == topic_id).values(**_counter_values(deltas))
 
-    topic.likes_count = (topic.likes_count or 0) + 1
-    await db.commit()
-    await db.refresh(topic)
-    return topic
+    if db.get_bind().dialect.update_returning:
+        row = (await db.execute(stmt.returning(*columns))).one_or_none()
+    else:
+        result = await db.execute(stmt)
+        row = None
+        if result.rowcount:
+            row = (await db.execute(select(*columns).where(Topic.id == topic_id))).one()
 
+    if commit:
+        await db.commit()
+    return tuple(row) if row is not None else None
 
-async def decrement_likes(db: AsyncSession, topic_id: int) -> Optional[Topic]:
-    """
-    点赞数 -1（不会低于 0）
 
-    参数:
-        topic_id: 话题ID
+async def increment_likes(db: AsyncSession, topic_id: int) -> Optional[int]:
+    """
+    点赞数 +1
 
     返回:
-        更新后的话题对象；话题不存在时返回 None
+        更新后的点赞数；话题不存在时返回 None
     """
-    result = await db.execute(
-        select(Topic).where(Topic.id == topic_id)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
-        return None
+    row = await increment_counters(db, topic_id, likes_count=1)
+    return row[0] if row else None
 
-    topic.likes_count = max((topic.likes_count or 0) - 1, 0)
-    await db.commit()
-    await db.refresh(topic)
-    return topic
 
+async def decrement_likes(db: AsyncSession, topic_id: int) -> Optional[int]:
+    """
+    点赞数 -1（不会低于 0）
+
+    返回:
+        更新后的点赞数；话题不存在时返回 None
+    """
+    row = await increment_counters(db, topic_id, likes_count=-1)
+    return row[0] if row else None
 
-# ============================================================
-# 电解液累加
-# ============================================================
 
 async def increment_usage_count(
     db: AsyncSession,
     topic_id: int,
-) -> Optional[Topic]:
-    """话题使用次数 +1"""
-    result = await db.execute(
-        select(Topic).where(Topic.id == topic_id)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
-        return None
-    topic.usage_count = (topic.usage_count or 0) + 1
-    await db.commit()
-    await db.refresh(topic)
-    return topic
+) -> Optional[int]:
+    """话题使用次数 +1，返回更新后的次数"""
+    row = await increment_counters(db, topic_id, usage_count=1)
+    return row[0] if row else None
+
 
 async def add_electrolyte(
     db: AsyncSession,
     topic_id: int,
     amount: float
-) -> Optional[Topic]:
+) -> Optional[float]:
     """
     累加话题收到的电解液总量
 
@@ -329,19 +350,10 @@ async def add_electrolyte(
         amount: 本次投喂数量（> 0）
 
     返回:
-        更新后的话题对象；话题不存在时返回 None
+        更新后的累计电解液；话题不存在时返回 None
     """
-    result = await db.execute(
-        select(Topic).where(Topic.id == topic_id)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
-        return None
-
-    topic.electrolyte_received = (topic.electrolyte_received or 0.0) + amount
-    await db.commit()
-    await db.refresh(topic)
-    return topic
+    row = await increment_counters(db, topic_id, electrolyte_received=amount)
+    return row[0] if row else None
 
 
 # ============================================================
@@ -9,11 +9,15 @@
 """
 
 from datetime import date
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from backend.db.models import User
-from backend.core.security import hash_password, verify_password
+from backend.core.security import (
+    hash_password_async,
+    verify_password_async,
+    verify_and_update_password_async,
+)
 
 
 # ============================================================
@@ -28,6 +32,17 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
+async def get_nicknames(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, str]:
+    """批量查询昵称（一次 IN 查询），返回 {user_id: nickname}"""
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(User.id, User.nickname).where(User.id.in_(ids))
+    )
+    return {uid: nickname for uid, nickname in result.all()}
+
+
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """根据邮箱查询用户"""
     result = await db.execute(
@@ -71,7 +86,7 @@ async def create_user(
         - 不检查邮箱/昵称是否已存在（由调用方处理）
         - 初始电解液为 0
     """
-    hashed = hash_password(password)
+    hashed = await hash_password_async(password)
     
     user = User(
         email=email,
@@ -151,13 +166,16 @@ async def update_user_password(
     user = await get_user_by_id(db, user_id)
     if not user:
         return False, "用户不存在"
+
+    # 先结束只读事务、归还连接：bcrypt 排队期间不占用连接池
+    await db.commit()
     
     # 验证旧密码
-    if not verify_password(old_password, user.password_hash):
+    if not await verify_password_async(old_password, user.password_hash):
         return False, "旧密码错误"
     
     # 更新密码
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await hash_password_async(new_password)
     
     await db.commit()
     
@@ -238,13 +256,24 @@ async def authenticate_user(
     返回:
         验证成功: User对象
         验证失败: None
+
+    说明:
+        bcrypt 成本配置变更后，旧哈希在登录成功时透明地按新成本重算并保存
     """
     user = await get_user_by_email(db, email)
     
     if not user:
         return None
+
+    # 先结束只读事务、归还连接：bcrypt 排队期间不占用连接池
+    await db.commit()
     
-    if not verify_password(password, user.password_hash):
+    ok, new_hash = await verify_and_update_password_async(password, user.password_hash)
+    if not ok:
         return None
+
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
     
     return user
@@ -0,0 +1,52 @@
+-- backend/db/migrations/background_jobs.sql
+-- 持久化后台任务表（backend/services/job_queue.py 的 JobQueue）
+--
+-- 适用：MySQL。SQLite 写法见文件末尾（去掉 AUTO_INCREMENT 与 COMMENT）。
+-- 已有该表、只缺 rerun 列的库（早于可合并任务）只需执行：
+--   ALTER TABLE background_jobs ADD COLUMN rerun BOOLEAN NOT NULL DEFAULT FALSE;
+--
+-- 要点：
+-- - dedupe_key 唯一：并发入队同一 key 由唯一索引 + INSERT IGNORE / ON CONFLICT 去重
+-- - idx_job_status_run_after：worker 轮询到期的 pending 任务
+-- - locked_at：租约起点，执行期间定期续租；完成 / 失败 / 归还均以领取时的值为条件
+
+CREATE TABLE background_jobs (
+    id INTEGER NOT NULL AUTO_INCREMENT COMMENT '任务ID',
+    kind VARCHAR(50) NOT NULL COMMENT '任务类型（opinion_report / session_finalize / trait_update）',
+    dedupe_key VARCHAR(128) NOT NULL COMMENT '幂等键（如 opinion_report:<session_id>）',
+    payload TEXT NOT NULL COMMENT '任务参数（JSON）',
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' COMMENT 'pending / running / done / failed',
+    attempts INTEGER NOT NULL DEFAULT 0 COMMENT '已执行次数',
+    max_attempts INTEGER NOT NULL DEFAULT 5 COMMENT '最大执行次数',
+    last_error TEXT COMMENT '最近一次失败原因',
+    run_after DATETIME NOT NULL COMMENT '最早执行时间（重试退避）',
+    locked_at DATETIME COMMENT '被 worker 领取的时间（租约起点，执行期间续租）',
+    rerun BOOLEAN NOT NULL DEFAULT FALSE COMMENT '执行期间再次入队，完成后需重新执行',
+    created_at DATETIME NOT NULL COMMENT '创建时间',
+    updated_at DATETIME NOT NULL COMMENT '更新时间',
+    PRIMARY KEY (id),
+    UNIQUE (dedupe_key)
+);
+CREATE INDEX ix_background_jobs_id ON background_jobs (id);
+CREATE INDEX idx_job_status_run_after ON background_jobs (status, run_after);
+
+-- SQLite：
+-- CREATE TABLE background_jobs (
+--     id INTEGER NOT NULL,
+--     kind VARCHAR(50) NOT NULL,
+--     dedupe_key VARCHAR(128) NOT NULL,
+--     payload TEXT NOT NULL,
+--     status VARCHAR(20) NOT NULL DEFAULT 'pending',
+--     attempts INTEGER NOT NULL DEFAULT 0,
+--     max_attempts INTEGER NOT NULL DEFAULT 5,
+--     last_error TEXT,
+--     run_after DATETIME NOT NULL,
+--     locked_at DATETIME,
+--     rerun BOOLEAN NOT NULL DEFAULT 0,
+--     created_at DATETIME NOT NULL,
+--     updated_at DATETIME NOT NULL,
+--     PRIMARY KEY (id),
+--     UNIQUE (dedupe_key)
+-- );
+-- CREATE INDEX ix_background_jobs_id ON background_jobs (id);
+-- CREATE INDEX idx_job_status_run_after ON background_jobs (status, run_after);
@@ -0,0 +1,11 @@
+-- 会话历史 / 会话列表的复合索引（SQLite、MySQL 通用）
+--
+-- messages(session_id, created_at)：
+--   按会话取历史（ORDER BY created_at）、历史版本（COUNT / MAX(id)）、批量取最后一条消息
+-- sessions(user_id, deleted_at, created_at)：
+--   会话列表与键集分页（user_id + 未删除，按 created_at 倒序）、归属校验、按用户的特质/恢复扫描
+--
+-- tests/test_query_indexes.py 用 EXPLAIN 校验上述查询命中这两个索引。
+
+CREATE INDEX idx_message_session_created ON messages (session_id, created_at);
+CREATE INDEX idx_session_user_deleted_created ON sessions (user_id, deleted_at, created_at);
@@ -465,6 +465,28 @@ class Session(Base):
         Text, nullable=True, default=None
     )
 
+    # 结束时的一句话总结（fast-end 模式下由后台任务写入）
+    summary: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, default=None,
+        comment="对话一句话总结"
+    )
+
+    # 长对话滚动摘要：id <= history_summary_until 的消息已折叠进摘要
+    history_summary: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, default=None,
+        comment="较早轮次的滚动摘要（发送给 LLM 时替代原文）"
+    )
+    history_summary_until: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0,
+        comment="已折叠进摘要的最后一条消息ID"
+    )
+
+    # 是否已合并进用户特质画像（增量特质更新）
+    traits_merged: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False,
+        comment="本次会话是否已并入特质画像"
+    )
+
     # 话题不可用标记
     topic_unavailable: Mapped[bool] = mapped_column(
         Boolean, default=False, nullable=False,
@@ -493,6 +515,11 @@ class Session(Base):
         "Message", back_populates="session", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # 会话列表（user_id + 未删除，按 created_at 倒序）与归属校验
+        Index('idx_session_user_deleted_created', 'user_id', 'deleted_at', 'created_at'),
+    )
+
 
 # ============================================================
 # Message 表（保持原样）
@@ -515,6 +542,11 @@ class Message(Base):
     # 关系
     session: Mapped["Session"] = relationship("Session", back_populates="messages")
 
+    __table_args__ = (
+        # 按会话取历史（ORDER BY created_at）、取最后一条消息
+        Index('idx_message_session_created', 'session_id', 'created_at'),
+    )
+
 
 # ============================================================
 # TraitProfile 表
@@ -530,6 +562,9 @@ class TraitProfile(Base):
     summary: Mapped[str] = mapped_column(Text, default="")
     full_report: Mapped[str] = mapped_column(Text, default="")
 
+    # 每次增量更新 +1；写入时以旧版本号做条件，防止并发覆盖
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
@@ -537,6 +572,38 @@ class TraitProfile(Base):
     # 关系
     user: Mapped["User"] = relationship("User")
 
+
+# ============================================================
+# TraitProfileRevision 表（特质画像历史版本）
+# ============================================================
+class TraitProfileRevision(Base):
+    """
+    特质画像的每个版本（只追加），记录由哪些 session 合并而来
+    """
+    __tablename__ = "trait_profile_revisions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    summary: Mapped[str] = mapped_column(Text, default="")
+    full_report: Mapped[str] = mapped_column(Text, default="")
+
+    source_sessions: Mapped[str] = mapped_column(
+        Text, nullable=False, default="[]",
+        comment="本版本合并的 session ID 列表（JSON）"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow
+    )
+
+    __table_args__ = (
+        Index('idx_trait_revision_user_version', 'user_id', 'version', unique=True),
+    )
+
 # ============================================================
 # Notification 表
 # ============================================================
@@ -633,6 +700,38 @@ class SensitiveWord(Base):
     )
 
 
+# ============================================================
+# SensitiveWordVersion 表（敏感词库版本号，单行）
+# ============================================================
+class SensitiveWordVersion(Base):
+    """
+    敏感词库版本号
+
+    增删改敏感词时与修改同一事务 +1；各 worker 只需按主键读这一行，
+    版本变化才重新加载词表并编译自动机。
+    """
+    __tablename__ = "sensitive_word_version"
+
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="固定为 1"
+    )
+
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="版本号"
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        comment="最近修改时间"
+    )
+
+
 # ============================================================
 # NicknameHistory 表（保持原样）
 # ============================================================
@@ -682,6 +781,10 @@ class NicknameHistory(Base):
 
     user: Mapped["User"] = relationship("User", back_populates="nickname_histories")
 
+    __table_args__ = (
+        Index('idx_nickname_history_user_created', 'user_id', 'created_at'),
+    )
+
 # ============================================================
 # ElectrolyteLog 表（电解液流水记录）
 # ============================================================
@@ -735,3 +838,166 @@ class ElectrolyteLog(Base):
     )
 
     user: Mapped["User"] = relationship("User", back_populates="electrolyte_logs")
+
+    __table_args__ = (
+        Index('idx_electrolyte_log_user_created', 'user_id', 'created_at'),
+    )
+
+
+# ============================================================
+# ElectrolyteSummary 表（电解液流水汇总）
+# ============================================================
+class ElectrolyteSummary(Base):
+    """
+    电解液流水的增量汇总（/api/user/electrolyte/summary 直接读取）
+
+    - 每个 (user_id, reason, ref_id) 一行；投喂类 reason 的 ref_id 为话题ID，其余为 0
+    - 与流水在同一事务内 upsert；可由管理后台按原始流水重建并校验
+    """
+    __tablename__ = "electrolyte_summaries"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, index=True, comment="汇总ID"
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="用户ID"
+    )
+    reason: Mapped[str] = mapped_column(
+        String(30), nullable=False,
+        comment="变动原因"
+    )
+    ref_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0,
+        comment="话题ID（仅投喂类，其余为 0）"
+    )
+    ref_name: Mapped[Optional[str]] = mapped_column(
+        String(200), nullable=True,
+        comment="最近一次流水的关联名称（如话题标题）"
+    )
+    total: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0,
+        comment="金额合计"
+    )
+    log_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0,
+        comment="流水条数"
+    )
+
+    __table_args__ = (
+        Index('idx_electrolyte_summary_key', 'user_id', 'reason', 'ref_id', unique=True),
+    )
+
+
+# ============================================================
+# BackgroundJob 表（后台任务队列）
+# ============================================================
+class BackgroundJob(Base):
+    """
+    持久化后台任务（观念报告生成、特质更新等）
+
+    - dedupe_key 唯一，保证同一 session 的同类任务只入队一次（幂等）
+    - 可合并任务（如按用户的特质更新）以 requeue 方式入队：已完成的任务重新置为
+      pending；执行中的任务打 rerun 标记，完成后再执行一次
+    - 进程崩溃/重启后，status=running 且租约过期的任务会被重新置为 pending
+    """
+    __tablename__ = "background_jobs"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, index=True, comment="任务ID"
+    )
+
+    kind: Mapped[str] = mapped_column(
+        String(50), nullable=False,
+        comment="任务类型（opinion_report / session_finalize / trait_update）"
+    )
+
+    dedupe_key: Mapped[str] = mapped_column(
+        String(128), unique=True, nullable=False,
+        comment="幂等键（如 opinion_report:<session_id>）"
+    )
+
+    payload: Mapped[str] = mapped_column(
+        Text, nullable=False, default="{}",
+        comment="任务参数（JSON）"
+    )
+
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default="pending",
+        comment="pending / running / done / failed"
+    )
+
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0,
+        comment="已执行次数"
+    )
+
+    max_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=5,
+        comment="最大执行次数"
+    )
+
+    last_error: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, default=None,
+        comment="最近一次失败原因"
+    )
+
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow,
+        comment="最早执行时间（重试退避）"
+    )
+
+    locked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, default=None,
+        comment="被 worker 领取的时间（租约起点）"
+    )
+
+    rerun: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False,
+        comment="执行期间再次入队，完成后需重新执行"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow,
+        comment="创建时间"
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+        comment="更新时间"
+    )
+
+    __table_args__ = (
+        Index('idx_job_status_run_after', 'status', 'run_after'),
+    )
+
+
+# ============================================================
+# UserEvent 表（跨进程事件中转）
+# ============================================================
+class UserEvent(Base):
+    """
+    用户事件（报告就绪、话题通知等）的跨进程中转表
+
+    仅在 event_bus 使用 database 后端时写入；各进程轮询 id 增量后
+    推送给本进程内的 SSE 订阅者，过期记录定期清理。
+    """
+    __tablename__ = "user_events"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, index=True, comment="事件ID（单调递增）"
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, index=True, comment="接收用户ID"
+    )
+
+    payload: Mapped[str] = mapped_column(
+        Text, nullable=False, comment="事件内容（JSON）"
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, index=True, comment="创建时间"
+    )
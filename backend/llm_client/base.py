@@ -3,6 +3,30 @@ from abc import ABC, abstractmethod
 from typing import AsyncGenerator, List, Dict, Optional
 
 
+# ============================================================
+# 统一异常（继承 RuntimeError，兼容原有 except RuntimeError 的调用方）
+# ============================================================
+class LLMError(RuntimeError):
+    """LLM 调用失败的基类"""
+
+
+class LLMHTTPError(LLMError):
+    """服务商返回非 200 状态码"""
+
+    def __init__(self, status: int, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message or f"LLM API 返回 {status}")
+        self.status = status
+        self.retry_after = retry_after  # 服务商给出的 Retry-After（秒）
+
+
+class LLMConnectionError(LLMError):
+    """连接失败 / 超时"""
+
+
+class LLMUnavailableError(LLMError):
+    """熔断器打开，服务商被判定为不可用，直接快速失败"""
+
+
 class LLMClient(ABC):
 
     @abstractmethod
@@ -25,3 +49,10 @@ class LLMClient(ABC):
         对于没有连接池/会话需要释放的客户端，可直接继承此空实现。
         """
         return None
+
+    def metrics(self) -> dict:
+        """
+        运行时指标（限流队列、连接池等）。
+        默认客户端没有可报告的指标。
+        """
+        return {}
@@ -4,7 +4,8 @@ import json
 import logging
 import aiohttp
 from typing import AsyncGenerator, Optional, List, Dict
-from .base import LLMClient
+from .base import LLMClient, LLMHTTPError, LLMConnectionError
+from .limiter import PriorityLimiter, current_priority, priority_name
 
 logger = logging.getLogger("llm.deepseek")
 _DEFAULT_TIMEOUT = aiohttp.ClientTimeout(connect=10, total=180)
@@ -12,18 +13,55 @@ _DEFAULT_TIMEOUT = aiohttp.ClientTimeout(connect=10, total=180)
 
 class DeepSeekClient(LLMClient):
 
-    def __init__(self, api_key: str, model: str = "deepseek-chat"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "deepseek-chat",
+        pool_limit: int = 200,
+        pool_limit_per_host: int = 100,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+        max_in_flight: int = 64,
+        reserved_interactive: int = 8,
+    ):
         self.api_key = api_key
         self.model = model
         self.url = "https://api.deepseek.com/v1/chat/completions"
         self._session: Optional[aiohttp.ClientSession] = None
         self._lock = asyncio.Lock()  # 防止并发创建多个 Session
 
-    # 懒创建 + 复用 ClientSession + Lock 保护
+        # 连接池参数（只有一个上游 host，limit_per_host 才是实际上限）
+        self._pool_limit = pool_limit
+        self._pool_limit_per_host = pool_limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+
+        # 在途请求限流：交互请求优先于后台请求
+        self.limiter = PriorityLimiter(
+            max_in_flight=max_in_flight,
+            reserved_interactive=reserved_interactive,
+        )
+
+        # token 用量（按优先级分组），含服务商上下文缓存命中情况
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    # 懒创建 + 复用 ClientSession；已创建时无锁快速返回
     async def _get_session(self) -> aiohttp.ClientSession:
+        session = self._session
+        if session is not None and not session.closed:
+            return session
+
         async with self._lock:
             if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self._pool_limit,
+                    limit_per_host=self._pool_limit_per_host,
+                    keepalive_timeout=self._keepalive_timeout,
+                    use_dns_cache=True,
+                    ttl_dns_cache=self._dns_cache_ttl,
+                )
                 self._session = aiohttp.ClientSession(
+                    connector=connector,
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "Content-Type": "application/json",
@@ -38,6 +76,56 @@ class DeepSeekClient(LLMClient):
             if self._session and not self._session.closed:
                 await self._session.close()
 
+    def metrics(self) -> dict:
+        connector = self._session.connector if self._session else None
+        return {
+            "provider": "deepseek",
+            "limiter": self.limiter.metrics(),
+            "pool": {
+                "limit": self._pool_limit,
+                "limit_per_host": self._pool_limit_per_host,
+                "closed": self._session is None or self._session.closed,
+                "connector_closed": connector.closed if connector else True,
+            },
+            "usage": {
+                name: {
+                    **u,
+                    "cache_hit_ratio": round(
+                        u["prompt_cache_hit_tokens"] / u["prompt_tokens"], 4
+                    ) if u["prompt_tokens"] else 0.0,
+                }
+                for name, u in self._usage.items()
+            },
+        }
+
+    def _record_usage(self, usage: dict) -> None:
+        """
+        累计一次调用的用量。DeepSeek 在最后一帧返回：
+        prompt_cache_hit_tokens / prompt_cache_miss_tokens（命中部分按缓存价计费）
+        """
+        stats = self._usage.setdefault(priority_name(current_priority()), {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "prompt_cache_hit_tokens": 0,
+            "prompt_cache_miss_tokens": 0,
+        })
+        stats["calls"] += 1
+        for key in (
+            "prompt_tokens",
+            "completion_tokens",
+            "prompt_cache_hit_tokens",
+            "prompt_cache_miss_tokens",
+        ):
+            stats[key] += int(usage.get(key) or 0)
+        logger.debug(
+            "DeepSeek usage: prompt=%s (cache hit %s / miss %s), completion=%s",
+            usage.get("prompt_tokens"),
+            usage.get("prompt_cache_hit_tokens"),
+            usage.get("prompt_cache_miss_tokens"),
+            usage.get("completion_tokens"),
+        )
+
     async def chat_stream(
         self,
         system_prompt: str,
@@ -54,32 +142,57 @@ class DeepSeekClient(LLMClient):
             "model": self.model,
             "messages": messages,
             "stream": True,
+            # 最后一帧附带 usage（含缓存命中 token 数）
+            "stream_options": {"include_usage": True},
         }
 
         session = await self._get_session()
 
-        async with session.post(self.url, json=body) as resp:
-            # HTTP 状态码检查
-            if resp.status != 200:
-                error_text = await resp.text()
-                logger.error("DeepSeek API error %s: %s", resp.status, error_text)
-                raise RuntimeError(f"DeepSeek API 返回 {resp.status}")
-
-            async for line in resp.content:
-                decoded = line.decode("utf-8").strip()
-                if not decoded.startswith("data: "):
-                    continue
-
-                data = decoded[6:]
-                if data == "[DONE]":
-                    break
-
-                try:
-                    obj = json.loads(data)
-                    chunk = obj["choices"][0]["delta"].get("content", "")
-                    if chunk:
-                        yield chunk
-                # 精确异常（替代裸 except）
-                except (json.JSONDecodeError, KeyError, IndexError) as exc:
-                    logger.debug("跳过无法解析的 SSE 帧: %s", exc)
-                    continue
+        # 整个流式响应期间占用一个名额（优先级取自 llm_priority() 上下文）
+        async with self.limiter.slot():
+            try:
+                async with session.post(self.url, json=body) as resp:
+                    # HTTP 状态码检查
+                    if resp.status != 200:
+                        error_text = await resp.text()
+                        logger.error("DeepSeek API error %s: %s", resp.status, error_text)
+                        raise LLMHTTPError(
+                            resp.status,
+                            f"DeepSeek API 返回 {resp.status}",
+                            retry_after=_parse_retry_after(resp.headers.get("Retry-After")),
+                        )
+
+                    async for line in resp.content:
+                        decoded = line.decode("utf-8").strip()
+                        if not decoded.startswith("data: "):
+                            continue
+
+                        data = decoded[6:]
+                        if data == "[DONE]":
+                            break
+
+                        try:
+                            obj = json.loads(data)
+                            if obj.get("usage"):
+                                self._record_usage(obj["usage"])
+                            if not obj.get("choices"):
+                                continue
+                            chunk = obj["choices"][0]["delta"].get("content", "")
+                            if chunk:
+                                yield chunk
+                        # 精确异常（替代裸 except）
+                        except (json.JSONDecodeError, KeyError, IndexError) as exc:
+                            logger.debug("跳过无法解析的 SSE 帧: %s", exc)
+                            continue
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                raise LLMConnectionError(f"DeepSeek 连接失败: {type(exc).__name__}") from exc
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """只支持秒数形式的 Retry-After；HTTP-date 等其它形式返回 None。"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
@@ -2,14 +2,30 @@
 from .base import LLMClient
 from .deepseek_client import DeepSeekClient
 from .mock_client import MockClient
+from .resilient import ResilientClient
 
 def load_llm_client(config: dict) -> LLMClient:
     provider = config.get("provider", "mock")
 
     if provider == "deepseek":
-        return DeepSeekClient(
+        pool = config.get("pool", {})
+        client: LLMClient = DeepSeekClient(
             api_key=config["api_key"],
-            model=config.get("model", "deepseek-chat")
+            model=config.get("model", "deepseek-chat"),
+            pool_limit=pool.get("limit", 200),
+            pool_limit_per_host=pool.get("limit_per_host", 100),
+            keepalive_timeout=pool.get("keepalive_timeout", 60.0),
+            dns_cache_ttl=pool.get("dns_cache_ttl", 300),
+            max_in_flight=pool.get("max_in_flight", 64),
+            reserved_interactive=pool.get("reserved_interactive", 8),
         )
+    else:
+        client = MockClient()
 
-    return MockClient()
+    # 重试 + 熔断包装：真实服务商默认开启，mock 需显式配置
+    resilience = config.get("resilience", {} if provider != "mock" else None)
+    if resilience is None or resilience is False:
+        return client
+    if resilience is True:
+        resilience = {}
+    return ResilientClient(client, **resilience)
@@ -0,0 +1,157 @@
+# backend/llm_client/limiter.py
+"""
+LLM 并发限流（带优先级）
+
+- 限制同时在途的 LLM 请求数，避免连接池排队或触发服务商 429
+- 两级优先级：交互（model1 对话、model2 建议）优先于后台（观念报告、特质更新）
+- 调用方通过 llm_priority() 标记当前上下文的优先级，无需修改 LLMClient 接口
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+_current_priority: ContextVar[int] = ContextVar(
+    "llm_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """
+    在当前上下文内发起的 LLM 调用使用指定优先级。
+
+    注意：不要在 with 块内 yield（异步生成器会把上下文泄漏给调用方）。
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def priority_name(priority: int) -> str:
+    return _PRIORITY_NAMES.get(priority, str(priority))
+
+
+class PriorityLimiter:
+    """
+    基于 asyncio 的优先级信号量。
+
+    - max_in_flight: 同时在途的请求上限
+    - reserved_interactive: 只留给交互请求的名额，后台请求最多占用
+      max_in_flight - reserved_interactive 个
+    - 释放名额时按 (优先级, 到达顺序) 唤醒等待者
+    """
+
+    def __init__(self, max_in_flight: int, reserved_interactive: int = 0):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight 必须 >= 1")
+        self.max_in_flight = max_in_flight
+        self.reserved_interactive = min(max(reserved_interactive, 0), max_in_flight - 1)
+
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+
+        # 指标
+        self._waiting: Dict[int, int] = {p: 0 for p in _PRIORITY_NAMES}
+        self._acquired: Dict[int, int] = {p: 0 for p in _PRIORITY_NAMES}
+        self._wait_seconds: Dict[int, float] = {p: 0.0 for p in _PRIORITY_NAMES}
+        self._max_waiting = 0
+
+    def _capacity_for(self, priority: int) -> int:
+        if priority == PRIORITY_INTERACTIVE:
+            return self.max_in_flight
+        return self.max_in_flight - self.reserved_interactive
+
+    def _can_take(self, priority: int) -> bool:
+        return self._in_flight < self._capacity_for(priority)
+
+    def _wake_waiters(self) -> None:
+        while self._waiters:
+            priority, _, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_take(priority):
+                break
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            fut.set_result(None)
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        # 没有同级或更高优先级的等待者时直接拿名额，避免插队
+        if self._can_take(priority) and not any(
+            p <= priority and not f.done() for p, _, f in self._waiters
+        ):
+            self._in_flight += 1
+            self._acquired[priority] += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._waiting[priority] += 1
+        self._max_waiting = max(self._max_waiting, sum(self._waiting.values()))
+        started = time.monotonic()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 已分配到名额但调用方被取消：归还
+                self.release()
+            raise
+        finally:
+            self._waiting[priority] -= 1
+            self._wait_seconds[priority] += time.monotonic() - started
+
+        self._acquired[priority] += 1
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None) -> AsyncIterator[None]:
+        """占用一个名额；priority 为空时使用 llm_priority() 设置的当前优先级。"""
+        if priority is None:
+            priority = current_priority()
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "reserved_interactive": self.reserved_interactive,
+            "in_flight": self._in_flight,
+            "queue_depth": {
+                name: self._waiting[p] for p, name in _PRIORITY_NAMES.items()
+            },
+            "max_queue_depth": self._max_waiting,
+            "acquired_total": {
+                name: self._acquired[p] for p, name in _PRIORITY_NAMES.items()
+            },
+            "wait_seconds_total": {
+                name: round(self._wait_seconds[p], 3)
+                for p, name in _PRIORITY_NAMES.items()
+            },
+        }
@@ -0,0 +1,203 @@
+# backend/llm_client/resilient.py
+"""
+LLM 调用容错包装
+
+ResilientClient 包装任意 LLMClient（load_llm_client 构建的均可）：
+- 首个 token 输出之前，对 429 / 5xx / 连接错误按指数退避 + 抖动重试
+- 服务商返回 Retry-After 时以其为准
+- 熔断器：连续失败达到阈值后打开，冷却期内直接抛 LLMUnavailableError；
+  冷却结束后放行一次试探请求（半开），成功则关闭
+- 已经输出 token 后的错误不重试（避免向用户重复输出），直接抛出
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+from .base import (
+    LLMClient,
+    LLMConnectionError,
+    LLMHTTPError,
+    LLMUnavailableError,
+)
+
+logger = logging.getLogger("llm.resilient")
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """
+    三态熔断器：closed → open → half_open → closed/open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+
+        self.open_count = 0
+        self.rejected_count = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_started_at = None
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            now = time.monotonic()
+            # 同一时间只放行一个试探请求；试探方异常退出（未上报结果）时超时后重新放行
+            if self._trial_started_at is None or now - self._trial_started_at >= self.reset_timeout:
+                self._trial_started_at = now
+                return True
+        self.rejected_count += 1
+        return False
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.open_count += 1
+                logger.warning("LLM 熔断器打开（连续失败 %s 次）", self._failures)
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_started_at = None
+
+    def metrics(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "open_count": self.open_count,
+            "rejected_total": self.rejected_count,
+        }
+
+
+class ResilientClient(LLMClient):
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        max_retry_after: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.inner = inner
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        # 指标
+        self._calls = 0
+        self._retries = 0
+        self._failures: Dict[str, int] = {}
+
+    @staticmethod
+    def _is_retryable(exc: Exception) -> bool:
+        if isinstance(exc, LLMConnectionError):
+            return True
+        if isinstance(exc, LLMHTTPError):
+            return exc.status in _RETRYABLE_STATUS
+        return False
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        # full jitter：在 [0, 指数上限] 内均匀取值，避免多个请求同步重试
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _count_failure(self, exc: Exception) -> None:
+        if isinstance(exc, LLMHTTPError):
+            key = f"http_{exc.status}"
+        else:
+            key = type(exc).__name__
+        self._failures[key] = self._failures.get(key, 0) + 1
+
+    async def chat_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict]] = None,
+    ) -> AsyncGenerator[str, None]:
+        self._calls += 1
+        attempt = 0
+
+        while True:
+            if not self.breaker.allow():
+                raise LLMUnavailableError("LLM 服务暂不可用（熔断中）")
+
+            emitted = False
+            try:
+                async for chunk in self.inner.chat_stream(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    history=history,
+                ):
+                    if not emitted:
+                        emitted = True
+                        self.breaker.record_success()
+                    yield chunk
+                if not emitted:
+                    self.breaker.record_success()
+                return
+
+            except Exception as exc:
+                self._count_failure(exc)
+                retryable = self._is_retryable(exc)
+                if retryable:
+                    self.breaker.record_failure()
+                elif not emitted:
+                    # 4xx 等非重试错误说明服务商可达，不计入熔断
+                    self.breaker.record_success()
+
+                if emitted or not retryable or attempt >= self.max_retries:
+                    raise
+
+                delay = self._backoff(attempt, exc)
+                attempt += 1
+                self._retries += 1
+                logger.warning(
+                    "LLM 调用失败，%.2fs 后第 %s 次重试: %s", delay, attempt, exc
+                )
+                await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def metrics(self) -> dict:
+        return {
+            **self.inner.metrics(),
+            "resilience": {
+                "calls_total": self._calls,
+                "retries_total": self._retries,
+                "failures_total": dict(self._failures),
+                "breaker": self.breaker.metrics(),
+            },
+        }
@@ -3,22 +3,41 @@
 import asyncio
 import json
 import logging
-from typing import AsyncGenerator, Optional, List, Dict
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncGenerator, Optional, List, Dict, Iterable, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, literal, String
 
 from backend.llm_client.base import LLMClient
-from backend.utils.prompt_loader import load_prompt
-from backend.utils.text_tools import strip_control_markers, parse_control_flags
+from backend.llm_client.limiter import llm_priority, PRIORITY_BACKGROUND
+from backend.utils.prompt_loader import load_prompt, load_composite_prompt
+from backend.utils.text_tools import strip_control_markers, StreamingMarkerFilter
+from backend.utils.sensitive_words import get_matcher
+from backend.utils.word_matcher import StreamScanner
 from backend.services.model2_service import Model2Service
 from backend.services.model3_service import Model3Service
 from backend.services.db_history_manager import DatabaseHistoryManager
-from backend.db.models import TraitProfile, Session
+from backend.services.job_queue import JobQueue
+from backend.services.history_compactor import HistoryCompactor
+from backend.services.event_bus import get_event_bus
+from backend.services.topic_counters import get_topic_counters
+from backend.db.models import TraitProfile, TraitProfileRevision, Session, BackgroundJob
 from backend.db.crud import topic as topic_crud
 
 logger = logging.getLogger("chat_service")
 
+# 模型输出审核方式：off 不检查 / flag 只发 moderation 事件 / redact 命中字符替换为掩码
+MODERATION_MODES = ("off", "flag", "redact")
+
+# 流水线模式下留给下一轮的后台分析：超过 TTL 未被取用（会话已放弃）或超出条数上限时丢弃
+PENDING_ANALYSIS_TTL = 1800.0
+MAX_PENDING_ANALYSES = 10000
+
+_REPORT_READY_HINT = "\n\n[内部提示] 观念已捕捉完成，请在本次回复中自然地告知用户：你已经成功捕捉到他的观念，稍后可以查看分析报告。"
+
 class ChatService:
     """
     ChatService：负责三层逻辑的编排与对接：
@@ -30,11 +49,51 @@ class ChatService:
     async def stream_response(...) -> AsyncGenerator[dict, None]
     """
 
-    def __init__(self, llm: LLMClient):
+    def __init__(
+        self,
+        llm: LLMClient,
+        pipelined_modes: Iterable[int] = (),
+        job_queue: Optional[JobQueue] = None,
+        fast_end: bool = True,
+        history: Optional[dict] = None,
+        traits: Optional[dict] = None,
+        moderation: Optional[dict] = None,
+    ):
         self.llm = llm
         self.model2 = Model2Service(llm)
         self.model3 = Model3Service(llm)
 
+        # 流水线模式：这些 mode 下 model1 使用上一轮的 model2 建议，本轮分析放到后台
+        self.pipelined_modes = {int(m) for m in pipelined_modes}
+        # session_id -> (后台分析任务或已完成的结果, 创建时间)，按创建先后排列
+        self._pending_analysis: "OrderedDict[str, Tuple[asyncio.Future, float]]" = OrderedDict()
+
+        # fast-end：结束时先返回 end，一句话总结与特质更新都放到后台任务
+        self.fast_end = fast_end
+
+        # 长对话：按调用点 token 预算取历史窗口，较早轮次折叠为滚动摘要
+        self.history = HistoryCompactor(llm, **(history or {}))
+
+        # 增量特质更新：合并窗口（秒）与单次最多合并的 session 数
+        traits = traits or {}
+        self.trait_coalesce_seconds = float(traits.get("coalesce_seconds", 30))
+        self.trait_max_sessions = max(int(traits.get("max_sessions_per_update", 5)), 1)
+
+        # model1 输出的流式敏感词审核（复用敏感词自动机，逐块增量扫描）
+        moderation = moderation or {}
+        self.moderation_mode = moderation.get("mode", "off")
+        if self.moderation_mode not in MODERATION_MODES:
+            raise ValueError(f"未知的 moderation 模式: {self.moderation_mode}")
+        self.moderation_mask = moderation.get("mask", "*")
+
+        # 报告生成、特质更新走持久化任务队列（生命周期由 main.lifespan 管理）
+        self.jobs = job_queue or JobQueue()
+        self.jobs.register("opinion_report", self._run_report_job)
+        self.jobs.register("session_finalize", self._run_finalize_job)
+        self.jobs.register("trait_update", self._run_trait_job)
+        self.jobs.add_recovery_hook(self._recover_pending_reports)
+        self.jobs.add_recovery_hook(self._recover_pending_traits)
+
     # ------------------------------------------------------
     # 读取用户当前 trait
     # ------------------------------------------------------
@@ -111,58 +170,107 @@ class ChatService:
         chunk_size: int = 20,
     ) -> AsyncGenerator[dict, None]:
         """
-        收集 LLM 完整输出 → 清洗控制标记 → 按块流式输出
-        替代原来 mode1/mode2 中各自 ~15 行的重复代码
+        边收边发：LLM 输出经 StreamingMarkerFilter 过滤后立即按块输出
 
         说明：
-            原始代码本身就是"先收集完整输出 → 清洗 → 再逐字符输出"的流程，
-            因为控制标记可能嵌在文本中间，必须拿到完整输出才能安全剥离。
-            这里只是把逐字符改为按块输出，行为语义完全不变。
+            控制标记可能嵌在文本中间，过滤器只扣留可能属于 <SYS> 块的字节
+            （以及末尾空白），其余文本到达即输出，首字节延迟不再等于整段生成时间。
+            拼接后的可见文本与原先 strip_control_markers(完整输出) 完全一致。
+
+            开启审核时可见文本再经 StreamScanner：只额外扣留可能构成敏感词前缀的几个字符，
+            命中时发出 moderation 事件（redact 模式下命中字符已替换为掩码）。
         """
-        # 1. 收集完整输出
-        raw_text = ""
+        marker_filter = StreamingMarkerFilter()
+        scanner = None
+        if self.moderation_mode != "off":
+            matcher = await get_matcher(history_mgr.db)
+            if len(matcher):
+                scanner = StreamScanner(
+                    matcher,
+                    redact=self.moderation_mode == "redact",
+                    mask=self.moderation_mask,
+                )
+        sent: List[str] = []
+
+        # 1. 边收集边输出（单块过长时按 chunk_size 切分）
         async for chunk in self.llm.chat_stream(
             system_prompt=system_prompt,
             user_prompt=final_prompt,
             history=history,
         ):
-            raw_text += chunk
+            visible = marker_filter.feed(chunk)
+            for event in self._emit_visible(visible, scanner, sent, session_id, chunk_size):
+                yield event
+
+        # 2. 输出被扣留的尾部（如未闭合的 <SYS>）
+        visible = marker_filter.flush()
+        for event in self._emit_visible(
+            visible, scanner, sent, session_id, chunk_size, final=True
+        ):
+            yield event
 
-        # 2. 清洗控制标记
-        visible_text = strip_control_markers(raw_text)
+        # 3. 存入历史（与用户看到的文本一致；连同本轮暂存的用户发言一次提交）
+        history_mgr.stage(session_id, "assistant", "".join(sent))
+        await history_mgr.flush()
 
-        # 3. 按块输出（替代逐字符，帧数降低 chunk_size 倍）
-        for i in range(0, len(visible_text), chunk_size):
+        # 4. 检查控制标记
+        if marker_filter.flags.user_want_to_quit:
+            yield {"type": "user_want_quit"}
+
+    def _emit_visible(
+        self,
+        visible: str,
+        scanner: Optional[StreamScanner],
+        sent: List[str],
+        session_id: str,
+        chunk_size: int,
+        final: bool = False,
+    ) -> Iterable[dict]:
+        """可见文本（经审核后）切块为 token 事件；有新命中时追加一个 moderation 事件"""
+        matches = []
+        if scanner is not None:
+            visible, matches = scanner.feed(visible)
+            if final:
+                visible += scanner.flush()
+
+        sent.append(visible)
+        for i in range(0, len(visible), chunk_size):
             yield {
                 "type": "token",
-                "content": visible_text[i : i + chunk_size],
+                "content": visible[i : i + chunk_size],
             }
 
-        # 4. 存入历史
-        await history_mgr.add(session_id, "assistant", visible_text)
-
-        # 5. 检查控制标记
-        flags = parse_control_flags(raw_text)
-        if flags.user_want_to_quit:
-            yield {"type": "user_want_quit"}
+        if matches:
+            logger.info(
+                "model1 输出命中敏感词 [session=%s]: %s",
+                session_id, "、".join(sorted({word for _, _, word in matches})),
+            )
+            # 不回传命中的词本身，只给出在本条回复中的位置
+            yield {
+                "type": "moderation",
+                "action": "redacted" if scanner.redact else "flagged",
+                "positions": [{"start": start, "end": end} for start, end, _ in matches],
+            }
 
     # ------------------------------------------------------
-    # 后台异步生成报告（使用独立 db session）
+    # 后台生成报告（任务队列执行，使用独立 db session）
     # ------------------------------------------------------
     async def _generate_report_background(
         self,
         session_id: str,
-        mode: int,
-        topic_id: Optional[int],
-        trait_summary: str,
-        trait_profile: str,
+        mode: Optional[int] = None,
+        topic_id: Optional[int] = None,
+        trait_summary: Optional[str] = None,
+        trait_profile: Optional[str] = None,
     ):
         """
         后台任务：生成观念报告并更新数据库。
         使用独立的 db session，生命周期由本任务自己管理。
+
+        mode / topic_id / trait_* 缺省时（如启动恢复的任务）从 session 与
+        TraitProfile 读取。失败时抛出异常，由任务队列重试。
         """
         from backend.db.database import get_sessionmaker
-        from backend.db.models import Message
 
         SessionLocal = get_sessionmaker()
         async with SessionLocal() as db:
@@ -178,29 +286,33 @@ class ChatService:
                 if session.report_ready:
                     return
 
-                msg_result = await db.execute(
-                    select(Message)
-                    .where(Message.session_id == session_id)
-                    .order_by(Message.created_at.asc())
+                if mode is None:
+                    mode = session.mode
+                    topic_id = session.topic_id
+                if trait_summary is None or trait_profile is None:
+                    trait_summary, trait_profile = await self._load_trait_context(
+                        db, session.user_id
+                    )
+
+                full_history = await self.history.load_window(
+                    db, session_id, "model2_report"
                 )
-                messages = msg_result.scalars().all()
-                full_history = [
-                    {"role": m.role, "content": m.content} for m in messages
-                ]
 
                 _, topic_title, _, topic_tags = await self._get_topic_prompt(
                     db, session, topic_id
                 )
 
-                report = await self.model2.final_report(
-                    full_history=full_history,
-                    mode=mode,
-                    topic_id=topic_id,
-                    topic_title=topic_title,
-                    topic_tags=topic_tags or [],
-                    trait_summary=trait_summary,
-                    trait_profile=trait_profile,
-                )
+                # 后台任务：让位于交互请求
+                with llm_priority(PRIORITY_BACKGROUND):
+                    report = await self.model2.final_report(
+                        full_history=full_history,
+                        mode=mode,
+                        topic_id=topic_id,
+                        topic_title=topic_title,
+                        topic_tags=topic_tags or [],
+                        trait_summary=trait_summary,
+                        trait_profile=trait_profile,
+                    )
 
                 session.report_ready = True
                 session.opinion_report = report
@@ -209,6 +321,356 @@ class ChatService:
             except Exception as e:
                 logger.error("后台报告生成失败 [session=%s]: %s", session_id, e, exc_info=True)
                 await db.rollback()
+                raise
+
+            # 推送给在线的前端（替代 report_status 轮询）
+            await get_event_bus().publish(
+                session.user_id,
+                {"type": "report_ready", "session_id": session_id},
+            )
+
+    async def _run_report_job(self, payload: dict) -> None:
+        await self._generate_report_background(**payload)
+
+    # ------------------------------------------------------
+    # 报告任务入队（按 session 幂等）
+    # ------------------------------------------------------
+    async def _enqueue_report(
+        self,
+        session_id: str,
+        mode: int,
+        topic_id: Optional[int],
+        trait_summary: str,
+        trait_profile: str,
+    ) -> None:
+        await self.jobs.enqueue(
+            "opinion_report",
+            dedupe_key=f"opinion_report:{session_id}",
+            payload={
+                "session_id": session_id,
+                "mode": mode,
+                "topic_id": topic_id,
+                "trait_summary": trait_summary,
+                "trait_profile": trait_profile,
+            },
+        )
+
+    # ------------------------------------------------------
+    # 启动恢复：已完成但报告未生成、且没有对应任务的 session
+    # ------------------------------------------------------
+    async def _recover_pending_reports(self, db: AsyncSession, queue: JobQueue) -> int:
+        job_key = literal("opinion_report:", String) + Session.id
+        result = await db.execute(
+            select(Session.id)
+            .outerjoin(BackgroundJob, BackgroundJob.dedupe_key == job_key)
+            .where(
+                Session.is_completed == True,
+                Session.report_ready == False,
+                Session.deleted_at.is_(None),
+                BackgroundJob.id.is_(None),
+            )
+        )
+        session_ids = list(result.scalars().all())
+        for sid in session_ids:
+            await queue.enqueue(
+                "opinion_report",
+                dedupe_key=f"opinion_report:{sid}",
+                payload={"session_id": sid},
+                db=db,
+            )
+        if session_ids:
+            logger.warning("恢复 %s 个未生成报告的 session", len(session_ids))
+        return len(session_ids)
+
+    # ------------------------------------------------------
+    # 后台收尾：一句话总结（任务队列执行）
+    # ------------------------------------------------------
+    async def _finalize_session_background(
+        self,
+        session_id: str,
+        user_id: int,
+        summarize: bool = False,
+    ) -> None:
+        """
+        fast-end 模式下生成一句话总结并落库，推送给前端。
+        特质更新由按用户合并的 trait_update 任务负责。
+        失败抛出，由队列重试；已写入的总结不会重复生成。
+        """
+        if not summarize:
+            return
+
+        from backend.db.database import get_sessionmaker
+
+        SessionLocal = get_sessionmaker()
+        async with SessionLocal() as db:
+            result = await db.execute(select(Session).where(Session.id == session_id))
+            session = result.scalar_one_or_none()
+            if session is None:
+                logger.warning("后台收尾：session %s 不存在", session_id)
+                return
+            if session.summary is not None:
+                return
+
+            history = await self.history.load(db, session_id)
+            # 用户在等总结：保持交互优先级
+            summary = await self._summarize_history(self.history.window(history, "summary"))
+            session.summary = summary
+            await db.commit()
+
+        await get_event_bus().publish(
+            user_id,
+            {"type": "summary_ready", "session_id": session_id, "summary": summary},
+        )
+
+    async def _run_finalize_job(self, payload: dict) -> None:
+        await self._finalize_session_background(**payload)
+
+    # ------------------------------------------------------
+    # 增量特质更新（按用户合并，任务队列执行）
+    # ------------------------------------------------------
+    async def _enqueue_trait_update(
+        self,
+        user_id: int,
+        db: Optional[AsyncSession] = None,
+        delay: Optional[float] = None,
+    ) -> None:
+        """
+        同一用户短时间内结束多场对话时只更新一次：
+        任务延迟 trait_coalesce_seconds 执行，期间的再次入队直接合并
+        """
+        await self.jobs.enqueue(
+            "trait_update",
+            dedupe_key=f"trait_update:user:{user_id}",
+            payload={"user_id": user_id},
+            db=db,
+            requeue=True,
+            delay=self.trait_coalesce_seconds if delay is None else delay,
+        )
+
+    async def _update_traits_background(self, user_id: int, **_) -> None:
+        """
+        把该用户尚未合并的已完成 session 并入特质画像（版本号 +1）。
+
+        - 提示词只含「已有完整报告 + 新 session 的预算窗口」，与历史会话总数无关
+        - 单次最多合并 trait_max_sessions 场（按时间从早到晚），
+          还有剩余时在同一事务里再次入队，下一次执行接着合并
+        - 以旧版本号做条件写入，并发更新时本次失败并由队列重试
+        """
+        from backend.db.database import get_sessionmaker
+
+        SessionLocal = get_sessionmaker()
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Session.id)
+                .where(
+                    Session.user_id == user_id,
+                    Session.is_completed == True,
+                    Session.traits_merged == False,
+                    Session.deleted_at.is_(None),
+                )
+                .order_by(Session.updated_at.asc())
+                .limit(self.trait_max_sessions + 1)
+            )
+            pending_ids = list(result.scalars().all())
+            if not pending_ids:
+                return
+
+            batch = pending_ids[: self.trait_max_sessions]
+            has_more = len(pending_ids) > len(batch)
+
+            result = await db.execute(
+                select(TraitProfile).where(TraitProfile.user_id == user_id)
+            )
+            profile = result.scalar_one_or_none()
+            base_version = profile.version if profile else 0
+
+            per_session_budget = self.history.budgets["trait_report"] // len(batch)
+            new_sessions = {}
+            for sid in batch:  # 按时间正序
+                history = await self.history.load(db, sid)
+                new_sessions[sid] = self.history.window(
+                    history, "trait_report", budget=per_session_budget
+                )
+
+            with llm_priority(PRIORITY_BACKGROUND):
+                full_report = await self.model3.merge_full_report(
+                    profile.full_report if profile else "", new_sessions
+                )
+                trait_summary = await self.model3.generate_summary(full_report)
+
+            now = datetime.utcnow()
+            if profile is None:
+                db.add(TraitProfile(
+                    user_id=user_id,
+                    summary=trait_summary,
+                    full_report=full_report,
+                    version=1,
+                    updated_at=now,
+                ))
+            else:
+                result = await db.execute(
+                    update(TraitProfile)
+                    .where(
+                        TraitProfile.user_id == user_id,
+                        TraitProfile.version == base_version,
+                    )
+                    .values(
+                        summary=trait_summary,
+                        full_report=full_report,
+                        version=base_version + 1,
+                        updated_at=now,
+                    )
+                )
+                if result.rowcount != 1:
+                    await db.rollback()
+                    raise RuntimeError(f"特质画像已被并发更新 [user={user_id}]")
+
+            db.add(TraitProfileRevision(
+                user_id=user_id,
+                version=base_version + 1,
+                summary=trait_summary,
+                full_report=full_report,
+                source_sessions=json.dumps(batch),
+            ))
+            await db.execute(
+                update(Session)
+                .where(Session.id.in_(batch))
+                .values(traits_merged=True)
+            )
+            if has_more:
+                # 执行中再次入队：本次完成后立即再执行一次，接着合并剩余的会话
+                await self._enqueue_trait_update(user_id, db=db, delay=0)
+            await db.commit()
+
+    async def _run_trait_job(self, payload: dict) -> None:
+        await self._update_traits_background(**payload)
+
+    # ------------------------------------------------------
+    # 启动恢复：已完成、尚未并入特质的 session（每个用户入队一次，任务内分批合并）
+    # ------------------------------------------------------
+    async def _recover_pending_traits(self, db: AsyncSession, queue: JobQueue) -> int:
+        result = await db.execute(
+            select(Session.user_id)
+            .where(
+                Session.is_completed == True,
+                Session.traits_merged == False,
+                Session.deleted_at.is_(None),
+            )
+            .distinct()
+        )
+        user_ids = list(result.scalars().all())
+        for uid in user_ids:
+            await self._enqueue_trait_update(uid, db=db)
+        return len(user_ids)
+
+    # ------------------------------------------------------
+    # model2 分析：串行 / 流水线
+    # ------------------------------------------------------
+    async def _analyze_turn(
+        self,
+        session_id: str,
+        mode: int,
+        history: List[Dict],
+        user_input: str,
+        topic_id: Optional[int],
+        topic_title: Optional[str],
+        topic_tags: List[str],
+        trait_summary: str,
+        trait_profile: str,
+    ) -> dict:
+        """
+        返回本轮 model1 使用的分析结果；report_ready 时负责启动报告任务。
+
+        - 串行（默认）：等待本轮 analyze 完成后再开始 model1
+        - 流水线（mode 在 pipelined_modes 中）：直接使用上一轮后台分析的结果，
+          同时在后台分析本轮，结果留给下一轮；无缓存时（本进程首轮）退化为串行，
+          串行结果直接留给下一轮
+        """
+        analyze_kwargs = dict(
+            session_history=history,
+            user_input=user_input,
+            mode=mode,
+            topic_id=topic_id,
+            topic_title=topic_title,
+            topic_tags=topic_tags,
+            trait_summary=trait_summary,
+            trait_profile=trait_profile,
+        )
+
+        if mode not in self.pipelined_modes:
+            analysis = await self.model2.analyze(**analyze_kwargs)
+        else:
+            previous = self._pop_pending_analysis(session_id)
+            analysis = None
+            if previous is not None:
+                try:
+                    analysis = await previous
+                except Exception:
+                    # 失败已在 done 回调中记录，退化为串行
+                    analysis = None
+            if analysis is None:
+                # 无可用结果（本进程首轮、已过期、上一轮失败）：串行分析本轮，
+                # 结果同时留给下一轮，不再在后台重复分析同一份输入
+                analysis = await self.model2.analyze(**analyze_kwargs)
+                resolved = asyncio.get_running_loop().create_future()
+                resolved.set_result(analysis)
+                self._put_pending_analysis(session_id, resolved)
+            else:
+                self._put_pending_analysis(
+                    session_id,
+                    asyncio.create_task(self._analyze_background(session_id, analyze_kwargs)),
+                )
+
+        if analysis.get("signals", {}).get("report_ready", False):
+            await self._enqueue_report(
+                session_id, mode, topic_id, trait_summary, trait_profile
+            )
+        return analysis
+
+    def _put_pending_analysis(self, session_id: str, task: asyncio.Future) -> None:
+        self._pending_analysis[session_id] = (task, time.monotonic())
+        task.add_done_callback(lambda t: self._pending_analysis_done(session_id, t))
+
+        # 清理被放弃的会话：最早创建的在前，过期或超出上限的直接丢弃
+        # （未完成的任务不取消，它可能还要启动报告任务；结束后由 done 回调收尾）
+        now = time.monotonic()
+        while self._pending_analysis:
+            oldest_id, (_, created_at) = next(iter(self._pending_analysis.items()))
+            if (
+                len(self._pending_analysis) <= MAX_PENDING_ANALYSES
+                and now - created_at < PENDING_ANALYSIS_TTL
+            ):
+                break
+            del self._pending_analysis[oldest_id]
+
+    def _pop_pending_analysis(self, session_id: str) -> Optional[asyncio.Future]:
+        entry = self._pending_analysis.pop(session_id, None)
+        return entry[0] if entry is not None else None
+
+    def _pending_analysis_done(self, session_id: str, task: asyncio.Future) -> None:
+        """取出异常（避免 "Task exception was never retrieved"），失败的结果不留给下一轮"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            return
+        logger.warning("后台分析失败 [session=%s]: %s", session_id, error)
+        entry = self._pending_analysis.get(session_id)
+        if entry is not None and entry[0] is task:
+            del self._pending_analysis[session_id]
+
+    async def _analyze_background(self, session_id: str, analyze_kwargs: dict) -> dict:
+        """流水线模式下的本轮分析：报告就绪时立即启动报告任务，不等下一轮。"""
+        analysis = await self.model2.analyze(**analyze_kwargs)
+        if analysis.get("signals", {}).get("report_ready", False):
+            await self._enqueue_report(
+                session_id,
+                analyze_kwargs["mode"],
+                analyze_kwargs["topic_id"],
+                analyze_kwargs["trait_summary"],
+                analyze_kwargs["trait_profile"],
+            )
+        return analysis
 
     # ------------------------------------------------------
     # 主流式入口
@@ -223,7 +685,13 @@ class ChatService:
         force_end: bool = False,
         db: Optional[AsyncSession] = None,
         user_id: Optional[int] = None,
+        turn_context: Optional[tuple] = None,
     ) -> AsyncGenerator[dict, None]:
+        """
+        turn_context 为 load_turn_context() 的结果（API 层已加载时传入，省去重复查询）
+
+        本轮的 user / assistant 消息在轮末一次提交；中途失败时仍写入已暂存的用户发言。
+        """
 
         if db is None or user_id is None:
             raise ValueError("db and user_id are required")
@@ -235,12 +703,69 @@ class ChatService:
             except Exception:
                 raise ValueError(f"Invalid topic_id: {topic_id}")
 
+        if turn_context is None:
+            turn_context = await self.load_turn_context(db, session_id, user_id)
+        existing_session, trait_summary, trait_profile = turn_context
+
         # 基于当前用户构造 DB 历史管理器
         history_mgr = DatabaseHistoryManager(db=db, user_id=user_id)
+        try:
+            async for event in self._stream_turn(
+                session_id=session_id,
+                mode=mode,
+                topic_id=topic_id,
+                user_input=user_input,
+                is_first=is_first,
+                force_end=force_end,
+                db=db,
+                user_id=user_id,
+                history_mgr=history_mgr,
+                existing_session=existing_session,
+                trait_summary=trait_summary,
+                trait_profile=trait_profile,
+            ):
+                yield event
+        finally:
+            if history_mgr.has_pending:
+                try:
+                    await history_mgr.flush_after_failure()
+                except Exception as e:
+                    logger.error("本轮中断后写入用户发言失败 [session=%s]: %s", session_id, e)
+
+    async def load_turn_context(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        user_id: int,
+    ) -> tuple[Optional[Session], str, str]:
+        """一次查询取回 (session, 特质 summary, 特质 full_report)；session 不存在时为 None"""
+        session, profile = await DatabaseHistoryManager(
+            db=db, user_id=user_id
+        ).load_turn_context(session_id)
+        if not profile:
+            return session, "", ""
+        return session, str(profile.summary or ""), str(profile.full_report or "")
+
+    async def _stream_turn(
+        self,
+        session_id: str,
+        mode: int,
+        topic_id: Optional[int],
+        user_input: str,
+        is_first: bool,
+        force_end: bool,
+        db: AsyncSession,
+        user_id: int,
+        history_mgr: DatabaseHistoryManager,
+        existing_session: Optional[Session],
+        trait_summary: str,
+        trait_profile: str,
+    ) -> AsyncGenerator[dict, None]:
         session = await history_mgr.ensure_session(
             session_id=session_id,
             mode=mode,
-            topic_id=topic_id
+            topic_id=topic_id,
+            existing=existing_session,
         )
 
         # 🆕 v1.4: 如果是新Session且有topic_id，进行完整快照
@@ -260,13 +785,15 @@ class ChatService:
             authors = await author_crud_local.get_authors_by_topic(db, topic_id)
             author_ids = [a.user_id for a in authors]
             if user_id not in author_ids:
-                await topic_crud.increment_usage_count(db, topic_id)
-
-        # 当前用户长期特质
-        trait_summary, trait_profile = await self._load_trait_context(db, user_id)
+                await get_topic_counters().increment(db, topic_id, "usage_count")
 
         # 用户主动结束
         if force_end:
+            # 流水线模式下尚未消费的分析结果已无用
+            pending = self._pop_pending_analysis(session_id)
+            if pending is not None:
+                pending.cancel()
+
             async for event in self._handle_final_outputs(
                 session_id=session_id,
                 mode=mode,
@@ -295,8 +822,7 @@ class ChatService:
                 raise ValueError(f"话题 ID {topic_id} 不存在或未找到提示词")
 
             # 加载 model1 基础 prompt
-            base_model1 = load_prompt("model1/system.txt")
-            system_prompt = base_model1 + "\n\n" + topic_prompt
+            system_prompt = load_composite_prompt("model1/mode1") + "\n\n" + topic_prompt
 
             # --------------------------
             # 首轮：机器人先主动说话
@@ -322,14 +848,19 @@ class ChatService:
             # 后续轮：用户先说
             # --------------------------
             else:
-                await history_mgr.add(session_id, "user", user_input)
-                history = await history_mgr.get(session_id)
+                # 用户发言先暂存，与本轮回复一起在轮末提交
+                history_mgr.stage(session_id, "user", user_input)
+                session_history = await self.history.load(
+                    db, session_id, pending=history_mgr.pending(session_id)
+                )
+                history = self.history.window(session_history, "model1")
 
-                # 调用 model2 分析（传入话题元数据）
-                analysis = await self.model2.analyze(
-                    session_history=history,
-                    user_input=user_input,
+                # 调用 model2 分析（传入话题元数据；报告就绪时已启动后台任务）
+                analysis = await self._analyze_turn(
+                    session_id=session_id,
                     mode=1,
+                    history=self.history.window(session_history, "model2_analysis"),
+                    user_input=user_input,
                     topic_id=topic_id,
                     topic_title=topic_title,
                     topic_tags=topic_tags or [],
@@ -339,19 +870,9 @@ class ChatService:
                 advice = analysis.get("advice", "")
                 report_ready = analysis.get("signals", {}).get("report_ready", False)
 
-                # 如果报告就绪，触发后台生成任务
                 if report_ready:
-                    asyncio.create_task(
-                        self._generate_report_background(
-                            session_id=session_id,
-                            mode=mode,
-                            topic_id=topic_id,
-                            trait_summary=trait_summary,
-                            trait_profile=trait_profile,
-                        )
-                    )
                     yield {"type": "report_generating"}
-                    advice += "\n\n[内部提示] 观念已捕捉完成，请在本次回复中自然地告知用户：你已经成功捕捉到他的观念，稍后可以查看分析报告。"
+                    advice += _REPORT_READY_HINT
 
                 final_prompt = (
                     "# 来自内部模型的建议（用户不可见）：\n"
@@ -373,14 +894,19 @@ class ChatService:
         # =======================================================
         elif mode == 2:
 
-            await history_mgr.add(session_id, "user", user_input)
-            history = await history_mgr.get(session_id)
+            # 用户发言先暂存，与本轮回复一起在轮末提交
+            history_mgr.stage(session_id, "user", user_input)
+            session_history = await self.history.load(
+                db, session_id, pending=history_mgr.pending(session_id)
+            )
+            history = self.history.window(session_history, "model1")
 
-            # 调用 model2 分析
-            analysis = await self.model2.analyze(
-                session_history=history,
-                user_input=user_input,
+            # 调用 model2 分析（报告就绪时已启动后台任务）
+            analysis = await self._analyze_turn(
+                session_id=session_id,
                 mode=2,
+                history=self.history.window(session_history, "model2_analysis"),
+                user_input=user_input,
                 topic_id=None,
                 topic_title=None,
                 topic_tags=[],
@@ -390,24 +916,11 @@ class ChatService:
             advice = analysis.get("advice", "")
             report_ready = analysis.get("signals", {}).get("report_ready", False)
 
-            # 如果报告就绪，触发后台生成任务
             if report_ready:
-                asyncio.create_task(
-                    self._generate_report_background(
-                        session_id=session_id,
-                        mode=mode,
-                        topic_id=None,
-                        trait_summary=trait_summary,
-                        trait_profile=trait_profile,
-                    )
-                )
                 yield {"type": "report_generating"}
-                advice += "\n\n[内部提示] 观念已捕捉完成，请在本次回复中自然地告知用户：你已经成功捕捉到他的观念，稍后可以查看分析报告。"
+                advice += _REPORT_READY_HINT
 
-            base_model1 = load_prompt("model1/system.txt")
-            system_prompt = base_model1
-            mode2_intro = load_prompt("model1/mode2_intro.txt")
-            system_prompt = system_prompt + "\n\n" + mode2_intro
+            system_prompt = load_composite_prompt("model1/mode2")
 
             final_prompt = (
                 "\n\n# 来自内部模型的建议（用户不可见）：\n"
@@ -437,6 +950,23 @@ class ChatService:
             lines.append(f"{role}：{turn.get('content', '')}")
         return "\n".join(lines).strip()
 
+    async def _summarize_history(self, history: List[Dict]) -> str:
+        """model1：整段对话的一句话总结（面向用户）"""
+        summary_prompt = (
+            "请根据以下完整对话，生成一句话总结（面向用户，可直接展示）：\n\n"
+            + self._format_history_for_summary(history)
+        )
+
+        model1_summary = ""
+        async for chunk in self.llm.chat_stream(
+            system_prompt="你是一个擅长对对话进行高度概括的助手。",
+            user_prompt=summary_prompt,
+            history=[],
+        ):
+            model1_summary += chunk
+
+        return strip_control_markers(model1_summary).strip()
+
     # =======================================================
     # 收尾逻辑：summary + traits
     # =======================================================
@@ -453,72 +983,48 @@ class ChatService:
         trait_profile: str,
     ) -> AsyncGenerator[dict, None]:
 
-        # 1. 获取历史
-        full_history = await history_mgr.get(session_id)
-
-        # 2. model1 summary
-        summary_prompt = (
-            "请根据以下完整对话，生成一句话总结（面向用户，可直接展示）：\n\n"
-            + self._format_history_for_summary(full_history)
-        )
+        # 1. 获取历史（完整历史返回给前端，总结只用预算窗口）
+        session_history = await self.history.load(db, session_id)
+        full_history = session_history.full
 
+        # 2. 一句话总结：fast-end 模式放到后台，否则在请求内生成
         model1_summary = ""
-        async for chunk in self.llm.chat_stream(
-            system_prompt="你是一个擅长对对话进行高度概括的助手。",
-            user_prompt=summary_prompt,
-            history=[],
-        ):
-            model1_summary += chunk
-
-        model1_summary = strip_control_markers(model1_summary).strip()
-
-        # 3. model3：更新特质（只用本 session）
-        trait_data = await self.model3.update_traits({session_id: full_history})
-        new_trait_summary = trait_data.get("summary", "")
-        new_full_report = trait_data.get("full_report", "")
-
-        # 4. 写 TraitProfile
-        result = await db.execute(
-            select(TraitProfile).where(TraitProfile.user_id == user_id)
-        )
-        profile = result.scalar_one_or_none()
-
-        if profile is None:
-            profile = TraitProfile(
-                user_id=user_id,
-                summary=new_trait_summary,
-                full_report=new_full_report,
+        if not self.fast_end:
+            model1_summary = await self._summarize_history(
+                self.history.window(session_history, "summary")
             )
-            db.add(profile)
-        else:
-            profile.summary = new_trait_summary
-            profile.full_report = new_full_report
-
-        await db.commit()
 
-        # 5. 标记 session 完成（直接复用已有对象，避免重复查询）
+        # 3. 标记 session 完成
         result = await db.execute(select(Session).where(Session.id == session_id))
         session = result.scalar_one_or_none()
         if session:
             session.is_completed = True
+            if not self.fast_end:
+                session.summary = model1_summary
             await db.commit()
 
-        # 6. 触发后台报告生成任务
-        asyncio.create_task(
-            self._generate_report_background(
-                session_id=session_id,
-                mode=mode,
-                topic_id=topic_id,
-                trait_summary=trait_summary,
-                trait_profile=trait_profile,
+        # 4. 总结、特质更新（按用户合并）、报告生成入队（持久化，不阻塞本次响应）
+        if self.fast_end:
+            await self.jobs.enqueue(
+                "session_finalize",
+                dedupe_key=f"session_finalize:{session_id}",
+                payload={
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "summarize": True,
+                },
             )
+        await self._enqueue_trait_update(user_id)
+        await self._enqueue_report(
+            session_id, mode, topic_id, trait_summary, trait_profile
         )
 
-        # 7. 输出最终事件（包含 report_ready 字段）
+        # 5. 输出最终事件（特质在后台更新，这里返回更新前的 trait_summary）
         yield {
             "type": "end",
             "summary": model1_summary,
-            "trait_summary": new_trait_summary,
+            "summary_pending": self.fast_end,  # 总结在后台生成，前端通过 report_status 获取
+            "trait_summary": trait_summary,
             "full_dialogue": full_history,
             "report_ready": False,  # 报告正在后台生成，前端启动轮询
-        }
\ No newline at end of file
+        }
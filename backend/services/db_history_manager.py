@@ -1,18 +1,232 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from backend.db.models import Message, Session
+from sqlalchemy import select, update, func
+from backend.db.models import Message, Session, TraitProfile
 from datetime import datetime
+from collections import OrderedDict
+import anyio
+from typing import List, Optional, Tuple
+import time
+
+# 缓存的单条消息：(id, role, content)
+CachedMessage = Tuple[int, str, str]
+
+# 版本：(消息条数, 最后一条消息 id)
+HistoryVersion = Tuple[int, int]
+
+# 每条消息在缓存中的固定开销估算（元组、id、role）
+_ENTRY_OVERHEAD_BYTES = 96
+
+
+def _message_bytes(content: str) -> int:
+    return len(content.encode("utf8")) + _ENTRY_OVERHEAD_BYTES
+
+
+class _CacheEntry:
+    __slots__ = ("messages", "version", "size", "expires_at")
+
+    def __init__(self, messages: List[CachedMessage], version: HistoryVersion, ttl: float):
+        self.messages = messages
+        self.version = version
+        self.size = sum(_message_bytes(m[2]) for m in messages)
+        self.expires_at = time.monotonic() + ttl
+
+
+class HistoryCache:
+    """
+    进程内的会话历史缓存（LRU + TTL，按总字节数限容）
+
+    - 读取前先查一次版本（消息条数 + 最后一条消息 id，走 (session_id, created_at) 索引），
+      版本一致才用缓存，多 worker 下别的进程写入的消息会让版本不一致而重新加载
+    - 本进程 add() 后直接追加到缓存并推进版本，下一轮无需重新读取全部消息
+    - clear / 删除会话时失效
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 600.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+        # 指标
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._appends = 0
+        self._evictions = 0
+
+    def get(self, session_id: str, version: HistoryVersion) -> Optional[List[CachedMessage]]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self._misses += 1
+            return None
+        if entry.version != version or entry.expires_at < time.monotonic():
+            self._stale += 1
+            self._misses += 1
+            self.invalidate(session_id)
+            return None
+        self._hits += 1
+        entry.expires_at = time.monotonic() + self.ttl
+        self._entries.move_to_end(session_id)
+        return entry.messages
+
+    def put(self, session_id: str, version: HistoryVersion, messages: List[CachedMessage]) -> None:
+        self.invalidate(session_id)
+        entry = _CacheEntry(list(messages), version, self.ttl)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[session_id] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def append(self, session_id: str, message: CachedMessage) -> None:
+        """
+        本进程写入一条消息后追加到缓存
+
+        只推进"条数 + 1"：若期间有别的进程写入，数据库里的条数会更大，下次读取时版本不一致而重新加载。
+        """
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        count, last_id = entry.version
+        if message[0] <= last_id:
+            self.invalidate(session_id)
+            return
+        entry.messages.append(message)
+        entry.version = (count + 1, message[0])
+        size = _message_bytes(message[2])
+        entry.size += size
+        self._bytes += size
+        self._appends += 1
+        self._entries.move_to_end(session_id)
+        self._evict()
+
+    def invalidate(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._evictions += 1
+
+    def metrics(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits_total": self._hits,
+            "misses_total": self._misses,
+            "stale_total": self._stale,
+            "appends_total": self._appends,
+            "evictions_total": self._evictions,
+            "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+history_cache = HistoryCache()
+
+
+def configure_history_cache(max_bytes: Optional[int] = None, ttl_seconds: Optional[float] = None) -> HistoryCache:
+    """启动时调用：按配置调整缓存容量与过期时间"""
+    if max_bytes is not None:
+        history_cache.max_bytes = max_bytes
+    if ttl_seconds is not None:
+        history_cache.ttl = ttl_seconds
+    history_cache._evict()
+    return history_cache
+
+
+def history_version_columns(session_id: str):
+    """当前历史版本（消息条数、最后一条消息 id）的标量子查询，可与其他列一起 select"""
+    count = (
+        select(func.count(Message.id))
+        .where(Message.session_id == session_id)
+        .scalar_subquery()
+    )
+    last_id = (
+        select(func.coalesce(func.max(Message.id), 0))
+        .where(Message.session_id == session_id)
+        .scalar_subquery()
+    )
+    return count, last_id
+
+
+def history_messages_query(session_id: str):
+    """会话全部消息 (id, role, content)，按时间正序（走 idx_message_session_created）"""
+    return (
+        select(Message.id, Message.role, Message.content)
+        .where(Message.session_id == session_id)
+        .order_by(Message.created_at.asc(), Message.id.asc())
+    )
+
+
+async def load_cached_messages(
+    db: AsyncSession,
+    session_id: str,
+    version: HistoryVersion,
+) -> List[CachedMessage]:
+    """按版本取缓存，未命中时从数据库加载并写入缓存"""
+    messages = history_cache.get(session_id, version)
+    if messages is not None:
+        return messages
+
+    result = await db.execute(history_messages_query(session_id))
+    messages = [tuple(row) for row in result.all()]
+    history_cache.put(session_id, (len(messages), messages[-1][0] if messages else 0), messages)
+    return messages
 
 
 class DatabaseHistoryManager:
+    """
+    单个请求（一轮对话）内的消息读写
+
+    一轮对话的 user / assistant 消息先 stage() 暂存，轮末 flush() 一次写入并提交
+    （连同 sessions.updated_at），每轮只有一次提交。
+    """
+
     def __init__(self, db: AsyncSession, user_id: int):
         self.db = db
         self.user_id = user_id
+        self._pending: List[Message] = []
+
+    async def load_turn_context(
+        self,
+        session_id: str,
+    ) -> Tuple[Optional[Session], Optional[TraitProfile]]:
+        """
+        一次查询取回 session 与当前用户的特质画像
+
+        session 不存在（新会话首轮）时再单独查画像。
+        """
+        row = (await self.db.execute(
+            select(Session, TraitProfile)
+            .outerjoin(TraitProfile, TraitProfile.user_id == self.user_id)
+            .where(Session.id == session_id)
+        )).one_or_none()
+        if row is not None:
+            return row[0], row[1]
+
+        result = await self.db.execute(
+            select(TraitProfile).where(TraitProfile.user_id == self.user_id)
+        )
+        return None, result.scalar_one_or_none()
 
-    async def ensure_session(self, session_id: str, mode: int, topic_id: int | None):
+    async def ensure_session(
+        self,
+        session_id: str,
+        mode: int,
+        topic_id: int | None,
+        existing: Optional[Session] = None,
+    ):
         """
-        如果 session 不存在就创建
+        如果 session 不存在就创建（existing 为调用方已加载的 session，可省去一次查询）
         """
+        if existing is not None:
+            return existing
+
         result = await self.db.execute(select(Session).where(Session.id == session_id))
         session = result.scalar_one_or_none()
 
@@ -35,36 +249,69 @@ class DatabaseHistoryManager:
     # 写入消息
     # =====================================
     async def add(self, session_id: str, role: str, content: str):
-        msg = Message(
+        self.stage(session_id, role, content)
+        await self.flush()
+
+    def stage(self, session_id: str, role: str, content: str) -> None:
+        """暂存一条消息（created_at 取暂存时刻），由 flush() 写入"""
+        self._pending.append(Message(
             session_id=session_id,
             role=role,
             content=content,
             created_at=datetime.utcnow()
-        )
-        self.db.add(msg)
+        ))
+
+    def pending(self, session_id: str) -> List[Tuple[str, str]]:
+        """尚未写入的 (role, content)，供本轮拼装历史"""
+        return [(m.role, m.content) for m in self._pending if m.session_id == session_id]
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    async def flush(self):
+        """暂存的消息 + 更新 session 时间，一次提交"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self.db.add_all(pending)
 
         # 更新 session 时间
         await self.db.execute(
             update(Session)
-            .where(Session.id == session_id)
+            .where(Session.id.in_({m.session_id for m in pending}))
             .values(updated_at=datetime.utcnow())
         )
         await self.db.commit()
 
+        # 提交成功后追加到缓存（只写增量）
+        for m in pending:
+            history_cache.append(m.session_id, (m.id, m.role, m.content))
+
+    async def flush_after_failure(self):
+        """
+        本轮中途失败（LLM 出错、客户端断开）时调用：回滚未提交的改动后，
+        仍把已暂存的消息（通常只有用户发言）写入，保证用户输入不丢
+
+        客户端断开时 Starlette 会取消整个响应任务组，这里屏蔽取消，保证回滚与写入执行完。
+        """
+        if not self._pending:
+            return
+        with anyio.CancelScope(shield=True):
+            await self.db.rollback()
+            await self.flush()
+
     # =====================================
     # 获取完整历史
     # =====================================
     async def get(self, session_id: str):
-        result = await self.db.execute(
-            select(Message)
-            .where(Message.session_id == session_id)
-            .order_by(Message.created_at.asc())
-        )
-        messages = result.scalars().all()
+        count, last_id = history_version_columns(session_id)
+        version = tuple((await self.db.execute(select(count, last_id))).one())
+        messages = await load_cached_messages(self.db, session_id, version)
 
         return [
-            {"role": m.role, "content": m.content}
-            for m in messages
+            {"role": role, "content": content}
+            for _, role, content in messages
         ]
 
     # =====================================
@@ -75,3 +322,4 @@ class DatabaseHistoryManager:
             Message.__table__.delete().where(Message.session_id == session_id)
         )
         await self.db.commit()
+        history_cache.invalidate(session_id)
@@ -5,13 +5,22 @@
 - 电解液消费
 - 电解液充值（管理员功能）
 - 余额查询
+- 流水汇总重建与校验
 """
 
+import logging
 from datetime import date
+from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.db.database import get_sessionmaker
+from backend.db.models import ElectrolyteLog, ElectrolyteSummary
 from backend.db.crud import user as user_crud
 from backend.db.crud import electrolyte as electrolyte_crud
+from backend.db.crud import electrolyte_log as electrolyte_log_crud
+
+logger = logging.getLogger("electrolyte_service")
 
 
 # 配置常量
@@ -190,3 +199,51 @@ async def get_electrolyte_info(
         "balance": balance,
         "message": "查询成功"
     }
+
+
+# ============================================================
+# 流水汇总重建（任务队列 / 管理后台）
+# ============================================================
+
+SUMMARY_REBUILD_JOB = "electrolyte_summary_rebuild"
+
+
+async def rebuild_and_verify_summaries(
+    db: AsyncSession,
+    user_id: Optional[int] = None
+) -> dict:
+    """
+    按原始流水重建汇总表并校验
+
+    返回:
+        {
+            "rows": int,            # 重建后的汇总行数
+            "mismatches": list      # 校验不一致的条目（正常为空）
+        }
+    """
+    rows = await electrolyte_log_crud.rebuild_summaries(db, user_id)
+    mismatches = await electrolyte_log_crud.verify_summaries(db, user_id)
+    if mismatches:
+        logger.warning("电解液汇总重建后仍有 %s 条不一致", len(mismatches))
+    return {"rows": rows, "mismatches": mismatches}
+
+
+async def run_summary_rebuild_job(payload: dict) -> None:
+    """任务队列处理函数：payload 可带 user_id，缺省重建全部"""
+    async with get_sessionmaker()() as db:
+        result = await rebuild_and_verify_summaries(db, payload.get("user_id"))
+    logger.info("电解液汇总已重建：%s 行", result["rows"])
+
+
+async def recover_missing_summaries(db: AsyncSession, queue) -> int:
+    """启动恢复：已有流水但汇总表为空（首次部署汇总表）时入队全量重建"""
+    has_summary = (await db.execute(select(ElectrolyteSummary.id).limit(1))).first()
+    if has_summary:
+        return 0
+    has_logs = (await db.execute(select(ElectrolyteLog.id).limit(1))).first()
+    if not has_logs:
+        return 0
+    await queue.enqueue(
+        SUMMARY_REBUILD_JOB, dedupe_key=SUMMARY_REBUILD_JOB, payload={}, db=db, requeue=True
+    )
+    return 1
@@ -0,0 +1,238 @@
+# backend/services/event_bus.py
+"""
+用户事件总线（进程内 pub/sub + 可插拔跨进程后端）
+
+用途：替代前端对 report_status / 通知列表的定时轮询
+- 发布方：报告生成任务、总结任务、话题通知
+- 订阅方：/api/events/stream（每个连接一个订阅）
+
+后端：
+- local：单进程内直接分发（开发 / 单 worker）
+- database：发布写入 user_events 表，每个进程一个轮询器按 id 增量读取
+  后分发给本进程的订阅者；多个 uvicorn worker 共享，SQLite 下即可测试
+
+并发事务的自增 id 不一定按 id 顺序提交（MySQL/InnoDB）：游标越过的空缺 id
+记为待补，之后的轮询一并查询，gap_timeout 秒内补到即投递，超时放弃（多为已回滚的插入）。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy import select, delete, func, or_
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import UserEvent
+
+logger = logging.getLogger("event_bus")
+
+# 单次最多登记的空缺 id 数（游标一次跳过极大区间时只等待靠近游标的部分）
+_MAX_GAPS = 1000
+
+
+class Subscription:
+    """单个订阅者的有界事件队列；积压时丢弃最旧的事件"""
+
+    def __init__(self, user_id: int, maxsize: int = 100):
+        self.user_id = user_id
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event: dict) -> None:
+        if self._queue.full():
+            try:
+                self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self._queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+
+class LocalEventBus:
+    """进程内事件总线"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._published = 0
+        self._delivered = 0
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def publish(self, user_id: int, event: dict) -> None:
+        """发布事件；失败只记录日志，不影响调用方业务"""
+        self._published += 1
+        self._dispatch(user_id, event)
+
+    def _dispatch(self, user_id: int, event: dict) -> None:
+        for sub in list(self._subscribers.get(user_id, ())):
+            sub.put(event)
+            self._delivered += 1
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[Subscription]:
+        sub = Subscription(user_id)
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            subs = self._subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[user_id]
+
+    def metrics(self) -> dict:
+        return {
+            "backend": "local",
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published_total": self._published,
+            "delivered_total": self._delivered,
+        }
+
+
+class DatabaseEventBus(LocalEventBus):
+    """
+    基于 user_events 表的跨进程事件总线
+
+    每个进程只有一个轮询查询（WHERE id > last_id OR id IN 待补空缺），与在线用户数无关。
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 1.0,
+        retention_seconds: float = 600.0,
+        gap_timeout: float = 10.0,
+    ):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.gap_timeout = gap_timeout
+        self._last_id = 0
+        # 游标已越过、但尚未读到的 id -> 放弃等待的时刻（monotonic）
+        self._gaps: Dict[int, float] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+        self._gaps_filled = 0
+        self._gaps_expired = 0
+
+    async def start(self) -> None:
+        if self._poller is not None:
+            return
+        async with get_sessionmaker()() as db:
+            self._last_id = (await db.execute(select(func.max(UserEvent.id)))).scalar() or 0
+        self._poller = asyncio.create_task(self._poll_loop(), name="event-bus-poller")
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+
+    async def publish(self, user_id: int, event: dict) -> None:
+        self._published += 1
+        try:
+            async with get_sessionmaker()() as db:
+                db.add(UserEvent(
+                    user_id=user_id,
+                    payload=json.dumps(event, ensure_ascii=False),
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.error("事件发布失败 [user=%s, type=%s]: %s", user_id, event.get("type"), e)
+
+    async def _poll_loop(self) -> None:
+        last_cleanup = datetime.utcnow()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self._expire_gaps()
+                condition = UserEvent.id > self._last_id
+                if self._gaps:
+                    condition = or_(condition, UserEvent.id.in_(list(self._gaps)))
+                async with get_sessionmaker()() as db:
+                    rows = (await db.execute(
+                        select(UserEvent)
+                        .where(condition)
+                        .order_by(UserEvent.id)
+                        .limit(500)
+                    )).scalars().all()
+
+                    for row in rows:
+                        if row.id <= self._last_id:
+                            # 晚提交的事件补上了之前的空缺
+                            if self._gaps.pop(row.id, None) is None:
+                                continue
+                            self._gaps_filled += 1
+                        else:
+                            self._record_gaps(row.id)
+                            self._last_id = row.id
+                        if row.user_id in self._subscribers:
+                            self._dispatch(row.user_id, json.loads(row.payload))
+
+                    now = datetime.utcnow()
+                    if (now - last_cleanup).total_seconds() >= self.retention_seconds:
+                        cutoff = now - timedelta(seconds=self.retention_seconds)
+                        await db.execute(delete(UserEvent).where(UserEvent.created_at < cutoff))
+                        await db.commit()
+                        last_cleanup = now
+            except Exception as e:
+                logger.error("事件轮询失败: %s", e, exc_info=True)
+
+    def _record_gaps(self, next_id: int) -> None:
+        """游标从 last_id 跳到 next_id：中间未读到的 id 登记为待补"""
+        start = max(self._last_id + 1, next_id - _MAX_GAPS)
+        if start >= next_id:
+            return
+        deadline = time.monotonic() + self.gap_timeout
+        for missing in range(start, next_id):
+            self._gaps[missing] = deadline
+        while len(self._gaps) > _MAX_GAPS:
+            del self._gaps[min(self._gaps)]
+            self._gaps_expired += 1
+
+    def _expire_gaps(self) -> None:
+        now = time.monotonic()
+        for missing in [i for i, deadline in self._gaps.items() if deadline <= now]:
+            del self._gaps[missing]
+            self._gaps_expired += 1
+
+    def metrics(self) -> dict:
+        return {
+            **super().metrics(),
+            "backend": "database",
+            "last_event_id": self._last_id,
+            "pending_gaps": len(self._gaps),
+            "gaps_filled_total": self._gaps_filled,
+            "gaps_expired_total": self._gaps_expired,
+        }
+
+
+# ============================================================
+# 进程级单例
+# ============================================================
+_bus: LocalEventBus = LocalEventBus()
+
+
+def configure_event_bus(backend: str = "local", **options) -> LocalEventBus:
+    """按配置替换进程级事件总线（main 启动时调用）"""
+    global _bus
+    if backend == "database":
+        _bus = DatabaseEventBus(**options)
+    elif backend == "local":
+        _bus = LocalEventBus()
+    else:
+        raise ValueError(f"未知的 event_bus 后端: {backend}")
+    return _bus
+
+
+def get_event_bus() -> LocalEventBus:
+    return _bus
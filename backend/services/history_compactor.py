@@ -0,0 +1,298 @@
+# backend/services/history_compactor.py
+"""
+长对话历史压缩（token 预算窗口 + 滚动摘要）
+
+- 每个调用点（model1 对话、model2 分析、观念报告……）有各自的 token 预算
+- 完整历史放得下预算时原样发送（短对话行为不变）
+- 放不下时发送：滚动摘要 + 最近若干轮原文（从新到旧装到预算为止）
+- 滚动摘要持久化在 sessions.history_summary，后台增量更新：
+  每次把"最近 keep_recent_turns 轮之前、尚未折叠"的消息并入摘要；
+  攒够 fold_batch_turns 轮才折叠一次，摘要保持若干轮不变，利于服务商前缀缓存；
+  积压超过 fold 预算时分批折叠，每批推进一次摘要边界
+"""
+
+import asyncio
+import logging
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.models import Session
+from backend.services.db_history_manager import (
+    CachedMessage,
+    history_version_columns,
+    load_cached_messages,
+)
+from backend.llm_client.limiter import llm_priority, PRIORITY_BACKGROUND
+from backend.utils.text_tools import estimate_tokens, strip_control_markers
+
+logger = logging.getLogger("history_compactor")
+
+# 每个调用点的历史 token 预算（不含系统提示词）
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "model1": 6000,
+    "model2_analysis": 8000,
+    "model2_report": 24000,
+    "summary": 12000,
+    "trait_report": 24000,
+    # 单次折叠调用的输入（已有摘要 + 新增对话）
+    "fold": 12000,
+}
+
+# 每条消息的格式开销（role、分隔符）
+_MESSAGE_OVERHEAD = 4
+
+# 本轮暂存、尚未写入数据库的消息使用的占位 id（总在摘要边界之后）
+_PENDING_MESSAGE_ID = sys.maxsize
+
+_SUMMARY_HEADER = "# 此前对话的摘要（较早轮次已压缩，用户不可见）：\n"
+
+_FOLD_SYSTEM_PROMPT = (
+    "你是一个对话记录压缩助手。请把已有摘要与新增的对话内容合并为一份新的摘要，"
+    "保留用户表达过的观点、态度、理由、前后变化以及助手提出过的关键问题，"
+    "删去寒暄与重复内容。只输出摘要正文，不超过 600 字。"
+)
+
+
+class SessionHistory:
+    """一次请求内加载的完整历史 + 已持久化的滚动摘要"""
+
+    def __init__(
+        self,
+        session_id: str,
+        messages: Sequence[CachedMessage],
+        summary: Optional[str],
+        summary_until: int,
+    ):
+        self.session_id = session_id
+        self.ids = [mid for mid, _, _ in messages]
+        self.full = [{"role": role, "content": content} for _, role, content in messages]
+        self.tokens = [estimate_tokens(content) + _MESSAGE_OVERHEAD for _, _, content in messages]
+        self.total_tokens = sum(self.tokens)
+        self.summary = summary or ""
+        self.summary_until = summary_until or 0
+
+    def unfolded_start(self) -> int:
+        """第一条尚未折叠进摘要的消息下标"""
+        for i, mid in enumerate(self.ids):
+            if mid > self.summary_until:
+                return i
+        return len(self.ids)
+
+    def window(self, budget: int) -> tuple[List[Dict], bool]:
+        """
+        返回 (发送给 LLM 的历史, 是否有未折叠的消息因预算被丢弃)
+        """
+        if self.total_tokens <= budget:
+            return list(self.full), False
+
+        start = self.unfolded_start()
+        head: List[Dict] = []
+        if self.summary and start > 0:
+            summary_msg = {"role": "user", "content": _SUMMARY_HEADER + self.summary}
+            head = [summary_msg]
+            budget -= estimate_tokens(summary_msg["content"]) + _MESSAGE_OVERHEAD
+
+        # 从最新往前装，至少保留最后一条
+        i = len(self.full)
+        used = 0
+        while i > start and (i == len(self.full) or used + self.tokens[i - 1] <= budget):
+            used += self.tokens[i - 1]
+            i -= 1
+        return head + self.full[i:], i > start
+
+
+class HistoryCompactor:
+
+    def __init__(
+        self,
+        llm,
+        budgets: Optional[Dict[str, int]] = None,
+        keep_recent_turns: int = 6,
+        fold_batch_turns: int = 4,
+    ):
+        self.llm = llm
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.keep_recent = max(keep_recent_turns, 1) * 2
+        self.fold_batch = max(fold_batch_turns, 1) * 2
+
+        self._folding: Dict[str, asyncio.Task] = {}
+
+        # 指标
+        self._windows = 0
+        self._compacted = 0
+        self._tokens_saved = 0
+        self._folds = 0
+        self._fold_failures = 0
+
+    # ------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------
+    async def load(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        pending: Sequence[tuple[str, str]] = (),
+    ) -> SessionHistory:
+        """
+        摘要列与历史版本一次查询取回；版本未变时消息直接取自进程内缓存
+
+        pending 为本轮已暂存、尚未写入的 (role, content)，追加在末尾。
+        """
+        count, last_id = history_version_columns(session_id)
+        session = (await db.execute(
+            select(Session.history_summary, Session.history_summary_until, count, last_id)
+            .where(Session.id == session_id)
+        )).one_or_none()
+        summary, until, messages = None, 0, []
+        if session is not None:
+            summary, until, count, last_id = session
+            messages = await load_cached_messages(db, session_id, (count, last_id))
+        if pending:
+            messages = list(messages) + [
+                (_PENDING_MESSAGE_ID, role, content) for role, content in pending
+            ]
+        return SessionHistory(session_id, messages, summary, until)
+
+    def window(
+        self,
+        history: SessionHistory,
+        site: str,
+        budget: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        按调用点预算取历史窗口；需要时在后台折叠旧轮次（不阻塞本次调用）
+
+        budget 缺省为该调用点的预算；多个 session 共用一次调用时由调用方分摊。
+        """
+        messages, dropped = history.window(budget or self.budgets[site])
+        self._windows += 1
+        if len(messages) != len(history.full) or dropped:
+            self._compacted += 1
+            self._tokens_saved += max(
+                history.total_tokens - sum(estimate_tokens(m["content"]) for m in messages), 0
+            )
+        if dropped or self._should_fold(history):
+            self.schedule_fold(history.session_id)
+        return messages
+
+    async def load_window(self, db: AsyncSession, session_id: str, site: str) -> List[Dict]:
+        """
+        后台调用点（报告、特质）：窗口有缺口时先在当前 session 内同步折叠，再取窗口
+        """
+        history = await self.load(db, session_id)
+        _, dropped = history.window(self.budgets[site])
+        if dropped:
+            await self.fold(session_id, db=db)
+            history = await self.load(db, session_id)
+        return self.window(history, site)
+
+    def _should_fold(self, history: SessionHistory) -> bool:
+        if history.total_tokens <= min(self.budgets.values()):
+            return False
+        unfolded = len(history.ids) - history.unfolded_start()
+        return unfolded >= self.keep_recent + self.fold_batch
+
+    # ------------------------------------------------------
+    # 折叠（增量更新滚动摘要）
+    # ------------------------------------------------------
+    def schedule_fold(self, session_id: str) -> None:
+        """同一 session 同时只有一个折叠任务"""
+        task = self._folding.get(session_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._fold_background(session_id))
+        self._folding[session_id] = task
+        task.add_done_callback(lambda t: self._folding.pop(session_id, None))
+
+    async def _fold_background(self, session_id: str) -> None:
+        try:
+            await self.fold(session_id)
+        except Exception as e:
+            self._fold_failures += 1
+            logger.warning("历史折叠失败 [session=%s]: %s", session_id, e)
+
+    async def fold(self, session_id: str, db: Optional[AsyncSession] = None) -> bool:
+        """
+        把最近 keep_recent 条之前、尚未折叠的消息并入摘要，返回是否有更新。
+
+        积压很多时按 "fold" 预算分批折叠：每批一次 LLM 调用，写入后推进
+        history_summary_until 再折下一批，单次调用的输入不会超出预算；
+        中途失败时已写入的批次保留，下次从断点继续。
+        写入使用条件 UPDATE（摘要边界未变才写），多进程并发折叠时只有一个生效。
+        """
+        if db is None:
+            from backend.db.database import get_sessionmaker
+            async with get_sessionmaker()() as own_db:
+                return await self.fold(session_id, db=own_db)
+
+        history = await self.load(db, session_id)
+        start = history.unfolded_start()
+        end = len(history.full) - self.keep_recent
+        folded = False
+        while start < end:
+            batch_end = self._fold_batch_end(history, start, end)
+            text = await self._fold_text(history.summary, history.full[start:batch_end])
+            if not text:
+                break
+
+            until = history.ids[batch_end - 1]
+            result = await db.execute(
+                update(Session)
+                .where(
+                    Session.id == session_id,
+                    Session.history_summary_until == history.summary_until,
+                )
+                .values(history_summary=text, history_summary_until=until)
+            )
+            await db.commit()
+            if result.rowcount != 1:
+                # 其他进程已推进摘要边界，交给它继续
+                break
+            self._folds += 1
+            folded = True
+            history.summary, history.summary_until = text, until
+            start = batch_end
+        return folded
+
+    def _fold_batch_end(self, history: SessionHistory, start: int, end: int) -> int:
+        """从 start 起装到 fold 预算为止的批次终点（不含），至少一条"""
+        budget = self.budgets["fold"] - estimate_tokens(history.summary) - _MESSAGE_OVERHEAD
+        i, used = start, 0
+        while i < end and (i == start or used + history.tokens[i] <= budget):
+            used += history.tokens[i]
+            i += 1
+        return i
+
+    async def _fold_text(self, summary: str, messages: Sequence[Dict]) -> str:
+        """一次 LLM 调用：已有摘要 + 一批新增对话 -> 新摘要"""
+        new_turns = "\n".join(
+            f"{'用户' if m['role'] == 'user' else '助手'}：{m['content']}"
+            for m in messages
+        )
+        user_prompt = (
+            "【已有摘要】\n" + (summary or "（无）")
+            + "\n\n【新增对话】\n" + new_turns
+        )
+
+        text = ""
+        with llm_priority(PRIORITY_BACKGROUND):
+            async for chunk in self.llm.chat_stream(
+                system_prompt=_FOLD_SYSTEM_PROMPT,
+                user_prompt=user_prompt,
+                history=[],
+            ):
+                text += chunk
+        return strip_control_markers(text).strip()
+
+    def metrics(self) -> dict:
+        return {
+            "windows_total": self._windows,
+            "compacted_total": self._compacted,
+            "estimated_tokens_saved_total": self._tokens_saved,
+            "folds_total": self._folds,
+            "fold_failures_total": self._fold_failures,
+            "folding": len(self._folding),
+        }
@@ -0,0 +1,327 @@
+# backend/services/job_queue.py
+"""
+持久化后台任务队列（进程内 worker 池 + background_jobs 表）
+
+替代裸 asyncio.create_task：
+- 任务先写库再执行，进程重启/发布不会丢任务
+- worker 数量即并发上限
+- 失败按指数退避重试，超过 max_attempts 置为 failed
+- 同一 dedupe_key 只入队一次（幂等）
+- 执行期间定期续租（刷新 locked_at），运行时间超过 lease_seconds 的任务不会被回收重跑
+- 停机时执行中的任务立即归还为 pending（下一个进程马上接手，不必等租约过期）
+- 启动时回收租约过期的 running 任务（进程崩溃遗留），并执行注册的恢复函数
+  （如：已完成但报告未生成的 session 重新入队）
+
+多个 uvicorn worker 共用同一张表，领取任务用条件 UPDATE 保证只被执行一次。
+"""
+
+import asyncio
+import json
+import logging
+import random
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.database import get_sessionmaker
+from backend.db.crud import job as job_crud
+
+logger = logging.getLogger("job_queue")
+
+JobHandler = Callable[[dict], Awaitable[None]]
+RecoveryHook = Callable[[AsyncSession, "JobQueue"], Awaitable[int]]
+
+
+class JobQueue:
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        poll_interval: float = 5.0,
+        lease_seconds: float = 600.0,
+        base_retry_delay: float = 10.0,
+        max_retry_delay: float = 600.0,
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.base_retry_delay = base_retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._recovery_hooks: List[RecoveryHook] = []
+        self._workers: List[asyncio.Task] = []
+        self._maintenance: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        # 指标
+        self._busy = 0
+        self._counters: Dict[str, int] = {
+            "enqueued": 0,
+            "deduplicated": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "failed": 0,
+            "recovered": 0,
+            "released": 0,
+            "lease_renewed": 0,
+            "lease_lost": 0,
+        }
+
+    # ------------------------------------------------------
+    # 注册
+    # ------------------------------------------------------
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """注册任务处理函数；handler 抛异常即视为失败并重试。"""
+        self._handlers[kind] = handler
+
+    def add_recovery_hook(self, hook: RecoveryHook) -> None:
+        """注册启动恢复函数：hook(db, queue) -> 重新入队的数量"""
+        self._recovery_hooks.append(hook)
+
+    # ------------------------------------------------------
+    # 入队
+    # ------------------------------------------------------
+    async def enqueue(
+        self,
+        kind: str,
+        dedupe_key: str,
+        payload: dict,
+        max_attempts: int = 5,
+        db: Optional[AsyncSession] = None,
+        requeue: bool = False,
+        delay: float = 0.0,
+    ) -> bool:
+        """
+        幂等入队，返回是否为新任务。
+
+        传入 db 时只写入不提交（由调用方与自己的事务一起提交）；
+        否则使用独立 session 立即提交。
+
+        requeue=True 用于可合并的任务（同一 key 反复触发）：已完成的任务再执行一次，
+        执行中的任务结束后再执行一次，排队中的任务直接合并。
+        delay 为新任务的合并窗口（秒）。
+        """
+        if db is not None:
+            _, created = await job_crud.enqueue_job(
+                db, kind, dedupe_key, payload, max_attempts, requeue, delay
+            )
+        else:
+            async with get_sessionmaker()() as own_db:
+                _, created = await job_crud.enqueue_job(
+                    own_db, kind, dedupe_key, payload, max_attempts, requeue, delay
+                )
+                await own_db.commit()
+
+        if created:
+            self._counters["enqueued"] += 1
+            self.notify()
+        else:
+            self._counters["deduplicated"] += 1
+        return created
+
+    def notify(self) -> None:
+        """唤醒空闲 worker（入队后调用；跨进程依赖轮询）"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+        await self._recover()
+
+        self._workers = [
+            asyncio.create_task(self._worker_loop(i), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._maintenance = asyncio.create_task(self._maintenance_loop(), name="job-maintenance")
+
+    async def stop(self) -> None:
+        """停止 worker；执行中的任务被取消并归还为 pending，由下一个进程立即重新领取。"""
+        self._stopping = True
+        tasks = list(self._workers)
+        if self._maintenance is not None:
+            tasks.append(self._maintenance)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._maintenance = None
+
+    async def _recover(self) -> None:
+        SessionLocal = get_sessionmaker()
+        async with SessionLocal() as db:
+            released = await job_crud.release_stale_jobs(db, self.lease_seconds)
+            await db.commit()
+        if released:
+            logger.warning("回收 %s 个租约过期的任务", released)
+
+        for hook in self._recovery_hooks:
+            try:
+                async with SessionLocal() as db:
+                    count = await hook(db, self)
+                    await db.commit()
+                self._counters["recovered"] += count or 0
+            except Exception as e:
+                logger.error("任务恢复失败 [%s]: %s", getattr(hook, "__name__", hook), e, exc_info=True)
+
+    async def _maintenance_loop(self) -> None:
+        interval = max(self.lease_seconds / 4, self.poll_interval)
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            try:
+                async with get_sessionmaker()() as db:
+                    released = await job_crud.release_stale_jobs(db, self.lease_seconds)
+                    await db.commit()
+                if released:
+                    logger.warning("回收 %s 个租约过期的任务", released)
+                    self.notify()
+            except Exception as e:
+                logger.error("回收过期任务失败: %s", e, exc_info=True)
+
+    # ------------------------------------------------------
+    # worker
+    # ------------------------------------------------------
+    async def _worker_loop(self, index: int) -> None:
+        while not self._stopping:
+            # 先清再查：查询期间的新入队会让下面的 wait 立即返回
+            self._wakeup.clear()
+            try:
+                job_id = await self._claim_next()
+            except Exception as e:
+                logger.error("领取任务失败 [worker=%s]: %s", index, e, exc_info=True)
+                job_id = None
+
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._busy += 1
+            try:
+                await self._execute(job_id)
+            finally:
+                self._busy -= 1
+
+    async def _claim_next(self) -> Optional[int]:
+        async with get_sessionmaker()() as db:
+            for job_id in await job_crud.get_due_job_ids(db, limit=self.concurrency):
+                if await job_crud.claim_job(db, job_id):
+                    await db.commit()
+                    return job_id
+            await db.rollback()
+        return None
+
+    async def _execute(self, job_id: int) -> None:
+        SessionLocal = get_sessionmaker()
+        async with SessionLocal() as db:
+            job = await job_crud.get_job_by_id(db, job_id)
+        if job is None:
+            return
+
+        handler = self._handlers.get(job.kind)
+        stop_heartbeat = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, stop_heartbeat))
+        try:
+            try:
+                if handler is None:
+                    raise LookupError(f"未注册的任务类型: {job.kind}")
+                await handler(json.loads(job.payload or "{}"))
+            finally:
+                # 等进行中的续租写完再用 job.locked_at 收尾（续租不取消，避免库中已更新而本地未更新）
+                stop_heartbeat.set()
+                await asyncio.shield(heartbeat)
+        except asyncio.CancelledError:
+            # 停机取消：归还任务后再继续取消（归还本身不随 worker 一起被取消）
+            await asyncio.shield(self._release(job))
+            raise
+        except Exception as e:
+            delay = min(
+                self.max_retry_delay,
+                self.base_retry_delay * (2 ** max(job.attempts - 1, 0)),
+            ) * random.uniform(0.8, 1.2)
+            async with SessionLocal() as db:
+                will_retry = await job_crud.mark_failed(
+                    db, job, f"{type(e).__name__}: {e}", delay
+                )
+                await db.commit()
+            if will_retry is None:
+                self._counters["lease_lost"] += 1
+                logger.warning(
+                    "任务租约已失效，放弃记录失败 [job=%s, key=%s]: %s", job.id, job.dedupe_key, e,
+                )
+            elif will_retry:
+                self._counters["retried"] += 1
+                logger.warning(
+                    "任务失败，%.0fs 后重试 [job=%s, key=%s, attempt=%s]: %s",
+                    delay, job.id, job.dedupe_key, job.attempts, e,
+                )
+            else:
+                self._counters["failed"] += 1
+                logger.error(
+                    "任务最终失败 [job=%s, key=%s]: %s", job.id, job.dedupe_key, e,
+                    exc_info=True,
+                )
+            return
+
+        async with SessionLocal() as db:
+            done = await job_crud.mark_done(db, job.id, job.locked_at)
+            await db.commit()
+        if not done:
+            # 执行超过租约、任务已被回收并可能由其他 worker 重新执行：不覆盖其状态
+            self._counters["lease_lost"] += 1
+            logger.warning("任务租约已失效，放弃标记完成 [job=%s, key=%s]", job.id, job.dedupe_key)
+            return
+        self._counters["succeeded"] += 1
+
+    async def _heartbeat(self, job, stop: asyncio.Event) -> None:
+        """每 lease_seconds / 3 续租一次，并把新的 locked_at 写回 job，供收尾时校验租约"""
+        interval = self.lease_seconds / 3
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                async with get_sessionmaker()() as db:
+                    locked_at = await job_crud.renew_lease(db, job.id, job.locked_at)
+                    await db.commit()
+            except Exception as e:
+                # 续租失败不影响执行；连续失败超过租约时任务会被回收
+                logger.warning("任务续租失败 [job=%s]: %s", job.id, e)
+                continue
+            if locked_at is None:
+                # 租约已被回收（如续租长时间失败）：收尾时按 lease_lost 处理
+                logger.warning("任务租约已失效，停止续租 [job=%s, key=%s]", job.id, job.dedupe_key)
+                return
+            job.locked_at = locked_at
+            self._counters["lease_renewed"] += 1
+
+    async def _release(self, job) -> None:
+        try:
+            async with get_sessionmaker()() as db:
+                released = await job_crud.release_job(db, job.id, job.locked_at)
+                await db.commit()
+            if released:
+                self._counters["released"] += 1
+                logger.info("停机归还任务 [job=%s, key=%s]", job.id, job.dedupe_key)
+        except Exception as e:
+            logger.error("归还任务失败，租约过期后回收 [job=%s]: %s", job.id, e)
+
+    def metrics(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "busy_workers": self._busy,
+            "running": bool(self._workers),
+            **self._counters,
+        }
@@ -7,12 +7,21 @@ model2：负责从对话历史中分析用户的"观念"，并在每轮对话前
 - llm 由 ChatService 注入（构造时或 attach_llm）
 - 长期特质信息 trait_summary / trait_profile 由 ChatService 统一维护，
   调用时以参数形式传入本服务，不在本类中长期存储。
+- 请求按 模板 → 话题 → 用户特质 → 历史 messages → 本轮指令 排列，
+  以提高服务商前缀缓存命中（见 utils/prompt_layout.py）；历史以用户发言结尾时
+  指令并入该条，不出现连续两条 user 消息。
 """
 
 import json
 from typing import List, Dict, Optional
 
 from backend.utils.prompt_loader import load_prompt
+from backend.utils.prompt_layout import (
+    layered_system_prompt,
+    topic_section,
+    trait_section,
+    messages_with_instruction,
+)
 from backend.utils.text_tools import strip_control_markers
 
 
@@ -61,41 +70,30 @@ class Model2Service:
         else:
             prompt_path = "model2/opinion_analysis_mode2.txt"
 
-        system_prompt = load_prompt(prompt_path)
-
-        # 若为 mode1，注入话题元数据
-        if mode == 1 and topic_title:
-            system_prompt += (
-                "\n\n# 本次对话的目标话题与观念标签：\n"
-                f"- 话题：{topic_title}\n"
-            )
-            if topic_tags:
-                tags_str = "、".join(topic_tags)
-                system_prompt += f"- 标签：{tags_str}\n"
-            system_prompt += "请在分析时特别聚焦于该话题维度。"
-
-        # 注入长期特质信息
-        if trait_summary:
-            system_prompt += (
-                "\n\n# 用户长期特质总结（一句话）：\n"
-                f"{trait_summary}"
-            )
-
-        if trait_profile:
-            system_prompt += (
-                "\n\n# 用户长期特质画像（供参考，不必逐条引用）：\n"
-                f"{trait_profile}"
-            )
+        # 模板 → 话题（仅 mode1）→ 用户特质：越静态越靠前
+        system_prompt = layered_system_prompt(
+            load_prompt(prompt_path),
+            topic_section(
+                "# 本次对话的目标话题与观念标签：",
+                topic_title if mode == 1 else None,
+                topic_tags,
+                "请在分析时特别聚焦于该话题维度。",
+            ),
+            trait_section(
+                "# 用户长期特质总结（一句话）：",
+                trait_summary,
+                "# 用户长期特质画像（供参考，不必逐条引用）：",
+                trait_profile,
+            ),
+        )
 
         # ================================
-        # 2. 构造 user_prompt
+        # 2. 历史以 messages 传入，本轮指令并入最后一条用户发言
         # ================================
-        formatted_history = self._format_history(session_history)
-
-        user_prompt = (
-            "以下是当前对话的历史，请根据系统提示中的要求进行分析。\n\n"
-            "【对话历史】\n"
-            f"{formatted_history}\n\n"
+        history, user_prompt = messages_with_instruction(
+            session_history,
+            "以上是当前对话的历史（user 为用户发言，assistant 为 M1 的回复），"
+            "请根据系统提示中的要求进行分析。",
         )
 
         # ================================
@@ -105,7 +103,7 @@ class Model2Service:
         async for chunk in self.llm.chat_stream(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
-            history=[],
+            history=history,
         ):
             advice_text += chunk
 
@@ -162,40 +160,29 @@ class Model2Service:
         else:
             prompt_path = "model2/final_report_mode2.txt"
 
-        system_prompt = load_prompt(prompt_path)
-
-        if mode == 1 and topic_title:
-            system_prompt += (
-                "\n\n# 本次观念报告对应的话题信息：\n"
-                f"- 话题：{topic_title}\n"
-            )
-            if topic_tags:
-                tags_str = "、".join(topic_tags)
-                system_prompt += f"- 标签：{tags_str}\n"
-            system_prompt += "请围绕该话题维度，对用户在本次对话中的观点进行系统性分析。"
-
-        if trait_summary:
-            system_prompt += (
-                "\n\n# 已有的用户特质总结（一句话）：\n"
-                f"{trait_summary}"
-            )
-
-        if trait_profile:
-            system_prompt += (
-                "\n\n# 已有的用户特质画像（此前会话的整体分析）：\n"
-                f"{trait_profile}"
-            )
+        system_prompt = layered_system_prompt(
+            load_prompt(prompt_path),
+            topic_section(
+                "# 本次观念报告对应的话题信息：",
+                topic_title if mode == 1 else None,
+                topic_tags,
+                "请围绕该话题维度，对用户在本次对话中的观点进行系统性分析。",
+            ),
+            trait_section(
+                "# 已有的用户特质总结（一句话）：",
+                trait_summary,
+                "# 已有的用户特质画像（此前会话的整体分析）：",
+                trait_profile,
+            ),
+        )
 
         # ================================
-        # 2. 格式化完整历史
+        # 2. 完整历史以 messages 传入（与每轮分析共享前缀）
         # ================================
-        formatted_history = self._format_history(full_history)
-
-        user_prompt = (
-            "以下是本次完整对话的历史，请根据系统提示词的要求，"
-            "生成一份面向用户的观念分析报告。\n\n"
-            "【本次对话完整历史】\n"
-            f"{formatted_history}"
+        history, user_prompt = messages_with_instruction(
+            full_history,
+            "以上是本次完整对话的历史（user 为用户发言，assistant 为 M1 的回复），"
+            "请根据系统提示词的要求，生成一份面向用户的观念分析报告。",
         )
 
         # ================================
@@ -205,29 +192,9 @@ class Model2Service:
         async for chunk in self.llm.chat_stream(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
-            history=[],
+            history=history,
         ):
             report_text += chunk
 
         report_text = strip_control_markers(report_text).strip()
         return report_text
-
-    # =====================================
-    # 工具函数
-    # =====================================
-    def _format_history(self, history: List[Dict]) -> str:
-        """将历史转换为易读的多轮对话文本。"""
-        lines = []
-        for turn in history:
-            role = turn.get("role", "")
-            content = turn.get("content", "")
-
-            if role == "user":
-                prefix = "用户："
-            elif role == "assistant":
-                prefix = "助手："
-            else:
-                prefix = f"{role}："
-
-            lines.append(f"{prefix}{content}")
-        return "\n".join(lines)
\ No newline at end of file
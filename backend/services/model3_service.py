@@ -16,32 +16,21 @@ class Model3Service:
         """让 ChatService 把 LLMClient 注入 model3。"""
         self.llm = llm
 
-    async def update_traits(self, all_sessions: dict) -> dict:
+    async def generate_full_report(self, all_sessions: dict) -> str:
         """
-        all_sessions: {session_id: [history_list]}
-        返回：
-        {
-            "summary": "...",
-            "full_report": "..."
-        }
+        根据会话历史从头生成完整特质报告（尚无报告时由 merge_full_report 调用）。
         """
-
         if self.llm is None:
-            return {"summary": "", "full_report": ""}
+            return ""
 
         # ===========================
-        # 1. 加载提示词
+        # 1. 加载提示词 + 格式化多场会话历史
         # ===========================
         system_prompt_full = load_prompt("model3/trait_full_report.txt")
-        system_prompt_summary = load_prompt("model3/trait_summary.txt")
-
-        # ===========================
-        # 2. 格式化多场会话历史
-        # ===========================
         formatted = self._format_all_sessions(all_sessions)
 
         # ===========================
-        # 3. 生成完整特质报告（full report）
+        # 2. 生成完整特质报告（full report）
         # ===========================
         user_prompt_full = (
             "以下是用户所有会话的完整历史，请根据提示词对用户的长期特质进行分析：\n\n"
@@ -58,10 +47,46 @@ class Model3Service:
 
         full_report = strip_control_markers(full_report).strip()
         self.trait_profile = full_report  # 可缓存
+        return full_report
 
-        # ===========================
-        # 4. 生成一句话特质总结（summary）
-        # ===========================
+    async def merge_full_report(self, existing_report: str, new_sessions: dict) -> str:
+        """
+        增量更新：把新完成的 session 合并进已有完整特质报告。
+
+        输入只有「已有报告 + 新 session」，提示词大小与历史会话总数无关；
+        尚无报告时退化为 generate_full_report。
+        """
+        if self.llm is None:
+            return ""
+        if not existing_report:
+            return await self.generate_full_report(new_sessions)
+
+        system_prompt_merge = load_prompt("model3/trait_merge.txt")
+        user_prompt_merge = (
+            "【已有的长期特质报告】\n"
+            + existing_report
+            + "\n\n【新完成的对话】\n"
+            + self._format_all_sessions(new_sessions)
+        )
+
+        full_report = ""
+        async for chunk in self.llm.chat_stream(
+            system_prompt=system_prompt_merge,
+            user_prompt=user_prompt_merge,
+            history=[]
+        ):
+            full_report += chunk
+
+        full_report = strip_control_markers(full_report).strip()
+        self.trait_profile = full_report  # 可缓存
+        return full_report
+
+    async def generate_summary(self, full_report: str) -> str:
+        """根据完整特质报告生成一句话特质总结。"""
+        if self.llm is None:
+            return ""
+
+        system_prompt_summary = load_prompt("model3/trait_summary.txt")
         user_prompt_summary = (
             "请根据以下完整特质报告，生成一句话概括：\n\n"
             + full_report
@@ -76,11 +101,7 @@ class Model3Service:
             summary += chunk
 
         summary = strip_control_markers(summary).strip()
-
-        return {
-            "summary": summary,
-            "full_report": full_report
-        }
+        return summary
 
     # ==========================================================
     # 多场会话文本格式化
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.crud import notification as notification_crud
 from backend.db.crud import topic_author as author_crud
+from backend.services.event_bus import get_event_bus
 
 
 async def notify_topic_authors(
@@ -27,10 +28,12 @@ async def notify_topic_authors(
         exclude_user_id:    排除的用户 ID（用户自己的操作不通知自己）
     """
     authors = await author_crud.get_authors_by_topic(db, topic_id)
+    notified = []
 
     for author in authors:
         if exclude_user_id and author.user_id == exclude_user_id:
             continue
+        notified.append(author.user_id)
         await notification_crud.create_notification(
             db,
             user_id=author.user_id,
@@ -42,3 +45,11 @@ async def notify_topic_authors(
 
     # 统一提交（所有通知一次事务）
     await db.commit()
+
+    # 提交后再推送，前端收到即可拉取到新通知
+    bus = get_event_bus()
+    for user_id in notified:
+        await bus.publish(
+            user_id,
+            {"type": "notification", "module": "topic", "ref_id": topic_id},
+        )
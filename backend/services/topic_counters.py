@@ -0,0 +1,166 @@
+# backend/services/topic_counters.py
+"""
+话题计数写回缓冲（write-behind）
+
+热门话题的计数（如 usage_count）每次都单独 UPDATE 同一行，行锁竞争严重。
+配置为写回的字段只在内存中按话题累加增量，定期合并为每个话题一条
+UPDATE topics SET x = x + :n 批量写入；其余字段直接执行原子 UPDATE。
+
+- 写回字段的读数 = 库中值 + 本进程未落库的增量（多 worker 时为近似值）
+- 停止时（main.lifespan）会把剩余增量全部写入；进程被强杀会丢失最多一个间隔的增量
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import Topic
+from backend.db.crud import topic as topic_crud
+
+logger = logging.getLogger("topic_counters")
+
+COUNTER_FIELDS = ("likes_count", "usage_count", "electrolyte_received")
+
+
+class TopicCounterBuffer:
+
+    def __init__(
+        self,
+        write_behind: Iterable[str] = ("usage_count",),
+        flush_interval: float = 2.0,
+    ):
+        unknown = set(write_behind) - set(COUNTER_FIELDS)
+        if unknown:
+            raise ValueError(f"未知的话题计数字段: {', '.join(sorted(unknown))}")
+        self.write_behind = set(write_behind)
+        self.flush_interval = flush_interval
+
+        # topic_id -> 字段 -> 未落库增量
+        self._pending: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # 指标
+        self._buffered = 0
+        self._flushes = 0
+        self._rows_written = 0
+        self._flush_failures = 0
+
+    # ------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------
+    async def start(self) -> None:
+        if self._task is None and self.write_behind:
+            self._task = asyncio.create_task(self._flush_loop(), name="topic-counter-flush")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # 持锁取消：不会打断进行中的写入
+            async with self._lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("话题计数写回失败: %s", e)
+
+    # ------------------------------------------------------
+    # 计数
+    # ------------------------------------------------------
+    async def increment(
+        self,
+        db: AsyncSession,
+        topic_id: int,
+        field: str,
+        delta: float = 1,
+        read_back: bool = False,
+    ) -> Optional[float]:
+        """
+        计数 +delta
+
+        - 写回字段：只累加到内存；read_back 时返回库中值 + 未落库增量（不低于 0）
+        - 其余字段：直接原子 UPDATE 并返回新值
+        话题不存在时返回 None。
+        """
+        if field not in self.write_behind:
+            row = await topic_crud.increment_counters(db, topic_id, **{field: delta})
+            return row[0] if row else None
+
+        self._pending[topic_id][field] += delta
+        self._buffered += 1
+        if not read_back:
+            return None
+
+        stored = (await db.execute(
+            select(getattr(Topic, field)).where(Topic.id == topic_id)
+        )).scalar_one_or_none()
+        if stored is None:
+            return None
+        return max(stored + self.pending(topic_id, field), 0)
+
+    def pending(self, topic_id: int, field: str) -> float:
+        fields = self._pending.get(topic_id)
+        return fields.get(field, 0) if fields else 0
+
+    async def flush(self) -> int:
+        """把累计增量按话题合并写入（一个事务），返回写入的话题数"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(float))
+
+            try:
+                async with get_sessionmaker()() as db:
+                    for topic_id, deltas in pending.items():
+                        deltas = {f: d for f, d in deltas.items() if d}
+                        if deltas:
+                            await topic_crud.increment_counters(
+                                db, topic_id, commit=False, **deltas
+                            )
+                    await db.commit()
+            except BaseException:
+                # 写入失败（含停止时被取消）：增量并回缓冲，下次再写
+                self._flush_failures += 1
+                for topic_id, deltas in pending.items():
+                    for field, delta in deltas.items():
+                        self._pending[topic_id][field] += delta
+                raise
+
+            self._flushes += 1
+            self._rows_written += len(pending)
+            return len(pending)
+
+    def metrics(self) -> dict:
+        return {
+            "write_behind": sorted(self.write_behind),
+            "pending_topics": len(self._pending),
+            "buffered_total": self._buffered,
+            "flushes_total": self._flushes,
+            "rows_written_total": self._rows_written,
+            "flush_failures_total": self._flush_failures,
+        }
+
+
+_counters = TopicCounterBuffer()
+
+
+def configure_topic_counters(**options) -> TopicCounterBuffer:
+    """按配置替换进程级计数缓冲（main 启动时调用）"""
+    global _counters
+    _counters = TopicCounterBuffer(**options)
+    return _counters
+
+
+def get_topic_counters() -> TopicCounterBuffer:
+    return _counters
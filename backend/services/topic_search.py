@@ -0,0 +1,413 @@
+# backend/services/topic_search.py
+"""
+话题全文检索（进程内倒排索引）
+
+原来的搜索是 title LIKE '%q%'：全表扫描、只看标题、另跑一次 COUNT。
+这里维护一个 token → {topic_id: 权重} 的倒排索引：
+
+- 分词：中文按字切 unigram + bigram，英文/数字按词（并索引词前缀，兼容输入一半的词）；
+  建索引与查询都先做全角转半角 + 大小写折叠（与敏感词匹配同一规则）
+- 字段：标题、内容（描述）、提示词摘要（前 PROMPT_SUMMARY_CHARS 字）、标签名，按字段加权
+- 排序：BM25 风格相关度 × 查询覆盖率，再按点赞数/使用次数做对数加成
+- 更新：topic_service 在创建/编辑/审核/下架/上架/删除提交后增量更新本进程索引；
+  后台按 (话题数, max(updated_at)) 签名定期对账，同步其他 worker 与后台管理的修改
+
+计数（likes_count / usage_count）不进索引：排序加成使用取回话题时的实时值。
+"""
+
+import asyncio
+import logging
+import math
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import Topic, TopicTag, Tag
+from backend.utils.word_matcher import fold_text
+
+logger = logging.getLogger("topic_search")
+
+# 字段权重
+FIELD_WEIGHTS: Dict[str, float] = {
+    "title": 3.0,
+    "tags": 2.0,
+    "content": 1.0,
+    "prompt": 0.5,
+}
+
+# 提示词只索引开头一段（正文多为对 model1 的指令，整段索引只会引入噪声）
+PROMPT_SUMMARY_CHARS = 200
+
+# 英文词前缀最短长度
+_MIN_PREFIX = 2
+
+# 词频饱和参数（同一 token 重复出现的收益递减）
+_TF_SATURATION = 1.2
+
+_TOKEN_RE = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]+|[a-z0-9]+")
+
+
+def _is_cjk(run: str) -> bool:
+    return run[0] >= "\u3400"
+
+
+def tokenize(text: Optional[str], prefixes: bool = False) -> List[str]:
+    """
+    中文感知分词
+
+    - 中文连续段：每个字（unigram）+ 相邻两字（bigram）
+    - 英文/数字：整词；prefixes=True 时追加长度 ≥ 2 的词前缀（建索引用）
+    """
+    if not text:
+        return []
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall(fold_text(text)):
+        if _is_cjk(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+            if prefixes:
+                tokens.extend(run[:n] for n in range(_MIN_PREFIX, len(run)))
+    return tokens
+
+
+def query_tokens(text: Optional[str]) -> List[str]:
+    """
+    查询分词（去重、保序）
+
+    中文段长度 ≥ 2 时只用 bigram（单字太泛），单字查询才用 unigram；英文按整词（匹配词前缀）。
+    结果为空（只有假名、谚文、符号等不入索引的字符）时，调用方应退回数据库匹配。
+    """
+    seen: Dict[str, None] = {}
+    for run in _TOKEN_RE.findall(fold_text(text or "")):
+        if _is_cjk(run) and len(run) > 1:
+            for i in range(len(run) - 1):
+                seen.setdefault(run[i:i + 2], None)
+        else:
+            seen.setdefault(run, None)
+    return list(seen)
+
+
+class _Doc:
+    __slots__ = ("status", "is_active", "updated_at", "tokens")
+
+    def __init__(self, status: str, is_active: bool, updated_at: Optional[datetime], tokens: Set[str]):
+        self.status = status
+        self.is_active = is_active
+        self.updated_at = updated_at
+        self.tokens = tokens
+
+    @property
+    def searchable(self) -> bool:
+        return self.status == "approved" and bool(self.is_active)
+
+
+class TopicSearchIndex:
+
+    def __init__(
+        self,
+        refresh_interval: float = 30.0,
+        popularity_weight: float = 0.15,
+        min_coverage: float = 0.6,
+        max_candidates: int = 200,
+        max_filter_ids: int = 1000,
+    ):
+        self.refresh_interval = refresh_interval
+        self.popularity_weight = popularity_weight
+        self.min_coverage = min_coverage
+        self.max_candidates = max_candidates
+        # 列表筛选传给 IN (...) 的 id 上限（单字查询可能命中几乎所有话题）
+        self.max_filter_ids = max_filter_ids
+
+        # token -> topic_id -> 字段加权、饱和后的词频
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._docs: Dict[int, _Doc] = {}
+        self._signature: Optional[Tuple[int, Optional[datetime]]] = None
+        self._built = False
+        self._build_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # 指标
+        self._queries = 0
+        self._truncated = 0
+        self._incremental = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+
+    # ------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------
+    async def start(self) -> None:
+        if self._task is None:
+            try:
+                await self.ensure_built()
+            except Exception as e:
+                # 建索引失败不阻止启动，首次查询时重试
+                logger.warning("话题索引构建失败: %s", e)
+            if self.refresh_interval > 0:
+                self._task = asyncio.create_task(self._refresh_loop(), name="topic-search-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self._refresh_failures += 1
+                logger.warning("话题索引对账失败: %s", e)
+
+    # ------------------------------------------------------
+    # 建索引 / 对账
+    # ------------------------------------------------------
+    async def ensure_built(self, db: Optional[AsyncSession] = None) -> None:
+        if self._built:
+            return
+        async with self._build_lock:
+            if not self._built:
+                await self.refresh(db)
+                self._built = True
+
+    async def refresh(self, db: Optional[AsyncSession] = None) -> int:
+        """
+        与数据库对账：签名未变时只花一次聚合查询；
+        变化时比对每个话题的 updated_at，重建变更/新增的文档并移除已删除的。
+        返回重建 + 移除的话题数。
+        """
+        if db is None:
+            async with get_sessionmaker()() as own_db:
+                return await self.refresh(own_db)
+
+        signature = tuple((await db.execute(
+            select(func.count(Topic.id), func.max(Topic.updated_at))
+        )).one())
+        if signature == self._signature:
+            return 0
+
+        rows = (await db.execute(select(Topic.id, Topic.updated_at))).all()
+        current = dict(rows)
+        removed = [tid for tid in self._docs if tid not in current]
+        for tid in removed:
+            self.remove(tid)
+        changed = [
+            tid for tid, updated_at in current.items()
+            if tid not in self._docs or self._docs[tid].updated_at != updated_at
+        ]
+        for start in range(0, len(changed), 500):
+            await self._load(db, changed[start:start + 500])
+
+        self._signature = signature
+        self._refreshes += 1
+        return len(changed) + len(removed)
+
+    async def _load(self, db: AsyncSession, topic_ids: Sequence[int]) -> None:
+        """批量取回话题与标签名并（重新）写入索引"""
+        if not topic_ids:
+            return
+        topics = (await db.execute(
+            select(
+                Topic.id, Topic.title, Topic.content, Topic.prompt,
+                Topic.status, Topic.is_active, Topic.updated_at,
+            ).where(Topic.id.in_(topic_ids))
+        )).all()
+        tag_rows = (await db.execute(
+            select(TopicTag.topic_id, Tag.name)
+            .join(Tag, Tag.id == TopicTag.tag_id)
+            .where(TopicTag.topic_id.in_(topic_ids))
+        )).all()
+        tags: Dict[int, List[str]] = defaultdict(list)
+        for tid, name in tag_rows:
+            tags[tid].append(name)
+
+        found = set()
+        for tid, title, content, prompt, status, is_active, updated_at in topics:
+            found.add(tid)
+            self._put(tid, status, is_active, updated_at, {
+                "title": title,
+                "tags": " ".join(tags.get(tid, ())),
+                "content": content,
+                "prompt": (prompt or "")[:PROMPT_SUMMARY_CHARS],
+            })
+        for tid in set(topic_ids) - found:
+            self.remove(tid)
+
+    def _put(
+        self,
+        topic_id: int,
+        status: str,
+        is_active: bool,
+        updated_at: Optional[datetime],
+        fields: Dict[str, Optional[str]],
+    ) -> None:
+        self.remove(topic_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for field, text in fields.items():
+            counts: Dict[str, int] = defaultdict(int)
+            for token in tokenize(text, prefixes=True):
+                counts[token] += 1
+            for token, tf in counts.items():
+                weights[token] += FIELD_WEIGHTS[field] * tf / (tf + _TF_SATURATION)
+        for token, weight in weights.items():
+            self._postings[token][topic_id] = weight
+        self._docs[topic_id] = _Doc(status, is_active, updated_at, set(weights))
+
+    def remove(self, topic_id: int) -> None:
+        doc = self._docs.pop(topic_id, None)
+        if doc is None:
+            return
+        for token in doc.tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(topic_id, None)
+                if not posting:
+                    del self._postings[token]
+
+    # ------------------------------------------------------
+    # 增量更新（topic_service 在提交后调用）
+    # ------------------------------------------------------
+    async def index_topic(self, db: AsyncSession, topic_id: int) -> None:
+        """重新索引单个话题（已删除则移除）；失败只记录日志，由后台对账兜底"""
+        if not self._built:
+            return
+        try:
+            await self._load(db, [topic_id])
+            self._incremental += 1
+        except Exception as e:
+            logger.warning("话题索引更新失败 [topic=%s]: %s", topic_id, e)
+
+    def remove_topic(self, topic_id: int) -> None:
+        if self._built:
+            self.remove(topic_id)
+            self._incremental += 1
+
+    # ------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------
+    def rank(
+        self,
+        query: str,
+        searchable_only: bool = True,
+        require_all: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """
+        返回 [(topic_id, 相关度)]，按相关度降序
+
+        require_all=True 时要求命中全部查询 token（筛选语义）；
+        否则命中比例不低于 min_coverage 即可，相关度再乘以覆盖率。
+        """
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        total = len(self._docs) or 1
+        needed = len(tokens) if require_all else max(1, math.ceil(len(tokens) * self.min_coverage))
+
+        # 按倒排表从短到长处理：达到覆盖要求的文档必然出现在最短的
+        # len(tokens) - needed + 1 个倒排表之一里，其余（常见）token 只做逐个探测
+        postings = sorted(
+            (self._postings.get(token) or {} for token in tokens), key=len
+        )
+        drivers = len(tokens) - needed + 1
+        candidates: Set[int] = set()
+        for posting in postings[:drivers]:
+            candidates.update(posting)
+
+        ranked = []
+        idfs = [
+            math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for posting in postings
+        ]
+        for tid in candidates:
+            if searchable_only and not self._docs[tid].searchable:
+                continue
+            score, hits = 0.0, 0
+            for posting, idf in zip(postings, idfs):
+                weight = posting.get(tid)
+                if weight is not None:
+                    score += idf * weight
+                    hits += 1
+            if hits < needed:
+                continue
+            ranked.append((tid, score * hits / len(tokens)))
+        ranked.sort(key=lambda item: (-item[1], -item[0]))
+        return ranked
+
+    async def match_ids(self, db: AsyncSession, query: str) -> List[int]:
+        """
+        列表筛选用：命中全部查询 token 的话题 id（不限状态，由调用方再按条件筛选）
+
+        命中过多时只保留相关度最高的 max_filter_ids 个。
+        """
+        await self.ensure_built(db)
+        self._queries += 1
+        ranked = self.rank(query, searchable_only=False, require_all=True)
+        if len(ranked) > self.max_filter_ids:
+            self._truncated += 1
+            ranked = ranked[:self.max_filter_ids]
+        return [tid for tid, _ in ranked]
+
+    async def search(self, db: AsyncSession, query: str, limit: int = 10) -> List[Topic]:
+        """
+        搜索已审核且启用的话题：相关度 × (1 + w·ln(1 + 点赞 + 使用次数/2))
+
+        先按相关度取前 max_candidates 个候选，一次查询取回后用实时计数重排。
+        """
+        await self.ensure_built(db)
+        self._queries += 1
+        ranked = self.rank(query)[:max(self.max_candidates, limit)]
+        if not ranked:
+            return []
+
+        relevance = dict(ranked)
+        topics = (await db.execute(
+            select(Topic).where(
+                Topic.id.in_(relevance),
+                Topic.status == "approved",
+                Topic.is_active == True,
+            )
+        )).scalars().all()
+
+        def blended(topic: Topic) -> float:
+            popularity = (topic.likes_count or 0) + (topic.usage_count or 0) / 2
+            return relevance[topic.id] * (1 + self.popularity_weight * math.log1p(popularity))
+
+        return sorted(topics, key=lambda t: (-blended(t), -t.id))[:limit]
+
+    def metrics(self) -> dict:
+        return {
+            "built": self._built,
+            "documents": len(self._docs),
+            "tokens": len(self._postings),
+            "queries_total": self._queries,
+            "filter_truncated_total": self._truncated,
+            "incremental_updates_total": self._incremental,
+            "refreshes_total": self._refreshes,
+            "refresh_failures_total": self._refresh_failures,
+        }
+
+
+# ============================================================
+# 进程级单例
+# ============================================================
+_index = TopicSearchIndex()
+
+
+def configure_topic_search(**options) -> TopicSearchIndex:
+    """按配置替换进程级话题索引（main 启动时调用）"""
+    global _index
+    _index = TopicSearchIndex(**options)
+    return _index
+
+
+def get_topic_search() -> TopicSearchIndex:
+    return _index
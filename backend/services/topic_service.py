@@ -10,6 +10,7 @@
 - 话题下架/删除
 """
 
+from datetime import datetime
 from typing import List, Optional, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
@@ -23,6 +24,8 @@ from backend.db.crud import user as user_crud
 from backend.db.models import Topic, TopicTag, User, Tag
 from backend.utils.sensitive_words import check_sensitive_word
 from backend.services import notification_service
+from backend.services.topic_counters import get_topic_counters
+from backend.services.topic_search import get_topic_search
 
 
 # ============================================================
@@ -138,6 +141,7 @@ async def create_topic(
         db.add(topic_tag)
 
     await db.commit()
+    await get_topic_search().index_topic(db, topic.id)
 
     return {
         "success": True,
@@ -230,8 +234,12 @@ async def update_topic(
         await db.execute(delete(TopicTag).where(TopicTag.topic_id == topic_id))
         for tag_id in tag_ids:
             db.add(TopicTag(topic_id=topic_id, tag_id=tag_id))
+        # 只改标签时也刷新 updated_at，其他 worker 的搜索索引据此对账
+        topic.updated_at = datetime.utcnow()
         await db.commit()
 
+    await get_topic_search().index_topic(db, topic_id)
+
     return {
         "success": True,
         "message": "话题已更新，等待重新审核",
@@ -282,6 +290,7 @@ async def review_topic(
         notification_type=ntype,
         message=nlabel,
     )
+    await get_topic_search().index_topic(db, topic_id)
 
     return {
         "success": True,
@@ -396,15 +405,14 @@ async def toggle_like(
             "likes_count": 0
         }
 
-    if liked:
-        topic = await topic_crud.increment_likes(db, topic_id)
-    else:
-        topic = await topic_crud.decrement_likes(db, topic_id)
+    likes_count = await get_topic_counters().increment(
+        db, topic_id, "likes_count", 1 if liked else -1, read_back=True
+    )
 
     return {
         "success": True,
         "liked": liked,
-        "likes_count": topic.likes_count if topic else 0
+        "likes_count": int(likes_count or 0)
     }
 
 
@@ -428,9 +436,11 @@ async def donate_electrolyte(
             "distribution": []
         }
 
-    # 先获取话题信息，供流水记录使用
-    topic_obj = await topic_crud.get_topic_by_id(db, topic_id, include_inactive=True)
-    if topic_obj is None:
+    # 先获取话题标题，供流水记录使用
+    topic_title = (await db.execute(
+        select(Topic.title).where(Topic.id == topic_id)
+    )).scalar_one_or_none()
+    if topic_title is None:
         return {
             "success": False,
             "message": "话题不存在",
@@ -439,23 +449,33 @@ async def donate_electrolyte(
             "distribution": []
         }
 
-    topic_title = topic_obj.title or ""
+    topic_title = topic_title or ""
 
     # 检查是否为自我投喂
     authors = await author_crud.get_authors_by_topic(db, topic_id)
     author_ids = [a.user_id for a in authors]
     is_self_donation = (user_id in author_ids)
 
-    # 检查并扣除用户电解液（带 ref_id/ref_name）
+    # 扣款 + 按权重分配给所有作者 + 流水 + 话题收入：一个事务内完成
     donation_reason_out = "self_donation_out" if is_self_donation else "topic_donation_out"
-    success, msg, user_balance = await electrolyte_crud.deduct_electrolyte(
+    donation_reason_in = "self_donation_in" if is_self_donation else "topic_donation_in"
+    credits = [
+        (author.user_id, amount * (author.electrolyte_share / 100.0))
+        for author in authors
+    ]
+
+    success, msg, balances = await electrolyte_crud.transfer_electrolyte(
         db,
         user_id,
         amount,
-        reason=donation_reason_out,
+        credits,
+        out_reason=donation_reason_out,
+        in_reason=donation_reason_in,
         ref_id=topic_id,
         ref_name=topic_title,
+        commit=False,
     )
+    user_balance = balances.get(user_id, 0.0)
 
     if not success:
         return {
@@ -468,48 +488,33 @@ async def donate_electrolyte(
 
     # 非自我投喂才计入话题收入
     if not is_self_donation:
-        topic = await topic_crud.add_electrolyte(db, topic_id, amount)
+        row = await topic_crud.increment_counters(
+            db, topic_id, commit=False, electrolyte_received=amount
+        )
+        electrolyte_received = row[0] if row else 0.0
     else:
-        result = await db.execute(select(Topic).where(Topic.id == topic_id))
-        topic = result.scalar_one_or_none()
-
-    if topic is None:
-        return {
-            "success": False,
-            "message": "话题不存在",
-            "electrolyte_received": 0.0,
-            "user_balance": user_balance,
-            "distribution": []
-        }
-
-    # 按权重分配给所有作者
-    distribution = []
-    donation_reason_in = "self_donation_in" if is_self_donation else "topic_donation_in"
-
-    for author in authors:
-        author_amount = amount * (author.electrolyte_share / 100.0)
-
-        await electrolyte_crud.add_electrolyte(
-            db,
-            author.user_id,
-            author_amount,
-            reason=donation_reason_in,
-            ref_id=topic_id,
-            ref_name=topic_title,
+        result = await db.execute(
+            select(Topic.electrolyte_received).where(Topic.id == topic_id)
         )
+        electrolyte_received = result.scalar_one_or_none() or 0.0
 
-        user = await user_crud.get_user_by_id(db, author.user_id)
+    await db.commit()
 
-        distribution.append({
-            "user_id": author.user_id,
-            "nickname": user.nickname if user else "未知",
+    # 作者昵称：一次 IN 查询
+    nicknames = await user_crud.get_nicknames(db, author_ids)
+    distribution = [
+        {
+            "user_id": uid,
+            "nickname": nicknames.get(uid) or "未知",
             "amount": author_amount
-        })
+        }
+        for uid, author_amount in credits
+    ]
 
     return {
         "success": True,
         "message": f"成功投喂 {amount} 电解液",
-        "electrolyte_received": topic.electrolyte_received,
+        "electrolyte_received": electrolyte_received,
         "user_balance": user_balance,
         "self_donation": is_self_donation,
         "distribution": distribution
@@ -568,6 +573,7 @@ async def deactivate_topic(
     else:
         # 主要作者自行下架，无需通知，手动 commit
         await db.commit()
+    await get_topic_search().index_topic(db, topic_id)
 
     return {
         "success": True,
@@ -619,6 +625,7 @@ async def delete_topic(
         }
 
     await db.commit()
+    get_topic_search().remove_topic(topic_id)
 
     return {
         "success": True,
@@ -655,6 +662,7 @@ async def reactivate_topic(
     await session_crud.clear_topic_unavailable(db, topic_id)
 
     await db.commit()
+    await get_topic_search().index_topic(db, topic_id)
     return {"success": True, "message": "话题已重新上架"}
 
 # ============================================================
@@ -0,0 +1,67 @@
+# backend/utils/export.py
+"""
+流式导出（CSV / NDJSON）
+
+逐行消费异步行迭代器、按批输出文本块，内存占用与导出总量无关。
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Sequence
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# 每攒够多少行输出一块
+_ROWS_PER_CHUNK = 200
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def export_lines(
+    rows: AsyncIterator[dict],
+    columns: Sequence[str],
+    fmt: str,
+) -> AsyncIterator[str]:
+    """
+    把行迭代器转为导出文本块
+
+    参数:
+        columns: 输出的列（CSV 表头顺序 / NDJSON 字段）
+        fmt: "csv" 或 "ndjson"
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        # BOM：Excel 打开中文 CSV 不乱码
+        buffer.write("﻿")
+        writer.writerow(columns)
+
+    pending = 0
+    async for row in rows:
+        values = [_plain(row.get(c)) for c in columns]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False) + "\n")
+        pending += 1
+        if pending >= _ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
@@ -0,0 +1,49 @@
+# backend/utils/keyset.py
+"""
+键集分页（keyset / seek pagination）
+
+按 (created_at DESC, id DESC) 排序的列表使用不透明游标翻页：
+- 深翻页不再随 offset 线性变慢（走 (user_id, created_at) 索引直接定位）
+- 翻页期间插入新记录不会导致漏读或重复
+
+游标为 "created_at ISO|id" 的 urlsafe base64。
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """解析游标，返回 (created_at, id 字符串)；格式非法时抛 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+
+def decode_int_cursor(cursor: str) -> Tuple[datetime, int]:
+    """整数主键的游标"""
+    created_at, row_id = decode_cursor(cursor)
+    try:
+        return created_at, int(row_id)
+    except ValueError as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+
+def before(created_column, id_column, created_at: datetime, row_id):
+    """(created_at, id) 严格小于游标位置的条件（配合 DESC 排序取下一页）"""
+    return or_(
+        created_column < created_at,
+        and_(created_column == created_at, id_column < row_id),
+    )
@@ -0,0 +1,83 @@
+# backend/utils/prompt_layout.py
+"""
+提示词分层拼装（面向服务商前缀缓存）
+
+DeepSeek 等服务商按请求前缀做上下文缓存：前缀越长越稳定，命中越多。
+因此请求内容按"越静态越靠前"排列：
+    1. 共享模板（所有用户相同）
+    2. 话题信息（同一话题相同）
+    3. 用户长期特质（同一用户相同）
+    4. 对话历史（以真实 messages 逐轮追加，旧轮次不变）
+    5. 本轮指令 / 增量（放在最后；历史以 user 结尾时并入该条，见 messages_with_instruction）
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+_INSTRUCTION_HEADER = "# 本轮指令（系统附加，非用户发言）：\n"
+
+
+def layered_system_prompt(*sections: Optional[str]) -> str:
+    """按传入顺序（静态 → 动态）以空行连接非空段落"""
+    return "\n\n".join(s for s in sections if s)
+
+
+def topic_section(
+    heading: str,
+    topic_title: Optional[str],
+    topic_tags: Optional[List[str]],
+    focus: str,
+) -> str:
+    """话题元数据段落；无话题时返回空串"""
+    if not topic_title:
+        return ""
+    text = f"{heading}\n- 话题：{topic_title}\n"
+    if topic_tags:
+        text += f"- 标签：{'、'.join(topic_tags)}\n"
+    return text + focus
+
+
+def trait_section(
+    summary_heading: str,
+    trait_summary: str,
+    profile_heading: str,
+    trait_profile: str,
+) -> str:
+    """用户长期特质段落（一句话总结 + 画像），均为空时返回空串"""
+    parts = []
+    if trait_summary:
+        parts.append(f"{summary_heading}\n{trait_summary}")
+    if trait_profile:
+        parts.append(f"{profile_heading}\n{trait_profile}")
+    return "\n\n".join(parts)
+
+
+def history_messages(history: List[Dict]) -> List[Dict]:
+    """
+    对话历史转为 chat messages（只保留 role / content）
+
+    每轮只在末尾追加，之前的 messages 逐字节不变，可被前缀缓存复用。
+    """
+    messages = []
+    for turn in history:
+        role = turn.get("role", "")
+        content = turn.get("content", "")
+        if role in ("user", "assistant"):
+            messages.append({"role": role, "content": content})
+        else:
+            messages.append({"role": "user", "content": f"{role}：{content}"})
+    return messages
+
+
+def messages_with_instruction(history: List[Dict], instruction: str) -> Tuple[List[Dict], str]:
+    """
+    历史 messages + 本轮指令 -> (history, user_prompt)，交给 llm.chat_stream
+
+    LLM 客户端总把 user_prompt 作为最后一条 user 消息追加。历史以 user 结尾时
+    （如每轮分析时的本轮用户发言），把指令并入这一条，避免连续两条 user 消息；
+    否则指令单独作为最后一条。之前的 messages 不变，前缀缓存照常命中。
+    """
+    messages = history_messages(history)
+    if messages and messages[-1]["role"] == "user":
+        last = messages.pop()
+        return messages, f"{last['content']}\n\n{_INSTRUCTION_HEADER}{instruction}"
+    return messages, instruction
@@ -1,16 +1,155 @@
 # backend/utils/prompt_loader.py
 """
 统一加载提示词。
+
+启动时把 backend/prompts/ 下的全部模板读入内存（PromptRegistry），
+请求路径上不再有磁盘 I/O；固定拼接的系统提示词（如 mode2 = system + mode2_intro）
+预先拼好。开启 hot_reload 时按间隔检查文件 mtime，修改后无需重启即生效。
 """
 import os
+import time
 import logging
+from typing import Dict, Tuple
 
 logger = logging.getLogger("prompt_loader")
 
+_PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "prompts")
+
+# 预拼接的系统提示词：名称 -> 按顺序以空行连接的模板
+COMPOSITES: Dict[str, Tuple[str, ...]] = {
+    "model1/mode1": ("model1/system.txt",),
+    "model1/mode2": ("model1/system.txt", "model1/mode2_intro.txt"),
+}
+
+
+class PromptRegistry:
+    """
+    提示词内存缓存
+
+    - get(path)：取单个模板
+    - composite(name)：取 COMPOSITES 中预拼接的提示词
+    - hot_reload=True 时，距上次检查超过 check_interval 秒才 stat 一次文件
+    """
+
+    def __init__(
+        self,
+        base_dir: str = _PROMPTS_DIR,
+        hot_reload: bool = False,
+        check_interval: float = 2.0,
+    ):
+        self.base_dir = base_dir
+        self.hot_reload = hot_reload
+        self.check_interval = check_interval
+
+        self._texts: Dict[str, str] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._composites: Dict[str, str] = {}
+        self._loaded = False
+        self._last_check = 0.0
+        self.reload_count = 0
+
+    # ------------------------------------------------------
+    # 加载
+    # ------------------------------------------------------
+    def _full_path(self, relative_path: str) -> str:
+        return os.path.join(self.base_dir, *relative_path.split("/"))
+
+    def _read(self, relative_path: str) -> None:
+        full_path = self._full_path(relative_path)
+        try:
+            with open(full_path, "r", encoding="utf8") as f:
+                self._texts[relative_path] = f.read()
+            self._mtimes[relative_path] = os.path.getmtime(full_path)
+        except FileNotFoundError:
+            logger.error("提示词文件不存在: %s", full_path)
+            raise FileNotFoundError(
+                f"提示词文件不存在: {relative_path}（完整路径: {full_path}）"
+            )
+
+    def _build_composites(self) -> None:
+        composites = {}
+        for name, parts in COMPOSITES.items():
+            for part in parts:
+                if part not in self._texts:
+                    self._read(part)
+            composites[name] = "\n\n".join(self._texts[p] for p in parts)
+        self._composites = composites
+
+    def load_all(self) -> int:
+        """读取目录下全部 .txt 模板并预拼接，返回模板数量"""
+        self._texts.clear()
+        self._mtimes.clear()
+        for root, _, files in os.walk(self.base_dir):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                rel = os.path.relpath(os.path.join(root, name), self.base_dir)
+                self._read(rel.replace(os.sep, "/"))
+        self._build_composites()
+        self._loaded = True
+        self._last_check = time.monotonic()
+        logger.info("已加载 %s 个提示词模板", len(self._texts))
+        return len(self._texts)
+
+    def _maybe_reload(self) -> None:
+        if not self._loaded:
+            self.load_all()
+            return
+        if not self.hot_reload:
+            return
+
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        changed = False
+        for rel, mtime in list(self._mtimes.items()):
+            try:
+                current = os.path.getmtime(self._full_path(rel))
+            except FileNotFoundError:
+                # 被删除：保留旧内容，避免线上编辑过程中出现短暂缺失
+                continue
+            if current != mtime:
+                self._read(rel)
+                changed = True
+                logger.info("提示词已更新: %s", rel)
+
+        if changed:
+            self._build_composites()
+            self.reload_count += 1
+
+    # ------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------
+    def get(self, relative_path: str) -> str:
+        self._maybe_reload()
+        text = self._texts.get(relative_path)
+        if text is None:
+            # 启动后新增的文件：读一次后缓存
+            self._read(relative_path)
+            text = self._texts[relative_path]
+        return text
+
+    def composite(self, name: str) -> str:
+        self._maybe_reload()
+        return self._composites[name]
+
+
+_registry = PromptRegistry()
+
+
+def configure_prompts(hot_reload: bool = False, check_interval: float = 2.0) -> PromptRegistry:
+    """启动时调用：设置热加载并预加载全部模板"""
+    _registry.hot_reload = hot_reload
+    _registry.check_interval = check_interval
+    _registry.load_all()
+    return _registry
+
 
 def load_prompt(relative_path: str) -> str:
     """
-    加载提示词文件
+    加载提示词文件（内存缓存）
 
     参数:
         relative_path: 相对于 backend/prompts/ 的路径，如 "model1/system.txt"
@@ -21,14 +160,14 @@ def load_prompt(relative_path: str) -> str:
     异常:
         FileNotFoundError: 提示词文件不存在时，附带完整路径信息
     """
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    full_path = os.path.join(base_dir, "prompts", relative_path)
-
-    try:
-        with open(full_path, "r", encoding="utf8") as f:
-            return f.read()
-    except FileNotFoundError:
-        logger.error("提示词文件不存在: %s", full_path)
-        raise FileNotFoundError(
-            f"提示词文件不存在: {relative_path}（完整路径: {full_path}）"
-        )
+    return _registry.get(relative_path)
+
+
+def load_composite_prompt(name: str) -> str:
+    """
+    获取预拼接的系统提示词
+
+    参数:
+        name: COMPOSITES 中的名称，如 "model1/mode2"
+    """
+    return _registry.composite(name)
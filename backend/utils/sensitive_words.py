@@ -4,39 +4,194 @@
 - 检查文本是否包含敏感词
 - 敏感词管理（增删）
 - 匹配规则：包含匹配
-- ✅ 新增：进程内 TTL 缓存（5 分钟），避免每次全表扫描
+- 进程内缓存：按 sensitive_word_version 版本号判断过期（多 worker 一致），后台单飞重建
 - ✅ v1.6：新增 check_sensitive_words_detailed，返回所有匹配及位置
+- 匹配改用 Aho-Corasick 自动机（backend/utils/word_matcher.py）：每次刷新缓存编译一次，
+  每段文本一次线性扫描；支持大小写折叠与全角/半角归一化
 """
 
+import asyncio
+import logging
 import time
+from datetime import datetime
 from typing import List, Tuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from backend.db.models import SensitiveWord
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, insert
+from backend.db.database import get_sessionmaker
+from backend.db.models import SensitiveWord, SensitiveWordVersion
+from backend.utils.word_matcher import WordMatcher
 
-# ✅ 新增：进程内缓存层
-_cache_words: List[str] = []
-_cache_timestamp: float = 0.0
-_CACHE_TTL: float = 300.0  # 5 分钟
+logger = logging.getLogger("sensitive_words")
+
+_VERSION_ROW_ID = 1
+
+
+async def get_version(db: AsyncSession) -> int:
+    """当前敏感词库版本号（主键查询；尚未有任何修改时为 0）"""
+    version = (await db.execute(
+        select(SensitiveWordVersion.version)
+        .where(SensitiveWordVersion.id == _VERSION_ROW_ID)
+    )).scalar_one_or_none()
+    return version or 0
+
+
+async def bump_version(db: AsyncSession) -> None:
+    """
+    版本号 +1（不提交，与敏感词修改同一事务）
+
+    版本行不存在时先以原生 "插入或忽略" 补建，再执行同一条 UPDATE：
+    并发的首次修改不会因主键冲突失败。
+    """
+    statement = (
+        update(SensitiveWordVersion)
+        .where(SensitiveWordVersion.id == _VERSION_ROW_ID)
+        .values(version=SensitiveWordVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    result = await db.execute(statement)
+    if result.rowcount == 0:
+        await _ensure_version_row(db)
+        await db.execute(statement)
+
+
+async def _ensure_version_row(db: AsyncSession) -> None:
+    values = {"id": _VERSION_ROW_ID, "version": 0, "updated_at": datetime.utcnow()}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        await db.execute(
+            dialect_insert(SensitiveWordVersion).values(**values)
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+    elif dialect == "mysql":
+        await db.execute(insert(SensitiveWordVersion).prefix_with("IGNORE").values(**values))
+    else:
+        # 其他数据库：在保存点内插入，主键冲突只回滚保存点
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(SensitiveWordVersion).values(**values))
+        except IntegrityError:
+            pass
+
+
+class _Snapshot:
+    __slots__ = ("version", "words", "matcher", "loaded_at")
+
+    def __init__(self, version: int, words: List[str], matcher: WordMatcher):
+        self.version = version
+        self.words = words
+        self.matcher = matcher
+        self.loaded_at = time.monotonic()
+
+
+class SensitiveWordCache:
+    """
+    版本化的敏感词快照（词表 + 编译好的自动机），多 worker 一致
+
+    - 每隔 check_interval 秒按主键读一次版本号；版本变化（任一 worker 或后台修改了词库）
+      或快照超过 max_age 时在后台重建，期间请求继续使用旧快照
+    - 重建单飞：同一时刻只有一个重建任务；只有首次加载（尚无快照）时请求会等待它
+    - 自动机在线程中编译，不阻塞事件循环
+    """
+
+    def __init__(self, check_interval: float = 2.0, max_age: float = 3600.0):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at = 0.0
+        self._rebuild: Optional[asyncio.Task] = None
+
+        # 指标
+        self._version_checks = 0
+        self._rebuilds = 0
+        self._rebuild_failures = 0
+
+    async def get(self, db: AsyncSession) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # 共享的重建任务不随单个请求取消
+            return await asyncio.shield(self._schedule_rebuild())
+
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._version_checks += 1
+            version = await get_version(db)
+            if version != snapshot.version or now - snapshot.loaded_at >= self.max_age:
+                self._schedule_rebuild()
+        return snapshot
+
+    def invalidate(self) -> None:
+        """本进程修改词库后调用：立即后台重建，下次读取时重新核对版本"""
+        self._checked_at = 0.0
+        if self._snapshot is not None:
+            self._schedule_rebuild()
+
+    def _schedule_rebuild(self) -> asyncio.Task:
+        if self._rebuild is None or self._rebuild.done():
+            self._rebuild = asyncio.create_task(self._load(), name="sensitive-words-rebuild")
+            self._rebuild.add_done_callback(self._rebuild_done)
+        return self._rebuild
+
+    def _rebuild_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self._rebuild_failures += 1
+            logger.warning("敏感词库重建失败: %s", error)
+
+    async def _load(self) -> _Snapshot:
+        async with get_sessionmaker()() as db:
+            # 先读版本再读词表：并发修改时最多多重建一次，不会把新版本号配上旧词表
+            version = await get_version(db)
+            words = list((await db.execute(select(SensitiveWord.word))).scalars().all())
+        matcher = await asyncio.to_thread(WordMatcher, words)
+        self._snapshot = _Snapshot(version, words, matcher)
+        self._rebuilds += 1
+        return self._snapshot
+
+    def metrics(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "words": len(snapshot.words) if snapshot else 0,
+            "states": snapshot.matcher.states if snapshot else 0,
+            "version_checks_total": self._version_checks,
+            "rebuilds_total": self._rebuilds,
+            "rebuild_failures_total": self._rebuild_failures,
+        }
+
+
+_cache = SensitiveWordCache()
+
+
+def configure_sensitive_word_cache(**options) -> SensitiveWordCache:
+    """按配置替换进程级敏感词缓存（main 启动时调用）"""
+    global _cache
+    _cache = SensitiveWordCache(**options)
+    return _cache
+
+
+async def _get_matcher_cached(db: AsyncSession) -> WordMatcher:
+    return (await _cache.get(db)).matcher
+
+
+async def get_matcher(db: AsyncSession) -> WordMatcher:
+    """当前敏感词自动机（只读；流式审核等需要直接扫描的场景使用）"""
+    return await _get_matcher_cached(db)
 
 
 async def _get_words_cached(db: AsyncSession) -> List[str]:
-    """带 TTL 的敏感词缓存"""
-    global _cache_words, _cache_timestamp
-    now = time.monotonic()
-    if _cache_words and (now - _cache_timestamp) < _CACHE_TTL:
-        return _cache_words
-    result = await db.execute(select(SensitiveWord))
-    _cache_words = [w.word for w in result.scalars().all()]
-    _cache_timestamp = now
-    return _cache_words
+    return (await _cache.get(db)).words
 
 
 def invalidate_cache():
-    """管理员增删敏感词后调用"""
-    global _cache_words, _cache_timestamp
-    _cache_words = []
-    _cache_timestamp = 0.0
+    """增删敏感词提交后调用（其他 worker 通过版本号感知）"""
+    _cache.invalidate()
 
 
 # ============================================================
@@ -45,17 +200,16 @@ def invalidate_cache():
 
 async def check_sensitive_word(db: AsyncSession, text: str) -> Tuple[bool, str]:
     """
-    检查文本是否包含敏感词（不区分大小写）
-    返回 (是否包含, 第一个匹配的敏感词)
+    检查文本是否包含敏感词（不区分大小写、不区分全角/半角）
+    返回 (是否包含, 文本中最先出现的敏感词)
     """
     if not text:
         return False, ""
-    text_lower = text.lower()
-    sensitive_words = await _get_words_cached(db)  # ✅ 使用缓存
-    for word in sensitive_words:
-        if word.lower() in text_lower:
-            return True, word
-    return False, ""
+    matcher = await _get_matcher_cached(db)
+    word = matcher.first(text)
+    if word is None:
+        return False, ""
+    return True, word
 
 
 # ============================================================
@@ -67,33 +221,17 @@ async def check_sensitive_words_detailed(
     text: str
 ) -> Tuple[bool, List[dict]]:
     """
-    详细检查文本中的敏感词，返回所有匹配及位置信息
+    详细检查文本中的敏感词，返回所有匹配及位置信息（一次扫描，重叠命中全部返回）
 
     返回:
-        (是否包含敏感词, 匹配列表)
+        (是否包含敏感词, 匹配列表，按首次出现位置排序)
         匹配列表格式: [{"word": "敏感词", "positions": [{"start": 0, "end": 3}]}]
     """
     if not text:
         return False, []
 
-    text_lower = text.lower()
-    sensitive_words = await _get_words_cached(db)
-    matches = []
-
-    for word in sensitive_words:
-        word_lower = word.lower()
-        positions = []
-        start = 0
-        while True:
-            idx = text_lower.find(word_lower, start)
-            if idx == -1:
-                break
-            positions.append({"start": idx, "end": idx + len(word)})
-            start = idx + 1
-
-        if positions:
-            matches.append({"word": word, "positions": positions})
-
+    matcher = await _get_matcher_cached(db)
+    matches = matcher.find_all(text)
     return bool(matches), matches
 
 
@@ -112,28 +250,31 @@ async def add_sensitive_word(db: AsyncSession, word: str) -> Tuple[bool, str]:
     if result.scalar_one_or_none():
         return False, "该敏感词已存在"
     db.add(SensitiveWord(word=word))
+    await bump_version(db)
     await db.commit()
     invalidate_cache()  # ✅ 新增
     return True, f"敏感词 '{word}' 已添加"
 
 
 async def add_sensitive_words_batch(db: AsyncSession, words: List[str]) -> Tuple[int, int]:
-    success_count = exists_count = 0
-    for word in words:
-        if not word or not word.strip():
-            continue
-        word = word.strip()
+    """批量添加：已存在的词一次 IN 查询取回（批内重复的词也计入已存在）"""
+    cleaned = [w.strip() for w in words if w and w.strip()]
+    unique = list(dict.fromkeys(cleaned))
+    existing = set()
+    for start in range(0, len(unique), 500):
         result = await db.execute(
-            select(SensitiveWord).where(SensitiveWord.word == word)
+            select(SensitiveWord.word).where(SensitiveWord.word.in_(unique[start:start + 500]))
         )
-        if result.scalar_one_or_none():
-            exists_count += 1
-            continue
-        db.add(SensitiveWord(word=word))
-        success_count += 1
+        existing.update(result.scalars().all())
+
+    new_words = [w for w in unique if w not in existing]
+    if not new_words:
+        return 0, len(cleaned)
+    db.add_all([SensitiveWord(word=w) for w in new_words])
+    await bump_version(db)
     await db.commit()
     invalidate_cache()  # ✅ 新增
-    return success_count, exists_count
+    return len(new_words), len(cleaned) - len(new_words)
 
 
 async def remove_sensitive_word(db: AsyncSession, word_id: int) -> Tuple[bool, str]:
@@ -144,6 +285,7 @@ async def remove_sensitive_word(db: AsyncSession, word_id: int) -> Tuple[bool, s
     if not word:
         return False, "敏感词不存在"
     await db.delete(word)
+    await bump_version(db)
     await db.commit()
     invalidate_cache()  # ✅ 新增
     return True, f"敏感词 '{word.word}' 已删除"
@@ -157,6 +299,7 @@ async def remove_sensitive_word_by_text(db: AsyncSession, word_text: str) -> Tup
     if not word:
         return False, "敏感词不存在"
     await db.delete(word)
+    await bump_version(db)
     await db.commit()
     invalidate_cache()  # ✅ 新增
     return True, f"敏感词 '{word_text}' 已删除"
@@ -3,6 +3,10 @@
 import re
 import json
 from dataclasses import dataclass
+from typing import List, Optional
+
+_SYS_OPEN = "<SYS>"
+_SYS_CLOSE = "</SYS>"
 
 
 def strip_control_markers(text: str) -> str:
@@ -14,6 +18,18 @@ def strip_control_markers(text: str) -> str:
     return cleaned.strip()
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数（不依赖分词器）
+
+    按 DeepSeek 官方换算：1 个中文字符约 0.6 token，1 个英文字符约 0.3 token。
+    """
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if ch >= "\u2e80")
+    return int(cjk * 0.6 + (len(text) - cjk) * 0.3) + 1
+
+
 @dataclass
 class ControlFlags:
     user_want_to_quit: bool = False
@@ -29,12 +45,128 @@ def parse_control_flags(text: str) -> ControlFlags:
     if not m:
         return ControlFlags()
 
-    raw = m.group(1).strip()
+    return _flags_from_payload(m.group(1))
+
+
+def _flags_from_payload(payload: str) -> ControlFlags:
+    """解析单个 <SYS> 块内部的 JSON 文本。"""
+    raw = payload.strip()
     try:
         data = json.loads(raw)
     except json.JSONDecodeError:
         return ControlFlags()
+    if not isinstance(data, dict):
+        # 合法 JSON 但不是对象（如 <SYS>1</SYS>）同样视为无效
+        return ControlFlags()
 
     return ControlFlags(
         user_want_to_quit=bool(data.get("user_want_to_quit", False)),
-    )
\ No newline at end of file
+    )
+
+
+def _partial_prefix_len(text: str, marker: str) -> int:
+    """text 末尾与 marker 前缀重合的最大长度（不含完整 marker）。"""
+    for size in range(min(len(marker) - 1, len(text)), 0, -1):
+        if text.endswith(marker[:size]):
+            return size
+    return 0
+
+
+class StreamingMarkerFilter:
+    """
+    strip_control_markers / parse_control_flags 的流式版本。
+
+    逐块 feed() LLM 输出，立即返回可以安全展示的文本；只扣留：
+    - 可能是 <SYS> 开头的末尾字节（如 "<"、"<SY"）
+    - 尚未闭合的 <SYS> 块
+    - 末尾空白（等价于整体 strip() 的行为）
+
+    所有 feed() 与 flush() 的返回值拼接后，与
+    strip_control_markers(完整输出) 完全一致；flags 与
+    parse_control_flags(完整输出) 一致。
+    """
+
+    def __init__(self):
+        self._pending = ""                  # 块外、尚未输出的可见文本
+        self._scan_from = 0                 # _pending 中可能出现 <SYS> 的起点
+        self._block: Optional[str] = None   # 块内缓存（含 <SYS>），None 表示在块外
+        self._block_scan = 0                # 块内查找 </SYS> 的起点
+        self._started = False               # 是否已输出过非空白字符
+        self._payload: Optional[str] = None # 第一个完整 <SYS> 块的内容
+        self._parts: List[str] = []
+
+    def feed(self, chunk: str) -> str:
+        """输入一段原始输出，返回本次可以输出的可见文本（可能为空）。"""
+        data = chunk
+        while data:
+            if self._block is not None:
+                self._block += data
+                data = ""
+                end = self._block.find(_SYS_CLOSE, self._block_scan)
+                if end == -1:
+                    self._block_scan = max(
+                        len(_SYS_OPEN), len(self._block) - len(_SYS_CLOSE) + 1
+                    )
+                    break
+                if self._payload is None:
+                    self._payload = self._block[len(_SYS_OPEN):end]
+                data = self._block[end + len(_SYS_CLOSE):]
+                self._block = None
+                # 与正则一致：块前后的文本不会拼接成新的 <SYS>
+                self._scan_from = len(self._pending)
+                continue
+
+            buf = self._pending + data
+            data = ""
+            start = buf.find(_SYS_OPEN, self._scan_from)
+            if start == -1:
+                self._pending = buf
+                break
+            self._pending = buf[:start]
+            self._block = ""
+            self._block_scan = len(_SYS_OPEN)
+            data = buf[start:]
+
+        return self._drain(final=False)
+
+    def flush(self) -> str:
+        """输入结束：未闭合的 <SYS> 按原文输出，末尾空白丢弃。"""
+        if self._block is not None:
+            self._pending += self._block
+            self._block = None
+        return self._drain(final=True)
+
+    @property
+    def visible_text(self) -> str:
+        """迄今为止输出的全部可见文本。"""
+        return "".join(self._parts)
+
+    @property
+    def flags(self) -> ControlFlags:
+        if self._payload is None:
+            return ControlFlags()
+        return _flags_from_payload(self._payload)
+
+    def _drain(self, final: bool) -> str:
+        text = self._pending
+        if not self._started:
+            text = text.lstrip()
+        scan_from = max(self._scan_from - (len(self._pending) - len(text)), 0)
+
+        if final:
+            out = text.rstrip()
+            self._pending = ""
+        else:
+            # 块内时不可能出现 <SYS> 前缀，只需扣留末尾空白
+            if self._block is not None:
+                hold = 0
+            else:
+                hold = _partial_prefix_len(text[scan_from:], _SYS_OPEN)
+            out = text[:len(text) - hold].rstrip()
+            self._pending = text[len(out):]
+        self._scan_from = max(scan_from - len(out), 0)
+
+        if out:
+            self._started = True
+            self._parts.append(out)
+        return out
\ No newline at end of file
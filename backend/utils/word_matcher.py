@@ -0,0 +1,199 @@
+# backend/utils/word_matcher.py
+"""
+多模式串匹配（Aho-Corasick 自动机）
+
+敏感词表编译一次，之后每段文本只需一次线性扫描即可找出所有命中及位置，
+耗时与词表大小基本无关（原实现为 词数 × 文本长度）。
+
+归一化（建表与扫描使用同一规则，逐字符映射、长度不变，位置可直接对应原文）：
+- 全角 ASCII（！～）→ 半角，全角空格 → 半角空格
+- 大小写折叠（lower）
+
+StreamScanner 用于流式文本（如 LLM 输出）：自动机状态跨块延续，每块只扫描新到的字符。
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 全角 → 半角
+_WIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_WIDTH_TABLE[0x3000] = 0x20
+
+
+def _fold_char(ch: str) -> str:
+    lowered = ch.lower()
+    return lowered if len(lowered) == 1 else ch
+
+
+def fold_text(text: str) -> str:
+    """全角转半角 + 大小写折叠，结果与原文逐字符对应"""
+    text = text.translate(_WIDTH_TABLE)
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # 个别字符小写后变长（如 'İ'），逐字符处理保证位置不偏移
+    return "".join(_fold_char(ch) for ch in text)
+
+
+class WordMatcher:
+    """
+    编译后的敏感词自动机（只读，可在协程间共享）
+
+    同一归一化形式对应多个原词时（如 "ABC" 与 "abc"），命中时全部返回。
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words: List[str] = []
+        # 状态转移（trie 边）、失配指针、每个状态的输出（原词下标，含后缀链上的输出）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        # 状态深度 = 已匹配的前缀长度（流式扫描据此决定扣留多少字符）
+        self._depth: List[int] = [0]
+
+        outputs: Dict[int, List[int]] = {}
+        for word in words:
+            pattern = fold_text(word)
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._depth.append(self._depth[state] + 1)
+                state = nxt
+            outputs.setdefault(state, []).append(len(self.words))
+            self.words.append(word)
+
+        for state, indexes in outputs.items():
+            self._out[state] = tuple(indexes)
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def states(self) -> int:
+        return len(self._goto)
+
+    # ------------------------------------------------------
+    # 扫描
+    # ------------------------------------------------------
+    def step(self, state: int, ch: str) -> int:
+        """从 state 读入一个已归一化的字符，返回新状态"""
+        goto, fail = self._goto, self._fail
+        while state and ch not in goto[state]:
+            state = fail[state]
+        return goto[state].get(ch, 0)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """按结束位置顺序产出 (start, end, 原词)，重叠命中全部产出"""
+        if not text or not self.words:
+            return
+        step, out, words = self.step, self._out, self.words
+        state = 0
+        for i, ch in enumerate(fold_text(text)):
+            state = step(state, ch)
+            for index in out[state]:
+                # 归一化不改变长度，原词长度即命中长度
+                word = words[index]
+                yield i + 1 - len(word), i + 1, word
+
+    def first(self, text: str) -> Optional[str]:
+        """最先结束的命中词；无命中返回 None"""
+        for _, _, word in self.iter_matches(text):
+            return word
+        return None
+
+    def find_all(self, text: str) -> List[dict]:
+        """
+        所有命中，按原词分组：[{"word": 原词, "positions": [{"start", "end"}]}]
+        （组按首次出现位置排序）
+        """
+        grouped: Dict[str, List[Tuple[int, int]]] = {}
+        for start, end, word in self.iter_matches(text):
+            grouped.setdefault(word, []).append((start, end))
+        result = []
+        for word, spans in grouped.items():
+            spans.sort()
+            result.append({
+                "word": word,
+                "positions": [{"start": s, "end": e} for s, e in spans],
+            })
+        result.sort(key=lambda m: m["positions"][0]["start"])
+        return result
+
+
+class StreamScanner:
+    """
+    流式增量扫描
+
+    每次 feed() 只处理新到的字符，自动机状态在块之间延续，不回扫已处理的文本。
+    末尾仍可能构成某个词前缀的字符（不超过最长词长）暂时扣留，其余立即释放；
+    redact=True 时命中的字符在释放前替换为 mask。
+    所有 feed() 与 flush() 返回的文本拼接后，等于原文（或脱敏后的原文）。
+    """
+
+    def __init__(self, matcher: WordMatcher, redact: bool = False, mask: str = "*"):
+        self.matcher = matcher
+        self.redact = redact
+        self.mask = mask
+        self._state = 0
+        self._held: List[str] = []   # 扣留的字符（脱敏已生效）
+        self._offset = 0             # _held[0] 在全文中的位置
+
+    def feed(self, chunk: str) -> Tuple[str, List[Tuple[int, int, str]]]:
+        """返回 (本次可释放的文本, 本块新命中 [(start, end, 原词)]，位置相对全文)"""
+        matches: List[Tuple[int, int, str]] = []
+        if not chunk:
+            return "", matches
+        matcher = self.matcher
+        out, words, held = matcher._out, matcher.words, self._held
+        state = self._state
+        position = self._offset + len(held)
+        for ch, folded in zip(chunk, fold_text(chunk)):
+            held.append(ch)
+            position += 1
+            state = matcher.step(state, folded)
+            for index in out[state]:
+                word = words[index]
+                start = position - len(word)
+                matches.append((start, position, word))
+                if self.redact:
+                    for i in range(start - self._offset, position - self._offset):
+                        held[i] = self.mask
+        self._state = state
+
+        keep = matcher._depth[state]
+        release = len(held) - keep
+        text = "".join(held[:release])
+        del held[:release]
+        self._offset += release
+        return text, matches
+
+    def flush(self) -> str:
+        """输入结束：释放全部扣留字符"""
+        text = "".join(self._held)
+        self._offset += len(self._held)
+        self._held = []
+        self._state = 0
+        return text
@@ -0,0 +1,55 @@
+# benchmarks/_common.py
+"""
+基准脚本公共设置
+
+必须在导入 backend 之前 import：
+- DATABASE_URL 默认指向临时 SQLite 文件（脚本会 drop_all / create_all，不能落到真实库）；
+  设置 BENCH_DATABASE_URL 可改用 MySQL 等一次性测试库
+- 补齐 JWT_SECRET_KEY、LLM_PROVIDER=mock
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# SQLite 写入串行：并发压测时把忙等超时调大，避免 "database is locked"
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or (
+    "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="metalks-bench-"), "bench.db") + "?timeout=60"
+)
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("LLM_PROVIDER", "mock")
+
+
+async def reset_db():
+    """按 models.py 重建全部表"""
+    from backend.db.database import Base, get_engine
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def percentiles(samples_ms):
+    """返回 (p50, p99, max)，单位毫秒"""
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return 0.0, 0.0, 0.0
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return statistics.median(ordered), p99, ordered[-1]
+
+
+class Timer:
+    """with Timer() as t: ...；t.ms 为耗时毫秒"""
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self._start) * 1000
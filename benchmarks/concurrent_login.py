@@ -0,0 +1,123 @@
+# benchmarks/concurrent_login.py
+"""
+并发登录压测
+
+N 个用户同时 POST /api/auth/login（bcrypt 校验在 PasswordHasher 线程池中执行），
+同时在同一事件循环上不断发起聊天 SSE 流（mock LLM），观察登录洪峰对其他请求的影响：
+- 登录延迟 p50 / p99
+- 事件循环延迟（10ms 定时器的超时量）p50 / p99 / max
+- 洪峰期间完成的聊天流数量、最慢一条流的耗时与最大事件间隔
+- PasswordHasher 指标（排队、等待、单次耗时）
+
+用法:
+    python benchmarks/concurrent_login.py [--users 100] [--rounds 12] [--workers 2] [--no-chat]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from _common import percentiles, reset_db  # 必须先于 backend 导入
+
+from sqlalchemy import insert
+
+from backend.core import security
+from backend.db.database import get_engine, get_sessionmaker
+from backend.db.models import User
+
+PASSWORD = "Passw0rd!"
+
+
+async def _seed(users: int):
+    # 同一哈希复用即可：每次登录仍完整执行一次 bcrypt 校验
+    hashed = security.hash_password(PASSWORD)
+    async with get_sessionmaker()() as db:
+        await db.execute(insert(User), [
+            {"id": uid, "email": f"u{uid}@x.com", "nickname": f"u{uid}", "password_hash": hashed,
+             "electrolyte_number": 0.0, "last_login_date": date.today()}
+            for uid in range(1, users + 2)
+        ])
+        await db.commit()
+
+
+async def main(args):
+    import httpx
+    import main as app_main
+
+    security.configure_password_hasher(rounds=args.rounds, max_workers=args.workers)
+    await reset_db()
+    await _seed(args.users)
+    # 最后一个用户专门用于聊天流
+    chat_token = security.create_access_token({"sub": str(args.users + 1)})
+
+    lags = []
+    stopping = asyncio.Event()
+
+    async def ticker():
+        while not stopping.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - started - 0.01) * 1000)
+
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+
+        async def login(uid):
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", json={"email": f"u{uid}@x.com", "password": PASSWORD})
+            assert response.status_code == 200, response.text
+            return (time.perf_counter() - started) * 1000
+
+        async def chat(n):
+            gaps, started = [], time.perf_counter()
+            last = started
+            async with client.stream(
+                "POST", "/api/chat/stream",
+                json={"mode": 2, "session_id": f"bench-{n}", "message": "你好", "is_first": True},
+                cookies={"access_token": chat_token},
+            ) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        now = time.perf_counter()
+                        gaps.append((now - last) * 1000)
+                        last = now
+            return max(gaps, default=0.0), (last - started) * 1000
+
+        tick = asyncio.create_task(ticker())
+        await asyncio.sleep(0.2)
+        lags.clear()
+
+        started = time.perf_counter()
+        logins = asyncio.ensure_future(asyncio.gather(*(login(uid) for uid in range(1, args.users + 1))))
+        chats = []
+        if not args.no_chat:
+            while not logins.done():
+                chats.append(await chat(len(chats)))
+        latencies = await logins
+        total = time.perf_counter() - started
+
+        stopping.set()
+        await tick
+
+    await get_engine().dispose()
+    security._hasher.shutdown()
+
+    p50, p99, _ = percentiles(latencies)
+    print(f"{args.users} 次并发登录（bcrypt {args.rounds} 轮，{args.workers} 线程）：{total:.1f}s，"
+          f"登录 p50 {p50:.0f}ms p99 {p99:.0f}ms")
+    p50, p99, worst = percentiles(lags)
+    print(f"事件循环延迟 p50 {p50:.1f}ms p99 {p99:.1f}ms max {worst:.0f}ms")
+    if chats:
+        print(f"洪峰期间完成聊天流 {len(chats)} 条，最大事件间隔 {max(g for g, _ in chats):.0f}ms，"
+              f"最慢一条 {max(d for _, d in chats):.0f}ms")
+    print(f"PasswordHasher {security._hasher.metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=security.DEFAULT_BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--no-chat", action="store_true", help="只测登录，不并发聊天流")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+# benchmarks/electrolyte_donations.py
+"""
+电解液投喂并发基准
+
+N 个会话同时对同一付款方余额调用 topic_service.donate_electrolyte，
+输出吞吐与延迟分位，并校验：余额不为负、成功次数 × 金额 == 实际扣除、流水与余额一致。
+
+用法:
+    python benchmarks/electrolyte_donations.py [--donations 1000] [--concurrency 50] [--amount 1]
+"""
+
+import argparse
+import asyncio
+
+from _common import Timer, percentiles, reset_db  # 必须先于 backend 导入
+
+from sqlalchemy import func, insert, select
+
+from backend.db.database import get_engine, get_sessionmaker
+from backend.db.models import ElectrolyteLog, Topic, TopicAuthor, User
+from backend.services import topic_service
+
+DONOR, AUTHOR = 1, 2
+TOPIC_ID = 1
+
+
+async def _seed(balance: float):
+    async with get_sessionmaker()() as db:
+        await db.execute(insert(User), [
+            {"id": DONOR, "email": "donor@x.com", "nickname": "donor", "password_hash": "x",
+             "electrolyte_number": balance},
+            {"id": AUTHOR, "email": "author@x.com", "nickname": "author", "password_hash": "x",
+             "electrolyte_number": 0.0},
+        ])
+        await db.execute(insert(Topic).values(
+            id=TOPIC_ID, title="bench", content="c", prompt="p", status="approved", is_active=True,
+        ))
+        await db.execute(insert(TopicAuthor).values(
+            topic_id=TOPIC_ID, user_id=AUTHOR, is_primary=True, electrolyte_share=100.0,
+        ))
+        await db.commit()
+
+
+async def main(args):
+    await reset_db()
+    # 余额只够一半的投喂成功，同时覆盖成功与余额不足两条路径
+    balance = args.donations * args.amount / 2
+    await _seed(balance)
+
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def donate():
+        async with sem:
+            with Timer() as t:
+                async with get_sessionmaker()() as db:
+                    result = await topic_service.donate_electrolyte(db, DONOR, TOPIC_ID, args.amount)
+            latencies.append(t.ms)
+            return result["success"]
+
+    with Timer() as total:
+        results = await asyncio.gather(*(donate() for _ in range(args.donations)))
+
+    async with get_sessionmaker()() as db:
+        final = (await db.execute(select(User.electrolyte_number).where(User.id == DONOR))).scalar_one()
+        ledger = (await db.execute(
+            select(func.sum(ElectrolyteLog.amount)).where(ElectrolyteLog.user_id == DONOR)
+        )).scalar_one() or 0.0
+    await get_engine().dispose()
+
+    ok = sum(results)
+    p50, p99, worst = percentiles(latencies)
+    print(f"{args.donations} 次投喂（并发 {args.concurrency}）：{total.ms / 1000:.2f}s，"
+          f"{args.donations / (total.ms / 1000):.0f} 次/秒")
+    print(f"延迟 p50 {p50:.1f}ms  p99 {p99:.1f}ms  max {worst:.1f}ms")
+    print(f"成功 {ok}，余额 {balance} -> {final}，付款方流水合计 {ledger}")
+
+    assert final >= 0, "余额为负"
+    assert final == balance - ok * args.amount, "成功次数与扣款不一致"
+    assert ledger == -ok * args.amount, "流水与余额不一致"
+    print("校验通过")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--donations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--amount", type=float, default=1.0)
+    asyncio.run(main(parser.parse_args()))
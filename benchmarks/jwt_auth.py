@@ -0,0 +1,115 @@
+# benchmarks/jwt_auth.py
+"""
+JWT 鉴权微基准
+
+- jwt.decode：每次完整 HMAC 验签 + claims 校验（缓存前的 decode_access_token）
+- decode（未命中）：decode_access_token，令牌缓存关闭（max_entries=0）
+- decode（命中）：decode_access_token，同一令牌命中缓存
+- get_current_user：依赖项整体（读 cookie + decode + 解析 sub），缓存命中
+- 端到端（--http）：经 ASGI 请求 GET /api/user/profile（鉴权 + 请求级 User + 签到查询），
+  令牌缓存关闭 / 开启各跑一轮，统计每请求耗时与 SQL 语句数
+
+用法:
+    python benchmarks/jwt_auth.py [--calls 20000] [--http 1000]
+"""
+
+import argparse
+import asyncio
+from datetime import date
+
+from _common import Timer, reset_db  # 必须先于 backend 导入
+
+from jose import jwt
+from sqlalchemy import event, insert
+
+from backend.core import security
+from backend.core.dependencies import get_current_user
+from backend.db.database import get_engine, get_sessionmaker
+from backend.db.models import User
+
+
+class _Request:
+    """get_current_user 只读取 cookies"""
+
+    def __init__(self, token: str):
+        self.cookies = {"access_token": token}
+
+
+def _per_call_us(fn, calls: int) -> float:
+    with Timer() as t:
+        for _ in range(calls):
+            fn()
+    return t.ms * 1000 / calls
+
+
+async def _per_call_us_async(fn, calls: int) -> float:
+    with Timer() as t:
+        for _ in range(calls):
+            await fn()
+    return t.ms * 1000 / calls
+
+
+async def _http(token: str, requests: int):
+    import httpx
+    import main
+
+    await reset_db()
+    async with get_sessionmaker()() as db:
+        # 已签到，避免首个请求写入签到流水
+        await db.execute(insert(User).values(
+            id=1, email="u1@x.com", nickname="u1", password_hash="x",
+            electrolyte_number=0.0, last_login_date=date.today(),
+        ))
+        await db.commit()
+
+    statements = []
+    event.listen(get_engine().sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, *args: statements.append(sql))
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 cookies={"access_token": token}) as client:
+        for label, max_entries in (("缓存关闭", 0), ("缓存开启", 10000)):
+            security.configure_token_cache(max_entries=max_entries)
+            response = await client.get("/api/user/profile")
+            assert response.status_code == 200, response.text
+            statements.clear()
+            with Timer() as t:
+                for _ in range(requests):
+                    await client.get("/api/user/profile")
+            print(f"GET /api/user/profile（{label}） {t.ms / requests:6.2f} ms/请求  "
+                  f"SQL {len(statements) / requests:.1f} 条/请求")
+    await get_engine().dispose()
+
+
+async def main(args):
+    token = security.create_access_token({"sub": "1"})
+    request = _Request(token)
+
+    raw = _per_call_us(
+        lambda: jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM]), args.calls
+    )
+
+    security.configure_token_cache(max_entries=0)
+    miss = _per_call_us(lambda: security.decode_access_token(token), args.calls)
+
+    security.configure_token_cache()
+    security.decode_access_token(token)
+    hit = _per_call_us(lambda: security.decode_access_token(token), args.calls)
+    dependency = await _per_call_us_async(lambda: get_current_user(request), args.calls)
+
+    print(f"jwt.decode               {raw:8.2f} us/次")
+    print(f"decode（缓存关闭）       {miss:8.2f} us/次")
+    print(f"decode（缓存命中）       {hit:8.2f} us/次")
+    print(f"get_current_user（命中） {dependency:8.2f} us/次")
+    print(f"缓存指标 {security._token_cache.metrics()}")
+
+    if args.http:
+        await _http(token, args.http)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--http", type=int, default=1000, help="端到端请求数，0 跳过")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,127 @@
+# benchmarks/session_list.py
+"""
+会话列表基准（GET /api/sessions 的数据库部分）
+
+造 1 个用户 × N 个会话 × M 条消息（默认 1k × 50），对比：
+- n+1：改造前的写法，逐会话查询最后一条消息（每次读取该会话全部消息行）
+- full：session_crud.get_user_sessions（列表一条查询 + 最后消息一条批量查询）
+- page1：get_user_sessions_page(limit)
+- all-pages：按游标翻完全部页
+
+用法:
+    python benchmarks/session_list.py [--sessions 1000] [--messages 50] [--limit 20] [--repeat 5] [--skip-n-plus-one]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from _common import Timer, percentiles, reset_db  # 必须先于 backend 导入
+
+from sqlalchemy import insert, select
+
+from backend.db.database import get_engine, get_sessionmaker
+from backend.db.models import Message, Session, User
+from backend.db.crud import session as session_crud
+
+USER_ID = 1
+
+
+async def _seed(sessions: int, messages: int):
+    now = datetime(2025, 1, 1)
+    async with get_sessionmaker()() as db:
+        await db.execute(insert(User).values(
+            id=USER_ID, email="u1@x.com", nickname="u1", password_hash="x", electrolyte_number=0.0,
+        ))
+        await db.execute(insert(Session), [
+            {"id": f"s{i:06d}", "user_id": USER_ID, "mode": 2, "is_completed": i % 3 == 0,
+             "created_at": now + timedelta(minutes=i), "updated_at": now + timedelta(minutes=i)}
+            for i in range(sessions)
+        ])
+        batch = []
+        for i in range(sessions):
+            for j in range(messages):
+                batch.append({
+                    "session_id": f"s{i:06d}", "role": "user" if j % 2 == 0 else "assistant",
+                    "content": f"会话{i}第{j}条消息" * 5,
+                    "created_at": now + timedelta(minutes=i, seconds=j),
+                })
+            if len(batch) >= 10000:
+                await db.execute(insert(Message), batch)
+                batch = []
+        if batch:
+            await db.execute(insert(Message), batch)
+        await db.commit()
+
+
+async def _n_plus_one(db):
+    """改造前：会话全列 + 逐会话读取全部消息取第一条"""
+    sessions = (await db.execute(
+        select(Session)
+        .where(Session.user_id == USER_ID, Session.deleted_at.is_(None))
+        .order_by(Session.created_at.desc())
+    )).scalars().all()
+    out = []
+    for s in sessions:
+        last = (await db.execute(
+            select(Message).where(Message.session_id == s.id).order_by(Message.created_at.desc())
+        )).scalars().first()
+        out.append((s.id, last.content if last else ""))
+    return out
+
+
+async def _full(db):
+    return await session_crud.get_user_sessions(db, USER_ID)
+
+
+def _first_page(limit):
+    async def run(db):
+        return (await session_crud.get_user_sessions_page(db, USER_ID, limit))[0]
+    return run
+
+
+def _all_pages(limit):
+    async def run(db):
+        items, cursor = await session_crud.get_user_sessions_page(db, USER_ID, limit)
+        while cursor:
+            page, cursor = await session_crud.get_user_sessions_page(db, USER_ID, limit, cursor)
+            items += page
+        return items
+    return run
+
+
+async def _measure(name, fn, repeat, expected):
+    samples = []
+    for _ in range(repeat):
+        # 每次新会话：不复用 identity map
+        async with get_sessionmaker()() as db:
+            with Timer() as t:
+                rows = await fn(db)
+        samples.append(t.ms)
+        assert len(rows) == expected, (name, len(rows), expected)
+    p50, p99, worst = percentiles(samples)
+    print(f"{name:<10} p50 {p50:9.1f}ms  p99 {p99:9.1f}ms  max {worst:9.1f}ms  （{expected} 条）")
+
+
+async def main(args):
+    await reset_db()
+    with Timer() as t:
+        await _seed(args.sessions, args.messages)
+    print(f"造数 {args.sessions} 会话 × {args.messages} 消息：{t.ms / 1000:.1f}s")
+
+    if not args.skip_n_plus_one:
+        await _measure("n+1", _n_plus_one, max(1, args.repeat // 5), args.sessions)
+    await _measure("full", _full, args.repeat, args.sessions)
+    await _measure("page1", _first_page(args.limit), args.repeat, min(args.limit, args.sessions))
+    await _measure("all-pages", _all_pages(args.limit), args.repeat, args.sessions)
+    await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-n-plus-one", action="store_true", help="跳过改造前写法（数据量大时很慢）")
+    asyncio.run(main(parser.parse_args()))
@@ -24,6 +24,7 @@ import { request, API_BASE } from './client.js';
  * @property {() => void} onQuit                      - 收到 user_want_quit 事件
  * @property {(event: object) => void} [onSystemCard] - 收到系统卡片类事件（占位，供未来扩展）
  * @property {(event: object) => void} [onReportMeta] - 收到报告元信息更新（完整性/置信度等）
+ * @property {(event: object) => void} [onModeration] - 模型回复命中敏感词（action: flagged/redacted，positions）
  * @property {() => void} [onEmptyStream]              - 流结束但未收到任何内容（兜底）
  */
 
@@ -43,6 +44,7 @@ export async function stream(payload, callbacks, signal) {
         onQuit = () => {},
         onSystemCard = () => {},
         onReportMeta = () => {},
+        onModeration = () => {},
         onEmptyStream = () => {},
         onReportGenerating = () => {}, 
     } = callbacks;
@@ -117,6 +119,11 @@ export async function stream(payload, callbacks, signal) {
                     continue;
                 }
 
+                if (event.type === 'moderation') {
+                    onModeration(event);
+                    continue;
+                }
+
                 if (event.type === 'end') {
                     onEnd(event);
                     continue;
@@ -0,0 +1,73 @@
+/**
+ * 事件推送 API（SSE）
+ * 对应后端：backend/api/events_api.py
+ *
+ * 全页面共享一条 EventSource 连接：
+ *   const off = api.events.subscribe(event => { ... });
+ *   off();   // 取消订阅；没有订阅者时自动断开
+ *
+ * 事件类型：connected / report_ready / summary_ready / notification
+ * 断线由浏览器自动重连；重连成功会再次收到 connected，订阅方应借此补拉状态。
+ */
+
+import { API_BASE } from './client.js';
+
+const _handlers = new Set();
+let _source = null;
+let _connected = false;
+
+function _open() {
+    if (_source || typeof EventSource === 'undefined') return;
+    _source = new EventSource(`${API_BASE}/events/stream`, { withCredentials: true });
+
+    _source.onmessage = (e) => {
+        let event;
+        try {
+            event = JSON.parse(e.data);
+        } catch (err) {
+            return;
+        }
+        if (event.type === 'connected') _connected = true;
+        _handlers.forEach(h => {
+            try { h(event); } catch (err) { console.error(err); }
+        });
+    };
+
+    _source.onerror = () => {
+        _connected = false;
+        // 401 等导致连接被关闭时不再重连，由订阅方的兜底轮询接管
+        if (_source && _source.readyState === EventSource.CLOSED) {
+            _source = null;
+        }
+    };
+}
+
+function _close() {
+    if (_source) {
+        _source.close();
+        _source = null;
+    }
+    _connected = false;
+}
+
+/**
+ * 订阅当前用户的事件
+ * @param {(event: object) => void} handler
+ * @returns {() => void} 取消订阅
+ */
+export function subscribe(handler) {
+    _handlers.add(handler);
+    _open();
+    return () => {
+        _handlers.delete(handler);
+        if (_handlers.size === 0) _close();
+    };
+}
+
+/**
+ * 推送通道当前是否可用（不可用时调用方应退回到较快的轮询）
+ * @returns {boolean}
+ */
+export function isConnected() {
+    return _connected;
+}
@@ -10,6 +10,7 @@
 
 import * as auth     from './auth.js';
 import * as chat     from './chat.js';
+import * as events   from './events.js';
 import * as sessions from './sessions.js';
 import * as topics   from './topics.js';
 import * as traits   from './traits.js';
@@ -18,6 +19,7 @@ import * as user     from './user.js';
 export default {
     auth,
     chat,
+    events,
     sessions,
     topics,
     traits,
@@ -25,4 +27,4 @@ export default {
 };
 
 // 也允许按模块解构导入
-export { auth, chat, sessions, topics, traits, user };
+export { auth, chat, events, sessions, topics, traits, user };
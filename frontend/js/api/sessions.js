@@ -13,6 +13,19 @@ export async function list() {
     return request('/sessions');
 }
 
+/**
+ * 游标分页获取会话列表（按创建时间倒序）
+ * @param {number} limit
+ * @param {string|null} cursor  上一页返回的 next_cursor，首页不传
+ * @returns {Promise<{sessions: Array, next_cursor: string|null}>}
+ */
+export async function listPage(limit = 20, cursor = null) {
+    const query = cursor
+        ? `?limit=${limit}&cursor=${encodeURIComponent(cursor)}`
+        : `?limit=${limit}`;
+    return request(`/sessions${query}`);
+}
+
 /**
  * 获取某个会话的完整内容（含 messages）
  * @param {string} sessionId
@@ -47,7 +60,7 @@ export async function remove(sessionId) {
 /**
  * 查询报告状态
  * @param {string} sessionId
- * @returns {Promise<{ready: boolean, session_id: string}>}
+ * @returns {Promise<{ready: boolean, session_id: string, summary: string, summary_ready: boolean}>}
  */
 export async function reportStatus(sessionId) {
     return request(`/sessions/${sessionId}/report_status`);
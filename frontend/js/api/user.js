@@ -3,7 +3,7 @@
  * 对应后端：backend/api/user_api.py
  */
 
-import { request } from './client.js';
+import { request, API_BASE } from './client.js';
 
 /**
  * 获取当前用户信息
@@ -65,11 +65,13 @@ export async function changeNickname(newNickname) {
 /**
  * 查询昵称修改历史
  * @param {number} [limit=10]
- * @param {number} [offset=0]
- * @returns {Promise<object>}
+ * @param {string|null} [cursor=null] - 上一页返回的 next_cursor
+ * @returns {Promise<{history: Array, next_cursor: string|null}>}
  */
-export async function nicknameHistory(limit = 10, offset = 0) {
-    return request(`/user/nickname/history?limit=${limit}&offset=${offset}`);
+export async function nicknameHistory(limit = 10, cursor = null) {
+    const params = new URLSearchParams({ limit });
+    if (cursor) params.set('cursor', cursor);
+    return request(`/user/nickname/history?${params}`);
 }
 
 /**
@@ -91,10 +93,24 @@ export async function searchUser(query, limit = 5) {
 }
 
 /**
- * 查询电解液明细
+ * 查询电解液明细（键集翻页）
+ * @param {string|null} [cursor=null] - 上一页返回的 next_cursor
+ * @param {number} [limit=20]
+ * @returns {Promise<{logs: Array, next_cursor: string|null}>}
+ */
+export async function electrolyteDetail(cursor = null, limit = 20) {
+    const params = new URLSearchParams({ limit });
+    if (cursor) params.set('cursor', cursor);
+    return request(`/user/electrolyte/detail?${params}`);
+}
+
+/**
+ * 电解液流水导出地址（浏览器直接下载，Cookie 鉴权）
+ * @param {'csv'|'ndjson'} [format='csv']
+ * @returns {string}
  */
-export async function electrolyteDetail(skip = 0, limit = 20) {
-    return request(`/user/electrolyte/detail?skip=${skip}&limit=${limit}`);
+export function electrolyteExportUrl(format = 'csv') {
+    return `${API_BASE}/user/electrolyte/export?format=${format}`;
 }
 
 /**
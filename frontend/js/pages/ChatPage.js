@@ -247,6 +247,7 @@ export const ChatPage = {
     const isStreaming = ref(false);
     const isCompleted = ref(false);
     const summary = ref('');
+    const summaryPending = ref(false);
     const reportReady = ref(false);
     const reportPolling = ref(false);
     const currentAiMsg = ref(null);
@@ -271,6 +272,7 @@ export const ChatPage = {
     let outputQueue = [];
     let typewriterTimer = null;
     let pollTimer = null;
+    let unsubscribeEvents = null;
     let userScrolledUp = false;
 
     const canSend = computed(() => inputText.value.trim() && !isStreaming.value && !topicUnavailable.value && !isCompleted.value);
@@ -462,14 +464,20 @@ export const ChatPage = {
       }
     }
 
-    function syncEndState(event = {}) {
-      summary.value = String(event.summary || '').trim();
+    function applySummary(text) {
+      summary.value = String(text || '').trim();
       if (summary.value) {
         insertSystemCard({
           title: '当前阶段总结',
           content: summary.value,
         });
       }
+    }
+
+    function syncEndState(event = {}) {
+      // fast-end：总结在后台生成，与报告就绪一起经推送（或兜底轮询）获取
+      summaryPending.value = Boolean(event.summary_pending);
+      applySummary(event.summary);
 
       if (Array.isArray(event.insights) && event.insights.length) {
         insertSystemCard({
@@ -535,7 +543,7 @@ export const ChatPage = {
             currentAiMsg.value = null;
             isCompleted.value = true;
             syncEndState(event);
-            if (event.report_ready) {
+            if (event.report_ready && !summaryPending.value) {
               reportReady.value = true;
               loadSessionReport();
             } else {
@@ -587,24 +595,63 @@ export const ChatPage = {
       currentAiMsg.value = null;
     }
 
+    // 报告/总结就绪以推送为主；推送不可用时 3 秒轮询，可用时只做 15 秒兜底
+    function stopReportPolling() {
+      reportPolling.value = false;
+      if (pollTimer) clearTimeout(pollTimer);
+      pollTimer = null;
+      if (unsubscribeEvents) unsubscribeEvents();
+      unsubscribeEvents = null;
+    }
+
+    async function checkReportStatus() {
+      try {
+        const res = await api.sessions.reportStatus(sessionId);
+        applyReportMeta(res);
+        if (summaryPending.value && res.summary_ready) {
+          summaryPending.value = false;
+          applySummary(res.summary);
+        }
+        if (res.ready && !reportReady.value) {
+          reportReady.value = true;
+          await loadSessionReport();
+        }
+      } catch (e) {
+        // 静默忽略轮询错误
+      }
+      if (reportReady.value && !summaryPending.value) stopReportPolling();
+    }
+
+    function scheduleReportPoll() {
+      if (pollTimer) clearTimeout(pollTimer);
+      pollTimer = setTimeout(async () => {
+        await checkReportStatus();
+        if (reportPolling.value) scheduleReportPoll();
+      }, api.events.isConnected() ? 15000 : 3000);
+    }
+
+    function handleSessionEvent(event) {
+      if (event.type === 'connected') {
+        // 连接（或重连）前可能已经错过事件：补查一次
+        checkReportStatus();
+        return;
+      }
+      if (event.session_id !== sessionId) return;
+
+      if (event.type === 'summary_ready' && summaryPending.value) {
+        summaryPending.value = false;
+        applySummary(event.summary);
+      } else if (event.type === 'report_ready' && !reportReady.value) {
+        reportReady.value = true;
+        loadSessionReport();
+      }
+      if (reportReady.value && !summaryPending.value) stopReportPolling();
+    }
+
     function startReportPolling() {
       reportPolling.value = true;
-      if (pollTimer) clearInterval(pollTimer);
-      pollTimer = setInterval(async () => {
-        try {
-          const res = await api.sessions.reportStatus(sessionId);
-          applyReportMeta(res);
-          if (res.ready) {
-            reportReady.value = true;
-            reportPolling.value = false;
-            clearInterval(pollTimer);
-            pollTimer = null;
-            await loadSessionReport();
-          }
-        } catch (e) {
-          // 静默忽略轮询错误
-        }
-      }, 3000);
+      if (!unsubscribeEvents) unsubscribeEvents = api.events.subscribe(handleSessionEvent);
+      scheduleReportPoll();
     }
 
     async function forceEnd() {
@@ -645,7 +692,7 @@ export const ChatPage = {
             currentAiMsg.value = null;
             isCompleted.value = true;
             syncEndState(event);
-            if (event.report_ready) {
+            if (event.report_ready && !summaryPending.value) {
               reportReady.value = true;
               loadSessionReport();
             } else {
@@ -721,16 +768,13 @@ export const ChatPage = {
           if (completed) {
             wasCompleted.value = true;
             isCompleted.value = true;
-            summary.value = String(detail.summary || '').trim();
-            if (summary.value) {
-              insertSystemCard({
-                title: '当前阶段总结',
-                content: summary.value,
-              });
-            }
+            applySummary(detail.summary);
 
             try {
               const r = await api.sessions.reportStatus(sessionId);
+              if (!summary.value && r.summary_ready) {
+                applySummary(r.summary);
+              }
               reportReady.value = r.ready;
               applyReportMeta(r);
               if (r.ready) {
@@ -763,7 +807,7 @@ export const ChatPage = {
 
     onUnmounted(() => {
       unlockPageScroll();
-      if (pollTimer) clearInterval(pollTimer);
+      stopReportPolling();
       if (typewriterTimer) clearInterval(typewriterTimer);
       if (abortController.value) abortController.value.abort();
     });
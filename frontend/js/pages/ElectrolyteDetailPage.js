@@ -56,7 +56,10 @@ export const ElectrolyteDetailPage = {
         </div>
 
         <!-- 时间线明细 -->
-        <h3 style="font-size:15px;font-weight:600;margin:24px 0 12px">明细记录</h3>
+        <h3 style="font-size:15px;font-weight:600;margin:24px 0 12px">
+          明细记录
+          <a :href="exportUrl" download style="float:right;font-size:13px;font-weight:400">导出 CSV</a>
+        </h3>
         <div v-if="loading" class="page-loading"><div class="page-spinner"></div></div>
         <div v-else-if="logs.length" class="elec-timeline">
           <div v-for="log in logs" :key="log.id" class="elec-log-item">
@@ -91,9 +94,10 @@ export const ElectrolyteDetailPage = {
     const loadingMore = ref(false);
     const logs = ref([]);
     const summary = ref(null);
-    const skip = ref(0);
+    const cursor = ref(null);
     const limit = 20;
     const hasMore = ref(false);
+    const exportUrl = api.user.electrolyteExportUrl('csv');
 
     function formatDate(t) {
       if (!t) return '';
@@ -106,9 +110,10 @@ export const ElectrolyteDetailPage = {
 
     async function loadLogs() {
       try {
-        const res = await api.user.electrolyteDetail(skip.value, limit);
+        const res = await api.user.electrolyteDetail(cursor.value, limit);
         logs.value.push(...(res.logs || []));
-        hasMore.value = (res.logs || []).length >= limit;
+        cursor.value = res.next_cursor || null;
+        hasMore.value = !!res.next_cursor;
       } catch (e) {
         toast.error('加载失败');
       }
@@ -116,7 +121,6 @@ export const ElectrolyteDetailPage = {
 
     async function loadMore() {
       loadingMore.value = true;
-      skip.value += limit;
       await loadLogs();
       loadingMore.value = false;
     }
@@ -133,7 +137,7 @@ export const ElectrolyteDetailPage = {
     });
 
     return {
-      user, loading, loadingMore, logs, summary, hasMore,
+      user, loading, loadingMore, logs, summary, hasMore, exportUrl,
       formatDate, reasonLabel, loadMore,
     };
   }
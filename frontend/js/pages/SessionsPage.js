@@ -44,6 +44,11 @@ export const SessionsPage = {
               <button class="btn btn-sm btn-ghost" @click.stop="confirmDelete(s)" style="color:var(--error)">删除</button>
             </div>
           </div>
+          <div v-if="nextCursor" style="text-align:center;padding:16px">
+            <button class="btn btn-secondary btn-sm" @click="loadMore" :disabled="loadingMore">
+              {{ loadingMore ? '加载中...' : '加载更多' }}
+            </button>
+          </div>
         </div>
       </div>
 
@@ -66,7 +71,10 @@ export const SessionsPage = {
     const toast = useToast();
 
     const loading = ref(true);
+    const loadingMore = ref(false);
     const sessions = ref([]);
+    const nextCursor = ref(null);
+    const PAGE_SIZE = 20;
     const showDeleteConfirm = ref(false);
     const deleteTarget = ref(null);
 
@@ -109,18 +117,27 @@ export const SessionsPage = {
       showDeleteConfirm.value = false;
     }
 
+    async function loadPage() {
+      const res = await api.sessions.listPage(PAGE_SIZE, nextCursor.value);
+      sessions.value.push(...(res.sessions || []));
+      nextCursor.value = res.next_cursor || null;
+    }
+
+    async function loadMore() {
+      loadingMore.value = true;
+      try { await loadPage(); } catch (e) { toast.error('加载失败'); }
+      loadingMore.value = false;
+    }
+
     onMounted(async () => {
-      try {
-        const res = await api.sessions.list();
-        sessions.value = Array.isArray(res) ? res : (res.sessions || []);
-      } catch (e) { toast.error('加载失败'); }
+      try { await loadPage(); } catch (e) { toast.error('加载失败'); }
       loading.value = false;
     });
 
     return {
-      loading, sessions, showDeleteConfirm, formatTime,
+      loading, loadingMore, sessions, nextCursor, showDeleteConfirm, formatTime,
       sessionTitle, sessionUnavailableReason, isSessionCompleted,
-      goSession, confirmDelete, doDelete,
+      goSession, confirmDelete, doDelete, loadMore,
     };
   }
 };
@@ -5,6 +5,8 @@
  *  - 后端 notifications 表有记录就亮红点，没有就灭
  *  - 用户查看/编辑某个话题 → 调用后端删除该话题的通知 → 红点消失
  *  - 前端不做任何推导，不依赖 localStorage 或内存 Set
+ *  - 后端写入通知后经 /api/events/stream 推送，收到即重新拉取；
+ *    推送不可用时退回每 60 秒轮询，可用时只做 5 分钟兜底
  *
  * 每日签到：
  *  - 由 fetchProfile 触发（后端在 GET /user/profile 时自动签到）
@@ -30,8 +32,9 @@ const state = reactive({
   hasTopicUpdates: false,
 });
 
-// 通知轮询定时器
+// 通知轮询定时器 / 事件订阅
 let _notificationTimer = null;
+let _unsubscribeEvents = null;
 
 // ----------------------------------------------------------
 // Actions
@@ -82,21 +85,35 @@ const actions = {
     }
   },
 
-  // 开启通知轮询（每60秒）
+  // 开启通知推送订阅 + 兜底轮询
   startNotificationPolling() {
     this.stopNotificationPolling();
     this.fetchTopicNotifications();
-    _notificationTimer = setInterval(() => {
-      this.fetchTopicNotifications();
-    }, 60000);
+    _unsubscribeEvents = api.events.subscribe(event => {
+      // connected：首次连接或断线重连，补拉一次
+      if (event.type === 'notification' || event.type === 'connected') {
+        this.fetchTopicNotifications();
+      }
+    });
+    const schedule = () => {
+      _notificationTimer = setTimeout(() => {
+        this.fetchTopicNotifications();
+        schedule();
+      }, api.events.isConnected() ? 300000 : 60000);
+    };
+    schedule();
   },
 
-  // 停止通知轮询
+  // 停止通知推送订阅与轮询
   stopNotificationPolling() {
     if (_notificationTimer) {
-      clearInterval(_notificationTimer);
+      clearTimeout(_notificationTimer);
       _notificationTimer = null;
     }
+    if (_unsubscribeEvents) {
+      _unsubscribeEvents();
+      _unsubscribeEvents = null;
+    }
   },
 
   /**
@@ -6,7 +6,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.llm_client.factory import load_llm_client
+from backend.utils.prompt_loader import configure_prompts
 from backend.services.chat_service import ChatService
+from backend.services.job_queue import JobQueue
+from backend.services.event_bus import configure_event_bus
+from backend.services.db_history_manager import configure_history_cache
+from backend.services.topic_counters import configure_topic_counters
+from backend.services.topic_search import configure_topic_search
+from backend.utils.sensitive_words import configure_sensitive_word_cache
+from backend.core.security import configure_token_cache, configure_password_hasher
+from backend.services import electrolyte_service
 from backend.api.auth_api import router as auth_router
 from backend.api.user_api import router as user_router
 from backend.api.chat_api import create_chat_router
@@ -14,6 +23,7 @@ from backend.api.topic_api import router as topic_router_new
 from backend.api.traits_api import router as traits_router
 from backend.api.session_api import router as session_router
 from backend.api.report_api import router as report_router
+from backend.api.events_api import router as events_router
 from backend.db.database import engine
 from backend.admin_panel import create_admin
 
@@ -35,6 +45,41 @@ def _load_config(path: str = "backend/config.json") -> dict:
     config["api_key"] = os.getenv("LLM_API_KEY", config.get("api_key", ""))
     config["model"] = os.getenv("LLM_MODEL", config.get("model", "deepseek-chat"))
 
+    # 流水线对话模式（逗号分隔的 mode 列表，如 "1,2"），便于按 mode 做 A/B
+    pipelined = os.getenv("CHAT_PIPELINED_MODES")
+    if pipelined is not None:
+        config["pipelined_modes"] = [int(m) for m in pipelined.split(",") if m.strip()]
+    else:
+        config["pipelined_modes"] = config.get("pipelined_modes", [])
+
+    # 结束对话时是否先返回 end、再后台生成总结（默认开启）
+    fast_end = os.getenv("CHAT_FAST_END")
+    if fast_end is not None:
+        config["fast_end"] = fast_end.lower() not in ("0", "false", "no")
+    else:
+        config["fast_end"] = bool(config.get("fast_end", True))
+
+    # model1 输出审核：off / flag / redact（默认 off）
+    moderation = config.get("moderation") or {}
+    moderation_mode = os.getenv("CHAT_MODERATION")
+    if moderation_mode:
+        moderation = {**moderation, "mode": moderation_mode}
+    config["moderation"] = moderation
+
+    # 事件推送后端：local（单 worker）/ database（多 worker 共享 user_events 表）
+    event_bus = config.get("event_bus") or {}
+    event_bus_backend = os.getenv("EVENT_BUS_BACKEND")
+    if event_bus_backend:
+        event_bus = {**event_bus, "backend": event_bus_backend}
+    config["event_bus"] = event_bus
+
+    # 提示词热加载（修改 backend/prompts/ 后无需重启，默认关闭）
+    prompts = config.get("prompts") or {}
+    hot_reload = os.getenv("PROMPT_HOT_RELOAD")
+    if hot_reload is not None:
+        prompts = {**prompts, "hot_reload": hot_reload.lower() not in ("0", "false", "no")}
+    config["prompts"] = prompts
+
     if config["provider"] != "mock" and not config["api_key"]:
         raise RuntimeError(
             "未找到 LLM API Key，请设置环境变量 LLM_API_KEY 或在 config.json 中配置"
@@ -44,8 +89,27 @@ def _load_config(path: str = "backend/config.json") -> dict:
 
 
 config = _load_config()
+configure_prompts(**config["prompts"])
 llm_client = load_llm_client(config)
-chat_service = ChatService(llm_client)
+job_queue = JobQueue(**config.get("jobs", {}))
+event_bus = configure_event_bus(**config["event_bus"])
+history_cache = configure_history_cache(**config.get("history_cache", {}))
+topic_counters = configure_topic_counters(**config.get("topic_counters", {}))
+topic_search = configure_topic_search(**config.get("topic_search", {}))
+sensitive_word_cache = configure_sensitive_word_cache(**config.get("sensitive_words", {}))
+token_cache = configure_token_cache(**config.get("token_cache", {}))
+password_hasher = configure_password_hasher(**config.get("password_hashing", {}))
+job_queue.register(electrolyte_service.SUMMARY_REBUILD_JOB, electrolyte_service.run_summary_rebuild_job)
+job_queue.add_recovery_hook(electrolyte_service.recover_missing_summaries)
+chat_service = ChatService(
+    llm_client,
+    pipelined_modes=config["pipelined_modes"],
+    job_queue=job_queue,
+    fast_end=config["fast_end"],
+    history=config.get("history", {}),
+    traits=config.get("traits", {}),
+    moderation=config.get("moderation", {}),
+)
 
 
 # ============================================================
@@ -53,8 +117,17 @@ chat_service = ChatService(llm_client)
 # ============================================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await event_bus.start()
+    await job_queue.start()
+    await topic_counters.start()
+    await topic_search.start()
     yield
+    await topic_search.stop()
+    await topic_counters.stop()
+    await job_queue.stop()
+    await event_bus.stop()
     await llm_client.close()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -95,6 +168,7 @@ app.include_router(topic_router_new, prefix="/api")
 app.include_router(traits_router, prefix="/api")
 app.include_router(session_router, prefix="/api")
 app.include_router(report_router, prefix="/api")
+app.include_router(events_router, prefix="/api")
 
 # ============================================================
 # 初始化管理后台
@@ -108,3 +182,23 @@ admin = create_admin(app, engine)
 @app.get("/")
 async def health_check():
     return {"status": "ok"}
+
+
+# ============================================================
+# 运行时指标（仅内网：nginx 只代理 /api 与 /admin）
+# ============================================================
+@app.get("/metrics")
+async def runtime_metrics():
+    return {
+        "llm": llm_client.metrics(),
+        "jobs": job_queue.metrics(),
+        "events": event_bus.metrics(),
+        "history": chat_service.history.metrics(),
+        "history_cache": history_cache.metrics(),
+        "topic_counters": topic_counters.metrics(),
+        "topic_search": topic_search.metrics(),
+        "sensitive_words": sensitive_word_cache.metrics(),
+        "token_cache": token_cache.metrics(),
+        "password_hasher": password_hasher.metrics(),
+    }
+
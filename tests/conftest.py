@@ -0,0 +1,54 @@
+# tests/conftest.py
+"""
+测试公共设置
+
+- 在导入 backend 之前设置环境变量：临时 SQLite 库、测试用 JWT 密钥、mock LLM
+- arun 夹具：arun(coro) 在新事件循环中执行，结束前释放连接池（aiosqlite 连接不能跨事件循环复用）
+- fresh_db 夹具：按 models.py 重建全部表
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_DB_FILE = os.path.join(tempfile.mkdtemp(prefix="metalks-test-"), "test.db")
+# 强制使用临时库：fresh_db 会 drop_all，绝不能落到 .env 里配置的真实数据库；
+# SQLite 写入串行，并发测试需要较长的忙等超时
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_FILE}?timeout=30"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("LLM_PROVIDER", "mock")
+
+import pytest
+
+from backend.db.database import Base, get_engine
+
+
+def run(coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await get_engine().dispose()
+
+    return asyncio.run(_main())
+
+
+@pytest.fixture
+def arun():
+    return run
+
+
+@pytest.fixture
+def fresh_db():
+    async def _reset():
+        async with get_engine().begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    run(_reset())
+    yield
@@ -0,0 +1,120 @@
+# tests/test_electrolyte_concurrency.py
+"""
+电解液并发扣款测试
+
+- 多个会话同时对同一余额投喂 / 扣款：余额永不为负，成功次数 × 金额 == 实际扣除
+- 流水与余额对账：每个用户流水金额之和 == 余额变化
+- 余额不足时 deduct_electrolyte 不回滚调用方事务
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import ElectrolyteLog, Topic, TopicAuthor, User
+from backend.db.crud import electrolyte as electrolyte_crud
+from backend.services import topic_service
+
+DONOR, AUTHOR_A, AUTHOR_B = 1, 2, 3
+TOPIC_ID = 1
+START_BALANCE = 100.0
+
+
+async def _seed():
+    async with get_sessionmaker()() as db:
+        await db.execute(insert(User), [
+            {"id": uid, "email": f"u{uid}@x.com", "nickname": f"u{uid}", "password_hash": "x",
+             "electrolyte_number": START_BALANCE if uid == DONOR else 0.0}
+            for uid in (DONOR, AUTHOR_A, AUTHOR_B)
+        ])
+        await db.execute(insert(Topic).values(
+            id=TOPIC_ID, title="t", content="c", prompt="p", status="approved", is_active=True,
+        ))
+        await db.execute(insert(TopicAuthor), [
+            {"topic_id": TOPIC_ID, "user_id": AUTHOR_A, "is_primary": True, "electrolyte_share": 70.0},
+            {"topic_id": TOPIC_ID, "user_id": AUTHOR_B, "is_primary": False, "electrolyte_share": 30.0},
+        ])
+        await db.commit()
+
+
+async def _balances_and_ledger():
+    async with get_sessionmaker()() as db:
+        balances = dict((await db.execute(select(User.id, User.electrolyte_number))).all())
+        ledger = dict((await db.execute(
+            select(ElectrolyteLog.user_id, func.sum(ElectrolyteLog.amount)).group_by(ElectrolyteLog.user_id)
+        )).all())
+        received = (await db.execute(
+            select(Topic.electrolyte_received).where(Topic.id == TOPIC_ID)
+        )).scalar_one()
+    return balances, ledger, received
+
+
+async def _donate(amount):
+    async with get_sessionmaker()() as db:
+        result = await topic_service.donate_electrolyte(db, DONOR, TOPIC_ID, amount)
+    assert result["user_balance"] >= 0
+    return result["success"]
+
+
+async def _deduct(amount):
+    async with get_sessionmaker()() as db:
+        success, _, balance = await electrolyte_crud.deduct_electrolyte(db, DONOR, amount, reason="change_nickname")
+    assert balance >= 0
+    return success
+
+
+def test_parallel_donations_never_overspend(arun, fresh_db):
+    async def scenario():
+        await _seed()
+        # 40 × 7 = 280，远超余额 100：最多 14 次成功
+        results = await asyncio.gather(*(_donate(7.0) for _ in range(40)))
+        return results, await _balances_and_ledger()
+
+    results, (balances, ledger, received) = arun(scenario())
+    spent = sum(results) * 7.0
+
+    assert sum(results) == int(START_BALANCE // 7.0)
+    assert balances[DONOR] == START_BALANCE - spent >= 0
+    # 流水对账：付款方支出之和、作者收入之和与余额一致，话题收入与成功次数一致
+    assert ledger[DONOR] == -spent
+    # 作者按比例多次入账，浮点累加误差用 approx 比较
+    assert ledger[AUTHOR_A] == pytest.approx(balances[AUTHOR_A]) == pytest.approx(spent * 0.7)
+    assert ledger[AUTHOR_B] == pytest.approx(balances[AUTHOR_B]) == pytest.approx(spent * 0.3)
+    assert received == spent
+
+
+def test_parallel_mixed_spends_never_go_negative(arun, fresh_db):
+    async def scenario():
+        await _seed()
+        spends = [_donate(3.0) if i % 2 else _deduct(5.0) for i in range(60)]
+        results = await asyncio.gather(*spends)
+        return results, await _balances_and_ledger()
+
+    results, (balances, ledger, _) = arun(scenario())
+    spent = sum((3.0 if i % 2 else 5.0) for i, ok in enumerate(results) if ok)
+
+    assert balances[DONOR] >= 0
+    assert balances[DONOR] == START_BALANCE - spent
+    assert ledger[DONOR] == -spent
+    # 剩余余额不足以再完成任意一笔
+    assert balances[DONOR] < 3.0
+
+
+def test_failed_deduct_keeps_caller_transaction(arun, fresh_db):
+    async def scenario():
+        await _seed()
+        async with get_sessionmaker()() as db:
+            user = await db.get(User, DONOR)
+            user.nickname = "pending-change"
+            await db.flush()
+            success, msg, balance = await electrolyte_crud.deduct_electrolyte(db, DONOR, START_BALANCE + 1)
+            await db.commit()
+        async with get_sessionmaker()() as db:
+            nickname = (await db.execute(select(User.nickname).where(User.id == DONOR))).scalar_one()
+        return success, msg, balance, nickname
+
+    success, msg, balance, nickname = arun(scenario())
+    assert (success, msg, balance) == (False, "电解液不足", START_BALANCE)
+    assert nickname == "pending-change"
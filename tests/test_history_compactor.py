@@ -0,0 +1,108 @@
+# tests/test_history_compactor.py
+"""
+HistoryCompactor.fold 分批折叠测试
+
+积压远超 fold 预算时：每次 LLM 调用的输入不超预算，history_summary_until 逐批推进，
+最终停在最近 keep_recent 条之前；并发写入抢先推进边界时停止，不覆盖对方的摘要。
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import Message, Session, User
+from backend.services.history_compactor import HistoryCompactor
+from backend.utils.text_tools import estimate_tokens
+
+SESSION_ID = "s1"
+MESSAGES = 120
+FOLD_BUDGET = 2000
+
+
+class _FakeLLM:
+    """记录每次折叠的输入，返回带序号的摘要"""
+
+    def __init__(self, on_call=None):
+        self.prompts = []
+        self.on_call = on_call
+
+    async def chat_stream(self, system_prompt, user_prompt, history):
+        self.prompts.append(user_prompt)
+        if self.on_call:
+            await self.on_call(len(self.prompts))
+        yield f"摘要{len(self.prompts)}"
+
+
+async def _seed():
+    now = datetime(2025, 1, 1)
+    async with get_sessionmaker()() as db:
+        await db.execute(insert(User).values(
+            id=1, email="u1@x.com", nickname="u1", password_hash="x", electrolyte_number=0.0,
+        ))
+        await db.execute(insert(Session).values(
+            id=SESSION_ID, user_id=1, mode=2, is_completed=False, created_at=now, updated_at=now,
+        ))
+        await db.execute(insert(Message), [
+            {"session_id": SESSION_ID, "role": "user" if i % 2 == 0 else "assistant",
+             "content": f"第{i}条" + "观点" * 100, "created_at": now + timedelta(seconds=i)}
+            for i in range(MESSAGES)
+        ])
+        await db.commit()
+        ids = (await db.execute(
+            select(Message.id).where(Message.session_id == SESSION_ID).order_by(Message.id)
+        )).scalars().all()
+    return ids
+
+
+async def _summary():
+    async with get_sessionmaker()() as db:
+        return (await db.execute(
+            select(Session.history_summary, Session.history_summary_until).where(Session.id == SESSION_ID)
+        )).one()
+
+
+def test_fold_batches_within_budget(arun, fresh_db):
+    llm = _FakeLLM()
+    compactor = HistoryCompactor(llm, budgets={"fold": FOLD_BUDGET}, keep_recent_turns=6)
+
+    async def scenario():
+        ids = await _seed()
+        folded = await compactor.fold(SESSION_ID)
+        return ids, folded, await _summary()
+
+    ids, folded, (summary, until) = arun(scenario())
+
+    assert folded
+    assert len(llm.prompts) > 1
+    assert all(estimate_tokens(p) <= FOLD_BUDGET for p in llm.prompts)
+    # 每批都带上一批的摘要
+    assert all(f"摘要{n}" in p for n, p in enumerate(llm.prompts[1:], start=1))
+    assert summary == f"摘要{len(llm.prompts)}"
+    assert until == ids[MESSAGES - 12 - 1]
+    assert compactor.metrics()["folds_total"] == len(llm.prompts)
+
+
+def test_fold_stops_when_boundary_moves(arun, fresh_db):
+    async def steal(call):
+        # 第二批调用期间，另一进程推进了摘要边界
+        if call == 2:
+            async with get_sessionmaker()() as db:
+                await db.execute(update(Session).where(Session.id == SESSION_ID).values(
+                    history_summary="别人的摘要", history_summary_until=10 ** 9,
+                ))
+                await db.commit()
+
+    llm = _FakeLLM(on_call=steal)
+    compactor = HistoryCompactor(llm, budgets={"fold": FOLD_BUDGET}, keep_recent_turns=6)
+
+    async def scenario():
+        await _seed()
+        folded = await compactor.fold(SESSION_ID)
+        return folded, await _summary()
+
+    folded, (summary, until) = arun(scenario())
+
+    assert folded
+    assert len(llm.prompts) == 2
+    assert (summary, until) == ("别人的摘要", 10 ** 9)
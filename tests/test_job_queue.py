@@ -0,0 +1,89 @@
+# tests/test_job_queue.py
+"""
+JobQueue 租约相关测试
+
+- 执行时间超过 lease_seconds 的任务靠续租保持租约：不被回收、只执行一次、正常标记完成
+- 最终失败的任务清除 rerun 标记（执行期间被 requeue 过也一样）
+"""
+
+import asyncio
+
+from sqlalchemy import select
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import BackgroundJob
+from backend.services.job_queue import JobQueue
+
+
+async def _job(dedupe_key):
+    async with get_sessionmaker()() as db:
+        return (await db.execute(
+            select(BackgroundJob).where(BackgroundJob.dedupe_key == dedupe_key)
+        )).scalar_one()
+
+
+async def _wait_for_status(dedupe_key, status, timeout=10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while (await _job(dedupe_key)).status != status:
+        assert asyncio.get_running_loop().time() < deadline, "等待超时"
+        await asyncio.sleep(0.05)
+
+
+def test_long_job_keeps_lease_with_heartbeat(arun, fresh_db):
+    # 租约 0.6s，任务执行 2s；维护循环每 0.15s 回收一次过期任务
+    queue = JobQueue(concurrency=2, poll_interval=0.05, lease_seconds=0.6)
+    runs = []
+
+    async def slow(payload):
+        runs.append(payload["n"])
+        await asyncio.sleep(2.0)
+
+    queue.register("slow", slow)
+
+    async def scenario():
+        await queue.start()
+        try:
+            await queue.enqueue("slow", "slow:1", {"n": 1})
+            await _wait_for_status("slow:1", "done")
+        finally:
+            await queue.stop()
+        return await _job("slow:1")
+
+    job = arun(scenario())
+    metrics = queue.metrics()
+
+    assert runs == [1]
+    assert (job.status, job.attempts, job.locked_at) == ("done", 1, None)
+    assert metrics["succeeded"] == 1
+    assert metrics["lease_lost"] == 0
+    assert metrics["lease_renewed"] >= 3
+
+
+def test_terminal_failure_clears_rerun(arun, fresh_db):
+    queue = JobQueue(concurrency=1, poll_interval=0.05, base_retry_delay=0.01)
+    calls = []
+
+    async def failing(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            # 执行期间再次 requeue：打上 rerun 标记
+            await queue.enqueue("failing", "failing:1", {"n": 2}, max_attempts=1, requeue=True)
+            assert (await _job("failing:1")).rerun
+        raise RuntimeError("boom")
+
+    queue.register("failing", failing)
+
+    async def scenario():
+        await queue.start()
+        try:
+            await queue.enqueue("failing", "failing:1", {"n": 1}, max_attempts=1)
+            await _wait_for_status("failing:1", "failed")
+        finally:
+            await queue.stop()
+        return await _job("failing:1")
+
+    job = arun(scenario())
+
+    assert len(calls) == 1
+    assert (job.status, job.rerun, job.locked_at) == ("failed", False, None)
+    assert queue.metrics()["failed"] == 1
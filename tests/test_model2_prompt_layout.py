@@ -0,0 +1,66 @@
+# tests/test_model2_prompt_layout.py
+"""
+model2 请求的 messages 排列
+
+按 DeepSeek 客户端的拼法（system + history + user_prompt）还原实际请求：
+- 不出现连续两条 user 消息（本轮指令并入历史末尾的用户发言）
+- 之前的历史 messages 原样保留（前缀缓存）
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.model2_service import Model2Service
+
+HISTORY = [
+    {"role": "user", "content": "我觉得远程办公更好"},
+    {"role": "assistant", "content": "为什么这么想？"},
+    {"role": "user", "content": "通勤太浪费时间了"},
+]
+
+
+class _RecordingLLM:
+    def __init__(self, reply='{"advice": "继续追问", "report_ready": false}'):
+        self.reply = reply
+        self.requests = []
+
+    async def chat_stream(self, system_prompt, user_prompt, history=None):
+        # 与 DeepSeekClient.chat_stream 的 messages 拼法一致
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": user_prompt})
+        self.requests.append(messages)
+        yield self.reply
+
+
+def _assert_alternating(messages):
+    roles = [m["role"] for m in messages]
+    assert all(a != b for a, b in zip(roles, roles[1:])), roles
+
+
+@pytest.mark.parametrize("mode", [1, 2])
+def test_analyze_merges_instruction_into_last_user_turn(mode):
+    llm = _RecordingLLM()
+    result = asyncio.run(Model2Service(llm).analyze(
+        HISTORY, user_input=HISTORY[-1]["content"], mode=mode, topic_id=None,
+    ))
+    messages = llm.requests[0]
+
+    assert result["advice"] == "继续追问"
+    _assert_alternating(messages)
+    assert messages[1:-1] == HISTORY[:-1]
+    assert messages[-1]["content"].startswith(HISTORY[-1]["content"])
+    assert "请根据系统提示中的要求进行分析" in messages[-1]["content"]
+
+
+def test_final_report_keeps_instruction_separate_after_assistant_turn():
+    history = HISTORY + [{"role": "assistant", "content": "谢谢分享，再见"}]
+    llm = _RecordingLLM(reply="报告正文")
+    report = asyncio.run(Model2Service(llm).final_report(history, mode=2, topic_id=None))
+    messages = llm.requests[0]
+
+    assert report == "报告正文"
+    _assert_alternating(messages)
+    assert messages[1:-1] == history
+    assert "观念分析报告" in messages[-1]["content"]
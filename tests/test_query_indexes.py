@@ -0,0 +1,124 @@
+# tests/test_query_indexes.py
+"""
+会话历史 / 会话列表查询的索引回归测试
+
+先按 models.py 建表、删掉两个复合索引，再执行 backend/db/migrations/session_history_indexes.sql，
+然后对实际使用的查询跑 EXPLAIN，断言命中对应索引。
+
+- SQLite：始终运行（EXPLAIN QUERY PLAN）
+- MySQL：设置 METALKS_TEST_MYSQL_URL（同步驱动，如 mysql+pymysql://u:p@host/db）时运行（EXPLAIN）；
+  会删除并重建该库中的表，只能指向一次性的测试库
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+
+from backend.db.database import Base
+from backend.db.models import User, Session, Message
+from backend.db.crud.session import _session_list_query
+from backend.services.db_history_manager import history_messages_query, history_version_columns
+from backend.utils import keyset
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "backend", "db", "migrations", "session_history_indexes.sql",
+)
+MESSAGE_INDEX = "idx_message_session_created"
+SESSION_INDEX = "idx_session_user_deleted_created"
+
+
+def _engines():
+    path = os.path.join(tempfile.mkdtemp(prefix="metalks-explain-"), "explain.db")
+    yield pytest.param(f"sqlite:///{path}", id="sqlite")
+    mysql_url = os.getenv("METALKS_TEST_MYSQL_URL")
+    yield pytest.param(
+        mysql_url,
+        id="mysql",
+        marks=pytest.mark.skipif(not mysql_url, reason="未设置 METALKS_TEST_MYSQL_URL"),
+    )
+
+
+def _migration_statements():
+    with open(MIGRATION, encoding="utf8") as f:
+        lines = [line for line in f if not line.lstrip().startswith("--")]
+    return [s.strip() for s in "".join(lines).split(";") if s.strip()]
+
+
+@pytest.fixture(params=list(_engines()))
+def engine(request):
+    engine = create_engine(request.param)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # 模拟升级前的库：去掉两个复合索引，再由迁移脚本补上
+        conn.execute(text(f"DROP INDEX {MESSAGE_INDEX}" + (" ON messages" if engine.dialect.name == "mysql" else "")))
+        conn.execute(text(f"DROP INDEX {SESSION_INDEX}" + (" ON sessions" if engine.dialect.name == "mysql" else "")))
+        for statement in _migration_statements():
+            conn.execute(text(statement))
+        _seed(conn)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _seed(conn):
+    now = datetime(2025, 1, 1)
+    conn.execute(insert(User), [
+        {"id": u, "email": f"u{u}@x.com", "nickname": f"u{u}", "password_hash": "x", "electrolyte_number": 0}
+        for u in range(1, 21)
+    ])
+    conn.execute(insert(Session), [
+        {
+            "id": f"s{i}", "user_id": i % 20 + 1, "mode": 2, "is_completed": False,
+            "created_at": now + timedelta(minutes=i), "updated_at": now + timedelta(minutes=i),
+            "deleted_at": now if i % 10 == 0 else None,
+        }
+        for i in range(400)
+    ])
+    conn.execute(insert(Message), [
+        {"session_id": f"s{i % 400}", "role": "user", "content": "x", "created_at": now + timedelta(seconds=i)}
+        for i in range(4000)
+    ])
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("ANALYZE"))
+
+
+def _plan(engine, stmt) -> str:
+    """执行 EXPLAIN，返回计划中出现的索引名（小写拼接），用于断言"""
+    compiled = stmt.compile(dialect=engine.dialect)
+    params = compiled.construct_params()
+    positional = tuple(params[name] for name in compiled.positiontup) if compiled.positiontup else params
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, positional).all()
+            return " | ".join(str(row[-1]) for row in rows)
+        rows = conn.exec_driver_sql("EXPLAIN " + compiled.string, positional).mappings().all()
+        return " | ".join(f"{row['table']}:{row['key']}" for row in rows)
+
+
+def test_history_query_uses_message_index(engine):
+    plan = _plan(engine, history_messages_query("s7"))
+    assert MESSAGE_INDEX in plan, plan
+
+
+def test_history_version_uses_message_index(engine):
+    count, last_id = history_version_columns("s7")
+    plan = _plan(engine, select(count, last_id))
+    assert MESSAGE_INDEX in plan, plan
+
+
+def test_session_list_uses_session_index(engine):
+    plan = _plan(engine, _session_list_query(3).limit(21))
+    assert SESSION_INDEX in plan, plan
+
+
+def test_session_list_next_page_uses_session_index(engine):
+    stmt = _session_list_query(3).where(
+        keyset.before(Session.created_at, Session.id, datetime(2025, 1, 1, 3), "s200")
+    ).limit(21)
+    plan = _plan(engine, stmt)
+    assert SESSION_INDEX in plan, plan
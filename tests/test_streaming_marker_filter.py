@@ -0,0 +1,99 @@
+# tests/test_streaming_marker_filter.py
+"""
+StreamingMarkerFilter 与一次性函数的差分测试
+
+同一段模型输出按随机方式切块逐块 feed()，拼接后的可见文本与 flags
+必须与 strip_control_markers / parse_control_flags(完整输出) 完全一致。
+"""
+
+import random
+
+import pytest
+
+from backend.utils.text_tools import (
+    StreamingMarkerFilter,
+    parse_control_flags,
+    strip_control_markers,
+)
+
+# 生成输出的片段：普通文本、空白、完整/残缺的标记、各种 payload
+_PIECES = [
+    "你好", "，", "今天想聊点什么？", "Hello", " world", "a<b", "1 < 2", "x>y",
+    " ", "  ", "\n", "\n\n", "\t",
+    "<", "<S", "<SY", "<SYS", "SYS>", "<SYS>", "</", "</S", "</SYS", "</SYS>", "<<SYS>", "</SYS></SYS>",
+    '{"user_want_to_quit": true}', '{"user_want_to_quit": false}', ' {"user_want_to_quit": 1} ',
+    '{"other": 1}', "{bad json", "{}",
+]
+
+
+def _random_output(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 14)):
+        roll = rng.random()
+        if roll < 0.2:
+            # 完整的控制块，内容随机
+            payload = rng.choice(_PIECES[-6:]) if rng.random() < 0.7 else rng.choice(_PIECES)
+            parts.append(f"<SYS>{payload}</SYS>")
+        else:
+            parts.append(rng.choice(_PIECES))
+    return "".join(parts)
+
+
+def _random_chunks(rng: random.Random, text: str):
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.choice((1, 1, 2, 3, 5, 8, 13, len(text)))
+        chunks.append(text[i:i + size])
+        i += size
+    # 偶尔插入空块（部分 SDK 会发空增量）
+    if chunks and rng.random() < 0.2:
+        chunks.insert(rng.randrange(len(chunks)), "")
+    return chunks
+
+
+def _stream(chunks):
+    f = StreamingMarkerFilter()
+    out = [f.feed(chunk) for chunk in chunks]
+    out.append(f.flush())
+    return f, "".join(out)
+
+
+def _assert_equivalent(text: str, chunks):
+    f, streamed = _stream(chunks)
+    assert streamed == strip_control_markers(text), (text, chunks)
+    assert f.visible_text == streamed
+    assert f.flags == parse_control_flags(text), (text, chunks)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "你好<SYS>{\"user_want_to_quit\": true}</SYS>",
+    "<SYS>{\"user_want_to_quit\": true}</SYS>  再见  ",
+    "前<SYS>未闭合的块",
+    "a<SYS>1</SYS>b<SYS>{\"user_want_to_quit\": true}</SYS>c",
+    "<SY</SYS>S>",
+    "<<SYS>x</SYS>>",
+    "\n\n  正文  \n<SYS>{}</SYS>\n",
+])
+def test_fixed_cases_every_split(text):
+    # 单个切点的所有位置 + 逐字符
+    for cut in range(len(text) + 1):
+        _assert_equivalent(text, [text[:cut], text[cut:]])
+    _assert_equivalent(text, list(text))
+
+
+def test_random_chunkings_match_one_shot():
+    rng = random.Random(20240601)
+    for _ in range(5000):
+        text = _random_output(rng)
+        _assert_equivalent(text, _random_chunks(rng, text))
+
+
+def test_held_text_is_released_promptly():
+    """不含标记前缀的文本立即输出，不等到 flush()"""
+    f = StreamingMarkerFilter()
+    assert f.feed("你好，") == "你好，"
+    assert f.feed("今天<S") == "今天"
+    assert f.feed("YS>{}</SYS>好") == "好"
+    assert f.flush() == ""
@@ -0,0 +1,95 @@
+# tests/test_topic_like_concurrency.py
+"""
+话题点赞并发计数测试
+
+约 1k 个用户同时点赞同一话题、再有一部分同时取消，最终 likes_count 必须与点赞记录数一致（无丢失更新）。
+分别覆盖两条计数路径：
+- 直接原子 UPDATE（likes_count 不在写回字段中）
+- 写回缓冲（likes_count 配置为 write-behind，期间后台定期 flush，最后 stop() 落库）
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from backend.db.database import get_sessionmaker
+from backend.db.models import Topic, TopicLike, User
+from backend.services import topic_service
+from backend.services.topic_counters import configure_topic_counters
+
+TOPIC_ID = 1
+USERS = 1000
+UNLIKES = 300
+CONCURRENCY = 50
+
+
+@pytest.fixture
+def counters():
+    """按参数替换进程级计数缓冲，测试结束恢复默认配置"""
+    yield configure_topic_counters
+    configure_topic_counters()
+
+
+async def _seed():
+    async with get_sessionmaker()() as db:
+        await db.execute(insert(User), [
+            {"id": uid, "email": f"u{uid}@x.com", "nickname": f"u{uid}", "password_hash": "x",
+             "electrolyte_number": 0.0}
+            for uid in range(1, USERS + 1)
+        ])
+        await db.execute(insert(Topic).values(
+            id=TOPIC_ID, title="t", content="c", prompt="p", status="approved", is_active=True,
+        ))
+        await db.commit()
+
+
+async def _toggle_all(user_ids):
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def toggle(uid):
+        async with sem:
+            async with get_sessionmaker()() as db:
+                result = await topic_service.toggle_like(db, uid, TOPIC_ID)
+        assert result["success"]
+        return result["liked"]
+
+    return await asyncio.gather(*(toggle(uid) for uid in user_ids))
+
+
+async def _final_counts():
+    async with get_sessionmaker()() as db:
+        likes_count = (await db.execute(
+            select(Topic.likes_count).where(Topic.id == TOPIC_ID)
+        )).scalar_one()
+        rows = (await db.execute(
+            select(func.count()).select_from(TopicLike).where(TopicLike.topic_id == TOPIC_ID)
+        )).scalar_one()
+    return likes_count, rows
+
+
+@pytest.mark.parametrize("write_behind", [(), ("likes_count",)], ids=["direct", "write-behind"])
+def test_parallel_likes_lose_no_updates(arun, fresh_db, counters, write_behind):
+    buffer = counters(write_behind=write_behind, flush_interval=0.05)
+
+    async def scenario():
+        await _seed()
+        await buffer.start()
+        try:
+            liked = await _toggle_all(range(1, USERS + 1))
+            unliked = await _toggle_all(range(1, UNLIKES + 1))
+        finally:
+            await buffer.stop()
+        return liked, unliked, await _final_counts()
+
+    liked, unliked, (likes_count, rows) = arun(scenario())
+
+    assert all(liked) and not any(unliked)
+    assert rows == USERS - UNLIKES
+    assert likes_count == USERS - UNLIKES
+    if write_behind:
+        # 写回路径：增量确实经过缓冲，且 stop() 后没有残留
+        metrics = buffer.metrics()
+        assert metrics["buffered_total"] == USERS + UNLIKES
+        assert metrics["pending_topics"] == 0
+        assert metrics["flushes_total"] >= 1 and metrics["flush_failures_total"] == 0